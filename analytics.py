@@ -1,28 +1,96 @@
+import argparse
 import json
+import logging
 import os
-from datetime import datetime, timedelta
-from collections import Counter
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from config import Config
+from conversation_log import iter_conversations_from
+from conversation_stats import ConversationStats
+from shared_store import iter_sqlite_conversation_rows
+
+logger = logging.getLogger(__name__)
+
 class ChatbotAnalytics:
-    def __init__(self):
+    def __init__(self, reset: bool = False):
         self.data_dir = "data"
-        self.load_conversations()
-        
-    def load_conversations(self):
-        """Load conversation history"""
+        self.checkpoint_path = os.path.join(self.data_dir, Config.DATA_FILES["analytics_checkpoint"])
+        self.new_records = 0
+        self.load_conversations(reset)
+    
+    def load_conversations(self, reset: bool = False):
+        """Fold conversations into the aggregates in one streaming pass, starting where the last run stopped
+        
+        The checkpoint holds the aggregate state plus the read position (byte
+        offset into the JSONL log, or the last row id of the shared store);
+        a log that was replaced or truncated since is read from the start.
+        """
+        store_file = os.path.join(self.data_dir, Config.DATA_FILES["shared_store"])
+        log_file = os.path.join(self.data_dir, Config.DATA_FILES["conversation_log"])
         conv_file = os.path.join(self.data_dir, "conversations.json")
-        if os.path.exists(conv_file):
-            with open(conv_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.conversations = data.get('conversations', [])
+        
+        if Config.CONVERSATION_STORAGE == "sqlite" and os.path.exists(store_file):
+            source = {"kind": "sqlite", "path": store_file, "position": 0}
+        elif os.path.exists(log_file):
+            source = {"kind": "jsonl", "path": log_file, "inode": os.stat(log_file).st_ino, "position": 0}
+        else:
+            # Legacy conversations.json: one document, no position to resume from
+            self.stats = ConversationStats(**Config.ANALYTICS)
+            if os.path.exists(conv_file):
+                with open(conv_file, 'r', encoding='utf-8') as f:
+                    for conv in json.load(f).get('conversations', []):
+                        self.stats.add(conv)
+                        self.new_records += 1
+            return
+        
+        self.stats = ConversationStats(**Config.ANALYTICS)
+        checkpoint = None if reset else self.read_checkpoint()
+        if checkpoint is not None and self.can_resume(checkpoint["source"], source):
+            self.stats = ConversationStats.from_dict(checkpoint["stats"])
+            source["position"] = checkpoint["source"]["position"]
+        
+        if source["kind"] == "sqlite":
+            records = ((record, row_id) for row_id, record in iter_sqlite_conversation_rows(source["path"], source["position"]))
         else:
-            self.conversations = []
+            records = iter_conversations_from(source["path"], source["position"])
+        
+        for record, position in records:
+            self.stats.add(record)
+            source["position"] = position
+            self.new_records += 1
+        
+        self.write_checkpoint({"source": source, "stats": self.stats.to_dict()})
+    
+    @staticmethod
+    def can_resume(saved: dict, current: dict) -> bool:
+        """Same log as last time, and not rewritten or truncated since"""
+        if saved.get("kind") != current["kind"] or saved.get("path") != current["path"]:
+            return False
+        if current["kind"] == "jsonl":
+            return saved.get("inode") == current["inode"] and saved["position"] <= os.path.getsize(current["path"])
+        return True
+    
+    def read_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("⚠️ Ignoring unreadable analytics checkpoint: %s", e)
+            return None
+    
+    def write_checkpoint(self, checkpoint: dict):
+        # Temp file + rename: a crash never leaves a half-written checkpoint
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
     
     def generate_report(self):
         """Generate analytics report"""
-        if not self.conversations:
+        if not self.stats.total:
             print("No conversation data available yet!")
             return
         
@@ -31,11 +99,11 @@ class ChatbotAnalytics:
         print("="*60)
         
         # Basic stats
-        total_conversations = len(self.conversations)
-        unique_sessions = len(set(c['session_id'] for c in self.conversations))
+        total_conversations = self.stats.total
+        unique_sessions = self.stats.unique_sessions
         
         print(f"\n📊 OVERVIEW:")
-        print(f"  Total Conversations: {total_conversations}")
+        print(f"  Total Conversations: {total_conversations} ({self.new_records} new since last run)")
         print(f"  Unique Sessions: {unique_sessions}")
         print(f"  Avg Messages/Session: {total_conversations/unique_sessions:.1f}")
         
@@ -52,59 +120,22 @@ class ChatbotAnalytics:
         self.create_visualizations()
     
     def analyze_queries(self):
-        """Analyze user queries"""
-        user_messages = [c['user_message'] for c in self.conversations]
-        
-        # Most common words
-        all_words = ' '.join(user_messages).lower().split()
-        word_freq = Counter(all_words)
-        
-        # Remove common words
-        stop_words = {'i', 'the', 'is', 'my', 'a', 'to', 'and', 'of', 'in', 'for'}
-        for word in stop_words:
-            word_freq.pop(word, None)
-        
+        """Analyze user queries (stop words are dropped as records are counted)"""
         print(f"\n🔍 TOP KEYWORDS:")
-        for word, count in word_freq.most_common(10):
+        for word, count in self.stats.top_keywords(10):
             print(f"  {word}: {count}")
     
     def analyze_response_patterns(self):
         """Analyze response patterns"""
         print(f"\n⏱️ USAGE PATTERNS:")
         
-        # Group by hour
-        hours = []
-        for conv in self.conversations:
-            try:
-                timestamp = datetime.fromisoformat(conv['timestamp'])
-                hours.append(timestamp.hour)
-            except:
-                pass
-        
-        if hours:
-            hour_counts = Counter(hours)
-            peak_hour = hour_counts.most_common(1)[0][0]
+        peak_hour = self.stats.peak_hour()
+        if peak_hour is not None:
             print(f"  Peak Usage Hour: {peak_hour}:00 - {peak_hour+1}:00")
     
     def analyze_intents(self):
         """Analyze user intents"""
-        intents = {
-            'order_tracking': 0,
-            'restaurant_search': 0,
-            'menu_query': 0,
-            'general': 0
-        }
-        
-        for conv in self.conversations:
-            msg = conv['user_message'].lower()
-            if any(word in msg for word in ['track', 'order', 'ord', 'status', 'where']):
-                intents['order_tracking'] += 1
-            elif any(word in msg for word in ['restaurant', 'pizza', 'biryani', 'burger', 'food']):
-                intents['restaurant_search'] += 1
-            elif 'menu' in msg:
-                intents['menu_query'] += 1
-            else:
-                intents['general'] += 1
+        intents = self.stats.intents
         
         print(f"\n🎯 USER INTENTS:")
         total = sum(intents.values())
@@ -121,15 +152,8 @@ class ChatbotAnalytics:
             
             # 1. Messages over time
             plt.subplot(2, 2, 1)
-            timestamps = []
-            for conv in self.conversations:
-                try:
-                    timestamps.append(datetime.fromisoformat(conv['timestamp']))
-                except:
-                    pass
-            
-            if timestamps:
-                plt.hist([t.hour for t in timestamps], bins=24, color='#fc8019', alpha=0.7)
+            if any(self.stats.hours):
+                plt.bar(range(24), self.stats.hours, color='#fc8019', alpha=0.7)
                 plt.xlabel('Hour of Day')
                 plt.ylabel('Number of Messages')
                 plt.title('Message Distribution by Hour')
@@ -153,7 +177,7 @@ class ChatbotAnalytics:
             
             # 4. Response Word Count
             plt.subplot(2, 2, 4)
-            word_counts = [len(c['bot_response'].split()) for c in self.conversations[:20]]
+            word_counts = self.stats.response_words
             if word_counts:
                 plt.plot(word_counts, marker='o', color='#fc8019')
                 plt.xlabel('Response Number')
@@ -172,32 +196,17 @@ class ChatbotAnalytics:
             print("Install matplotlib and seaborn: pip install matplotlib seaborn")
     
     def get_intent_distribution(self):
-        """Get intent distribution for pie chart"""
-        intents = {
-            'Order Tracking': 0,
-            'Restaurant Search': 0,
-            'Menu Query': 0,
-            'General': 0
-        }
-        
-        for conv in self.conversations:
-            msg = conv['user_message'].lower()
-            if any(word in msg for word in ['track', 'order', 'ord']):
-                intents['Order Tracking'] += 1
-            elif any(word in msg for word in ['restaurant', 'pizza', 'biryani']):
-                intents['Restaurant Search'] += 1
-            elif 'menu' in msg:
-                intents['Menu Query'] += 1
-            else:
-                intents['General'] += 1
-        
-        return intents
+        """Get intent distribution for pie chart (same classification as the report)"""
+        return {intent.replace('_', ' ').title(): count for intent, count in self.stats.intents.items()}
     
     def get_session_lengths(self):
         """Get message count per session"""
-        session_counts = Counter(c['session_id'] for c in self.conversations)
-        return list(session_counts.values())[:10]  # Top 10 sessions
+        return list(self.stats.session_lengths.values())  # First 10 sessions
 
 if __name__ == "__main__":
-    analytics = ChatbotAnalytics()
-    analytics.generate_report()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Swiggy chatbot analytics report")
+    parser.add_argument("--reset", action="store_true", help="ignore the checkpoint and re-read the whole log")
+    args = parser.parse_args()
+    
+    analytics = ChatbotAnalytics(reset=args.reset)
+    analytics.generate_report()
@@ -1,13 +1,33 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Any, Optional
 import uvicorn
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+import argparse
 import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
 
+import metrics
+import prefork
+from catalog_reloader import CatalogReloader
 from llm_handler import SwiggyBot
 from data_manager import data_manager
+from inference_worker import InferenceExecutor, QueueFullError
+from session_store import SessionStore
+from shared_store import SharedSessionStore
+from config import Config
+
+logging.basicConfig(level=Config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("app")
 
 app = FastAPI(title="Swiggy Chatbot API - FAST")
 
@@ -20,16 +40,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize bot once (singleton)
-print("🤖 Initializing Fast Chatbot...")
+# Initialize bot once (singleton); the model loads in the background after startup
+logger.info("🤖 Initializing Fast Chatbot...")
 bot = SwiggyBot()
-print("✅ Ready!")
+logger.info("✅ Ready! (rule-based answers now, LLM once the model has loaded)")
+
+# All LLM generations run on these workers so they never block the event loop
+inference = InferenceExecutor(**Config.INFERENCE, workers=bot.llm_concurrency)
+
+# Point-in-time values, read on each /metrics scrape
+metrics.registry.gauge("swiggy_model_ready", "1 once the model is loaded and warmed up", lambda: int(bot.is_ready))
+metrics.registry.gauge("swiggy_inference_queue_depth", "LLM jobs waiting for a worker", lambda: inference.queue_depth)
+metrics.registry.gauge("swiggy_inference_busy_workers", "Workers running a generation", lambda: inference.busy)
+metrics.registry.gauge("swiggy_response_cache_entries", "Cached LLM answers", lambda: len(bot.response_cache))
 
-# Session storage
-chat_sessions = {}
+# Catalog hot reload: rebuilt off the request path and swapped in atomically
+catalog_reloader = CatalogReloader(data_manager, interval=Config.CATALOG_RELOAD["interval"])
+
+# Session storage (idle sessions expire, total history is capped); the sqlite
+# store is shared by all worker processes
+if Config.SESSION_STORAGE == "sqlite":
+    sessions = SharedSessionStore(
+        data_manager.shared_store_path,
+        timeout_seconds=Config.SESSION_TIMEOUT,
+        history_length=Config.MAX_HISTORY_LENGTH,
+        max_bytes=Config.MAX_SESSION_MEMORY,
+        **Config.SHARED_STORE
+    )
+else:
+    sessions = SessionStore(
+        timeout_seconds=Config.SESSION_TIMEOUT,
+        history_length=Config.MAX_HISTORY_LENGTH,
+        max_bytes=Config.MAX_SESSION_MEMORY
+    )
+metrics.registry.gauge("swiggy_sessions_live", "Chat sessions in the session store", lambda: len(sessions))
+metrics.registry.gauge("swiggy_sessions_bytes", "Estimated bytes of stored chat history", lambda: sessions.bytes)
 
 class ChatMessage(BaseModel):
-    message: str
+    message: str = Field(max_length=Config.MAX_MESSAGE_LENGTH)
     session_id: Optional[str] = "default"
 
 class ChatResponse(BaseModel):
@@ -37,6 +85,16 @@ class ChatResponse(BaseModel):
     timestamp: str
     session_id: str
     response_time: Optional[float] = None
+    queue_wait: Optional[float] = None
+    queue_depth: Optional[int] = None
+    degraded: bool = False
+
+@app.on_event("startup")
+def load_model():
+    # Returns at once so uvicorn binds the port while the model loads
+    bot.start_loading()
+    if Config.CATALOG_RELOAD["enabled"]:
+        catalog_reloader.start()
 
 @app.get("/")
 def root():
@@ -53,24 +111,36 @@ async def chat(chat_message: ChatMessage, background_tasks: BackgroundTasks):
     try:
         session_id = chat_message.session_id
         
-        if session_id not in chat_sessions:
-            chat_sessions[session_id] = []
-        
         # Add user message
-        chat_sessions[session_id].append({
-            "role": "user",
-            "content": chat_message.message,
-            "timestamp": datetime.now().isoformat()
-        })
+        sessions.add(session_id, "user", chat_message.message)
         
-        # Generate response (optimized)
-        response = bot.generate_response(
-            chat_message.message,
-            chat_sessions[session_id]
-        )
+        # Rule-based and cached answers come straight back on the event loop
+        queue_wait = None
+        degraded = False
+        response = bot.fast_response(chat_message.message, sessions.history(session_id))
+        
+        if response is None and not bot.is_ready:
+            # Model still loading: defined fallback, nothing is queued
+            response = bot.degraded_response()
+            degraded = True
+        
+        if response is None:
+            # LLM fallback: await the inference worker instead of blocking the loop
+            try:
+                response, queue_wait = await inference.run(
+                    bot.llm_response,
+                    chat_message.message,
+                    sessions.history(session_id),
+                    session_id
+                )
+            except QueueFullError:
+                raise HTTPException(status_code=503, detail=Config.ERROR_MESSAGES["server_busy"])
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=504, detail=Config.ERROR_MESSAGES["timeout"])
         
         # Calculate response time
         response_time = (datetime.now() - start_time).total_seconds()
+        metrics.REQUEST_SECONDS.observe(response_time, endpoint="/chat")
         
         # Save to file in background (non-blocking)
         background_tasks.add_task(
@@ -81,32 +151,262 @@ async def chat(chat_message: ChatMessage, background_tasks: BackgroundTasks):
         )
         
         # Add bot response
-        chat_sessions[session_id].append({
-            "role": "assistant",
-            "content": response,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Limit history
-        if len(chat_sessions[session_id]) > 20:
-            chat_sessions[session_id] = chat_sessions[session_id][-20:]
+        sessions.add(session_id, "assistant", response)
         
         return ChatResponse(
             response=response,
             timestamp=datetime.now().isoformat(),
             session_id=session_id,
-            response_time=round(response_time, 2)
+            response_time=round(response_time, 2),
+            queue_wait=round(queue_wait, 3) if queue_wait is not None else None,
+            queue_depth=inference.queue_depth,
+            degraded=degraded
         )
     
+    except HTTPException as e:
+        metrics.ERRORS.inc(endpoint="/chat", status=e.status_code)
+        raise
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
+        metrics.ERRORS.inc(endpoint="/chat", status=500)
+        logger.exception("❌ Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_event(payload: dict) -> str:
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(chat_message: ChatMessage):
+    """Server-Sent Events: one {"token"} event per chunk, then {"done"} (or {"error"})"""
+    start_time = time.monotonic()
+    session_id = chat_message.session_id
+    message = chat_message.message
+    
+    sessions.add(session_id, "user", message)
+    history = sessions.history(session_id)
+    
+    # Instant and cached answers go out as a single chunk (so does the
+    # fallback while the model is still loading)
+    fast = bot.fast_response(message, history)
+    degraded = fast is None and not bot.is_ready
+    if degraded:
+        fast = bot.degraded_response()
+    
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+    cancelled = threading.Event()
+    end_of_stream = object()
+    
+    def produce():
+        # Runs on the inference thread; hands each token to the event loop
+        for token in bot.llm_response_stream(message, history, session_id):
+            if cancelled.is_set():
+                break  # Client went away or timed out: stop generating
+            loop.call_soon_threadsafe(chunks.put_nowait, token)
+    
+    if fast is None:
+        try:
+            job = inference.submit(produce)
+        except QueueFullError:
+            metrics.ERRORS.inc(endpoint="/chat/stream", status=503)
+            raise HTTPException(status_code=503, detail=Config.ERROR_MESSAGES["server_busy"])
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(chunks.put_nowait, end_of_stream))
+    
+    async def events():
+        pieces = []
+        first_token = None
+        timeout = inference.timeout_seconds
+        deadline = start_time + timeout if timeout else None
+        
+        try:
+            if fast is not None:
+                pieces.append(fast)
+                first_token = time.monotonic()
+                yield sse_event({"token": fast})
+            else:
+                while True:
+                    remaining = max(deadline - time.monotonic(), 0) if deadline else None
+                    try:
+                        chunk = await asyncio.wait_for(chunks.get(), remaining)
+                    except asyncio.TimeoutError:
+                        cancelled.set()
+                        job.cancel()
+                        inference.timeouts += 1
+                        metrics.ERRORS.inc(endpoint="/chat/stream", status=504)
+                        yield sse_event({"error": Config.ERROR_MESSAGES["timeout"]})
+                        return
+                    
+                    if chunk is end_of_stream:
+                        if job.exception() is not None:
+                            metrics.ERRORS.inc(endpoint="/chat/stream", status=500)
+                            logger.error("❌ Error: %s", job.exception())
+                            yield sse_event({"error": Config.ERROR_MESSAGES["server_error"]})
+                            return
+                        break
+                    
+                    if first_token is None:
+                        first_token = time.monotonic()
+                    pieces.append(chunk)
+                    yield sse_event({"token": chunk})
+            
+            response = ''.join(pieces).strip()
+            sessions.add(session_id, "assistant", response)
+            # Off the event loop, like the /chat background task (the JSON store rewrites a file)
+            await run_in_threadpool(data_manager.save_conversation, session_id, message, response)
+            
+            response_time = time.monotonic() - start_time
+            metrics.REQUEST_SECONDS.observe(response_time, endpoint="/chat/stream")
+            
+            yield sse_event({
+                "done": True,
+                "response": response,
+                "session_id": session_id,
+                "timestamp": datetime.now().isoformat(),
+                "response_time": round(response_time, 3),
+                "time_to_first_token": round(first_token - start_time, 3) if first_token else None,
+                "queue_wait": round(job.result()[1], 3) if fast is None else None,
+                "degraded": degraded
+            })
+        finally:
+            # Covers client disconnects too
+            cancelled.set()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.on_event("shutdown")
+def shutdown():
+    # Commit any conversation records still waiting in the log writer
+    catalog_reloader.stop()
+    inference.close()
+    bot.backend.close()
+    data_manager.close()
+
 @app.get("/health")
 def health():
-    return {"status": "healthy", "speed": "optimized"}
+    sessions.sweep()
+    return {
+        "status": "healthy",
+        "speed": "optimized",
+        "worker_pid": os.getpid(),
+        "model": bot.model_state,
+        "inference": inference.stats(),
+        "llm": bot.backend.stats(),
+        "sessions": sessions.stats(),
+        "catalog": dict(data_manager.index.stats(), reload=catalog_reloader.stats())
+    }
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once the model is loaded and warmed up, 503 before"""
+    return JSONResponse(status_code=200 if bot.is_ready else 503, content=bot.model_status())
+
+@app.get("/cache/stats")
+def cache_stats():
+    stats = bot.response_cache.stats()
+    backend_stats = bot.backend.stats()
+    for key in ("prompt_prefix", "session_kv"):
+        if key in backend_stats:
+            stats[key] = backend_stats[key]
+    stats["prompt_history"] = bot.prompt_builder.stats()
+    if bot.semantic_cache is not None:
+        stats["semantic"] = bot.semantic_cache.stats()
+    stats["render"] = bot.render_cache.stats()
+    return stats
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint: stage histograms, route/token counters, gauges"""
+    sessions.sweep()  # Otherwise idle sessions count as live until the next chat write
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+def cacheable_json(request: Request, payload: Any, last_modified: Optional[float] = None) -> Response:
+    """JSON response with a content ETag (and Last-Modified); 304 when the client's copy is current"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}  # Cacheable, but revalidate each time
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    
+    # If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags or f"W/{etag}" in tags:
+            return Response(status_code=304, headers=headers)
+    elif last_modified is not None and "if-modified-since" in request.headers:
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"]).timestamp()
+        except (TypeError, ValueError):
+            since = None
+        if since is not None and int(last_modified) <= since:  # HTTP dates have 1s resolution
+            return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/restaurants")
+def api_restaurants(request: Request, query: str = Query(..., min_length=1), limit: int = Query(5, ge=1, le=50),
+                    fuzzy: bool = True):
+    """Restaurants whose name or cuisine contains query; if none do, closest spellings (unless fuzzy=false)"""
+    restaurants = data_manager.search_restaurants(query, limit=limit, fuzzy=fuzzy)
+    return cacheable_json(request, {"query": query, "fuzzy": fuzzy, "count": len(restaurants),
+                                    "restaurants": restaurants},
+                          data_manager.catalog_loaded_at)
+
+@app.get("/api/order/{order_id}")
+def api_order(order_id: str, request: Request):
+    order = data_manager.get_order_status(order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail=Config.ERROR_MESSAGES["order_not_found"].format(order_id.upper()))
+    return cacheable_json(request, order, data_manager.catalog_loaded_at)
+
+@app.get("/api/menu/{restaurant_id}")
+def api_menu(restaurant_id: str, request: Request):
+    items = data_manager.get_restaurant_menu(restaurant_id)
+    if not items:
+        raise HTTPException(status_code=404, detail=Config.ERROR_MESSAGES["restaurant_not_found"])
+    return cacheable_json(request, {"restaurant_id": restaurant_id, "items": items}, data_manager.catalog_loaded_at)
+
+@app.get("/api/history/{session_id}")
+def api_history(session_id: str, request: Request):
+    """Last saved conversations of a session, oldest first"""
+    history = data_manager.get_conversation_history(session_id)
+    return cacheable_json(request, {"session_id": session_id, "count": len(history), "conversations": history})
+
+@app.get("/api/stats")
+def api_stats(request: Request):
+    """Running conversation aggregates (maintained on each save, not recomputed from the log)"""
+    stats, updated_at = data_manager.get_stats()
+    return cacheable_json(request, stats, updated_at)
+
+def after_fork():
+    """Runs in each pre-forked worker: threads do not survive fork, so start them again"""
+    inference.after_fork()
+    bot.backend.after_fork()
+    data_manager.after_fork()
+
+def main(workers: int = Config.SERVER_WORKERS, host: str = Config.API_HOST, port: int = Config.API_PORT):
+    logger.info("⚡ Starting FAST Swiggy Chatbot...")
+    logger.info("🌐 http://localhost:%d", port)
+    if workers <= 1:
+        uvicorn.run(app, host=host, port=port, workers=1)
+        return
+    
+    if Config.SESSION_STORAGE != "sqlite" or Config.CONVERSATION_STORAGE != "sqlite":
+        raise SystemExit("❌ SERVER_WORKERS > 1 needs SESSION_STORAGE and CONVERSATION_STORAGE = \"sqlite\" "
+                         "so that every worker sees the same sessions")
+    
+    # Preload before fork: the catalog indexes were built on import, the model
+    # loads now, and the workers share both copy-on-write
+    bot.load_model()
+    prefork.serve(app, host, port, workers, after_fork=after_fork)
 
 if __name__ == "__main__":
-    print("⚡ Starting FAST Swiggy Chatbot...")
-    print("🌐 http://localhost:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000, workers=1)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Swiggy Chatbot API server")
+    parser.add_argument("--workers", type=int, default=Config.SERVER_WORKERS, help="worker processes")
+    parser.add_argument("--host", default=Config.API_HOST)
+    parser.add_argument("--port", type=int, default=Config.API_PORT)
+    args = parser.parse_args()
+    main(args.workers, args.host, args.port)
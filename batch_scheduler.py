@@ -0,0 +1,395 @@
+import codecs
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import llama_cpp
+
+from prefix_cache import stable_prefix_tokens
+
+_DONE = object()
+
+
+def sample_token(logits: np.ndarray, params: Dict, recent: Iterable[int], rng: np.random.Generator) -> int:
+    """repeat penalty -> top-k -> top-p -> min-p -> temperature, as llama.cpp orders them (logits is modified)"""
+    p = params
+    if p["repeat_penalty"] != 1.0 and recent:
+        recent = np.fromiter(set(recent), dtype=np.intc)
+        values = logits[recent]
+        logits[recent] = np.where(values > 0, values / p["repeat_penalty"], values * p["repeat_penalty"])
+
+    if p["temperature"] <= 0:
+        return int(np.argmax(logits))
+
+    n_vocab = len(logits)
+    k = p["top_k"] if 0 < p["top_k"] < n_vocab else n_vocab
+    top = np.argpartition(-logits, k - 1)[:k]
+    top = top[np.argsort(-logits[top])]
+    values = logits[top]
+
+    probs = np.exp(values - values[0])
+    probs /= probs.sum()
+    cutoff = int(np.searchsorted(np.cumsum(probs), p["top_p"])) + 1
+    keep = probs[:cutoff] >= p["min_p"] * probs[0]
+    top, values = top[:cutoff][keep], values[:cutoff][keep]
+
+    scaled = np.exp((values - values[0]) / p["temperature"])
+    return int(rng.choice(top, p=scaled / scaled.sum()))
+
+
+class _Sequence:
+    """One generation request moving through the scheduler"""
+
+    __slots__ = ("prompt", "prefix", "params", "emit", "tokens", "seq_id", "n_past", "prefill_pos",
+                 "last_token", "generated", "recent", "text", "emitted", "decoder",
+                 "logit_index", "reserved", "cancelled", "submitted_at", "first_token_at")
+
+    def __init__(self, prompt: str, params: Dict, emit, prefix: Optional[str] = None):
+        self.prompt = prompt
+        self.prefix = prefix
+        self.params = params
+        self.emit = emit
+        self.tokens: List[int] = []
+        self.seq_id = -1
+        self.n_past = 0
+        self.prefill_pos = 0
+        self.last_token = -1
+        self.generated = 0
+        self.recent: deque = deque(maxlen=64)
+        self.text = ""
+        self.emitted = 0
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self.logit_index = -1
+        self.reserved = 0
+        self.cancelled = False
+        self.submitted_at = time.monotonic()
+        self.first_token_at = None
+
+
+class BatchScheduler:
+    """Continuous batching in front of one llama-cpp context
+
+    Every decode step packs the next token of each running sequence (plus
+    prompt chunks of newly admitted ones) into a single llama_batch, each
+    with its own seq_id in the shared KV cache. New requests are admitted
+    between steps and a sequence is returned as soon as it hits EOS, a stop
+    string or max_tokens, freeing its KV cells for the next one.
+
+    A shared prompt prefix is evaluated once into its own sequence and its
+    KV cells are copied (not recomputed) into every new sequence that starts
+    with it; a different prefix text replaces it.
+
+    The scheduler thread is the only thing that touches the context once
+    started: do not call the Llama object directly while it runs.
+    """
+
+    def __init__(self, llm, max_sequences: int = 8, n_batch: int = 512, seed: Optional[int] = None):
+        self.llm = llm
+        self.ctx = llm.ctx
+        self.n_vocab = llm.n_vocab()
+        self.n_ctx = llm.n_ctx()
+        self.eos = llm.token_eos()
+        self.max_sequences = max_sequences
+        self.n_batch = min(n_batch, llm.n_batch)  # llama_decode rejects bigger batches
+        self._rng = np.random.default_rng(seed)
+
+        self._batch = llama_cpp.llama_batch_init(self.n_batch, 0, 1)
+        self._waiting: deque = deque()
+        self._active: List[_Sequence] = []
+        self._free_ids = list(range(max_sequences))
+        self._reserved = 0
+        self._closed = False
+
+        # Shared prompt prefix, kept in a sequence id no request uses
+        self.prefix_seq_id = max_sequences
+        self._prefix_text = None
+        self._prefix_tokens: List[int] = []
+
+        # Statistics
+        self.steps = 0
+        self.tokens_generated = 0
+        self.prefill_tokens = 0
+        self.sequences_per_step = 0
+        self.completed = 0
+        self.failed = 0
+        self.prefix_hits = 0
+        self.prefix_tokens_saved = 0
+        self.prefix_prefill_seconds = 0.0
+
+        # Start from an empty KV cache; the scheduler owns it from here on
+        llama_cpp.llama_kv_cache_clear(self.ctx)
+        llm.reset()
+
+        self._start()
+
+    def _start(self):
+        self._incoming = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+        self._thread.start()
+
+    def after_fork(self):
+        """Restart the scheduler thread in a forked worker; each process then owns its copy of the context"""
+        self._start()
+
+    def stream(self, prompt: str, max_tokens: int = 150, temperature: float = 0.7, top_p: float = 0.95,
+               top_k: int = 40, min_p: float = 0.05, repeat_penalty: float = 1.1,
+               stop: Optional[List[str]] = None, prefix: Optional[str] = None) -> Iterator[str]:
+        """Yield text pieces for one prompt; blocks the calling thread, never the scheduler
+
+        prefix is the fixed leading text of the prompt (e.g. the system prompt)
+        whose KV cells can be shared between requests.
+        """
+        pieces = queue.Queue()
+        params = dict(max_tokens=max_tokens, temperature=temperature, top_p=top_p, top_k=top_k,
+                      min_p=min_p, repeat_penalty=repeat_penalty, stop=stop or [])
+        seq = _Sequence(prompt, params, pieces.put, prefix)
+        self._incoming.put(seq)
+
+        try:
+            while True:
+                item = pieces.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Consumer stopped early (disconnect/timeout): free the slot next step
+            seq.cancelled = True
+
+    def close(self, timeout: float = 5.0):
+        self._closed = True
+        self._incoming.put(None)
+        self._thread.join(timeout)
+        llama_cpp.llama_batch_free(self._batch)
+
+    # ----- scheduler thread -----
+
+    def _run(self):
+        while not self._closed:
+            # Block only when there is nothing to decode
+            block = not self._active and not self._waiting
+            try:
+                while True:
+                    item = self._incoming.get(block=block)
+                    block = False
+                    if item is None:
+                        return
+                    self._waiting.append(item)
+            except queue.Empty:
+                pass
+
+            self._admit()
+            if self._active:
+                self._step()
+
+    def _admit(self):
+        """Move waiting requests into free sequence slots while KV space allows"""
+        while self._waiting and self._free_ids:
+            seq = self._waiting[0]
+            if seq.cancelled:
+                self._waiting.popleft()
+                continue
+
+            if not seq.tokens:
+                seq.tokens = self.llm.tokenize(seq.prompt.encode("utf-8"), special=True)
+                seq.recent.extend(seq.tokens)
+
+            # Leading tokens shared with the cached prefix (at least one prompt
+            # token is always decoded so the sequence gets its own logits)
+            shared = 0
+            if seq.prefix:
+                self._ensure_prefix(seq.prefix)
+                limit = min(len(self._prefix_tokens), len(seq.tokens) - 1)
+                while shared < limit and seq.tokens[shared] == self._prefix_tokens[shared]:
+                    shared += 1
+            seq.reserved = len(seq.tokens) - shared + seq.params["max_tokens"]
+
+            if seq.reserved > self.n_ctx:
+                self._waiting.popleft()
+                self._fail(seq, ValueError(f"Prompt needs {seq.reserved} tokens, context is {self.n_ctx}"))
+                continue
+            if self._reserved + seq.reserved > self.n_ctx:
+                break  # Wait for running sequences to finish and free their cells
+
+            self._waiting.popleft()
+            seq.seq_id = self._free_ids.pop()
+            self._reserved += seq.reserved
+            self._active.append(seq)
+
+            if shared:
+                llama_cpp.llama_kv_cache_seq_cp(self.ctx, self.prefix_seq_id, seq.seq_id, 0, shared)
+                seq.n_past = seq.prefill_pos = shared
+                self.prefix_hits += 1
+                self.prefix_tokens_saved += shared
+
+    def _ensure_prefix(self, text: str):
+        """Evaluate the prefix into its own sequence unless that text is already cached"""
+        if text == self._prefix_text:
+            return
+
+        llama_cpp.llama_kv_cache_seq_rm(self.ctx, self.prefix_seq_id, -1, -1)
+        self._reserved -= len(self._prefix_tokens)
+        self._prefix_text, self._prefix_tokens = None, []
+
+        tokens = stable_prefix_tokens(self.llm, text)
+        start = time.perf_counter()
+        batch = self._batch
+        for offset in range(0, len(tokens), self.n_batch):
+            chunk = tokens[offset:offset + self.n_batch]
+            for i, token in enumerate(chunk):
+                batch.token[i] = token
+                batch.pos[i] = offset + i
+                batch.n_seq_id[i] = 1
+                batch.seq_id[i][0] = self.prefix_seq_id
+                batch.logits[i] = False
+            batch.n_tokens = len(chunk)
+            if llama_cpp.llama_decode(self.ctx, batch) != 0:
+                # Not cached; requests with this prefix prefill the whole prompt themselves
+                llama_cpp.llama_kv_cache_seq_rm(self.ctx, self.prefix_seq_id, -1, -1)
+                self._prefix_text = text
+                return
+
+        self.prefix_prefill_seconds = time.perf_counter() - start
+        self._prefix_text, self._prefix_tokens = text, tokens
+        self._reserved += len(tokens)
+
+    def _step(self):
+        batch = self._batch
+        n = 0
+
+        def add(token: int, pos: int, seq_id: int, logits: bool):
+            nonlocal n
+            batch.token[n] = token
+            batch.pos[n] = pos
+            batch.n_seq_id[n] = 1
+            batch.seq_id[n][0] = seq_id
+            batch.logits[n] = logits
+            n += 1
+
+        for seq in [s for s in self._active if s.cancelled]:
+            self._finish(seq)
+
+        snapshot = [(seq, seq.n_past, seq.prefill_pos) for seq in self._active]
+
+        # Running sequences first (one token each), then prompt chunks with what is left
+        for seq in self._active:
+            seq.logit_index = -1
+            if seq.prefill_pos >= len(seq.tokens) and n < self.n_batch:
+                seq.logit_index = n
+                add(seq.last_token, seq.n_past, seq.seq_id, True)
+                seq.n_past += 1
+
+        for seq in self._active:
+            if seq.prefill_pos < len(seq.tokens) and n < self.n_batch:
+                chunk = seq.tokens[seq.prefill_pos:seq.prefill_pos + self.n_batch - n]
+                for token in chunk:
+                    add(token, seq.n_past, seq.seq_id, False)
+                    seq.n_past += 1
+                seq.prefill_pos += len(chunk)
+                self.prefill_tokens += len(chunk)
+                if seq.prefill_pos == len(seq.tokens):
+                    batch.logits[n - 1] = True
+                    seq.logit_index = n - 1
+
+        if n == 0:
+            return
+        batch.n_tokens = n
+
+        code = llama_cpp.llama_decode(self.ctx, batch)
+        if code != 0:
+            # No KV slot (fragmentation) or a hard error: roll back this step
+            # and drop the newest sequence so the rest can make progress
+            for seq, n_past, prefill_pos in snapshot:
+                seq.n_past, seq.prefill_pos = n_past, prefill_pos
+            self._fail(self._active[-1], RuntimeError(f"llama_decode returned {code}"))
+            return
+
+        self.steps += 1
+        sampled = 0
+        for seq in list(self._active):
+            if seq.logit_index < 0:
+                continue
+            logits = np.ctypeslib.as_array(
+                llama_cpp.llama_get_logits_ith(self.ctx, seq.logit_index), shape=(self.n_vocab,)
+            ).copy()
+            self._advance(seq, self._sample(logits, seq))
+            sampled += 1
+        self.sequences_per_step += sampled
+
+    def _sample(self, logits: np.ndarray, seq: _Sequence) -> int:
+        return sample_token(logits, seq.params, seq.recent, self._rng)
+
+    def _advance(self, seq: _Sequence, token: int):
+        """Record a sampled token, emit the text that is safe to show, check stop conditions"""
+        if seq.first_token_at is None:
+            seq.first_token_at = time.monotonic()
+
+        if token == self.eos:
+            self._finish(seq)
+            return
+
+        seq.generated += 1
+        self.tokens_generated += 1
+        seq.last_token = token
+        seq.recent.append(token)
+        seq.text += seq.decoder.decode(self.llm.detokenize([token]))
+
+        stops = seq.params["stop"]
+        hits = [seq.text.find(s, max(0, seq.emitted - len(s))) for s in stops]
+        hits = [h for h in hits if h >= 0]
+        if hits:
+            seq.text = seq.text[:min(hits)]
+            self._finish(seq)
+            return
+
+        if seq.generated >= seq.params["max_tokens"]:
+            self._finish(seq)
+            return
+
+        # Hold back anything that could still turn into a stop string
+        holdback = max((len(s) - 1 for s in stops), default=0)
+        safe = len(seq.text) - holdback
+        if safe > seq.emitted:
+            seq.emit(seq.text[seq.emitted:safe])
+            seq.emitted = safe
+
+    def _release(self, seq: _Sequence):
+        if seq in self._active:
+            self._active.remove(seq)
+            llama_cpp.llama_kv_cache_seq_rm(self.ctx, seq.seq_id, -1, -1)
+            self._free_ids.append(seq.seq_id)
+            self._reserved -= seq.reserved
+
+    def _finish(self, seq: _Sequence):
+        self._release(seq)
+        if not seq.cancelled and len(seq.text) > seq.emitted:
+            seq.emit(seq.text[seq.emitted:])
+        seq.emitted = len(seq.text)
+        self.completed += 1
+        seq.emit(_DONE)
+
+    def _fail(self, seq: _Sequence, error: BaseException):
+        self._release(seq)
+        self.failed += 1
+        seq.emit(error)
+
+    def stats(self) -> Dict:
+        return {
+            "active": len(self._active),
+            "waiting": len(self._waiting) + self._incoming.qsize(),
+            "max_sequences": self.max_sequences,
+            "steps": self.steps,
+            "tokens_generated": self.tokens_generated,
+            "prefill_tokens": self.prefill_tokens,
+            "avg_sequences_per_step": round(self.sequences_per_step / self.steps, 2) if self.steps else 0.0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "prefix_tokens": len(self._prefix_tokens),
+            "prefix_hits": self.prefix_hits,
+            "prefix_tokens_saved": self.prefix_tokens_saved,
+            "prefix_prefill_ms": round(self.prefix_prefill_seconds * 1000, 1)
+        }
@@ -0,0 +1,115 @@
+"""
+In-memory CatalogIndex vs the SQLite catalog engine at 10k, 100k and 1M rows.
+
+Both engines get the same synthetic catalog; results are checked to be
+identical, then every DataManager lookup is timed on each. Also reports
+build/import time and the resident memory the in-memory engine needs (the
+SQLite engine only holds its page cache).
+
+    python -m benchmarks.bench_catalog_engines [--sizes 10000,100000,1000000]
+"""
+import argparse
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic import make_menus, make_orders, make_restaurants
+from catalog_index import CatalogIndex
+from catalog_store import SQLiteCatalog, import_catalog
+
+QUERIES = ["pizza", "biryani", "north indian", "burger king", "dosa", "domino's", "xyz", "spice kitchen", "wo"]
+
+
+def per_call_us(fn, args_list, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for args in args_list:
+            fn(*args)
+    return (time.perf_counter() - start) / (repeat * len(args_list)) * 1e6
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+
+
+def run(size: int, workdir: str):
+    rng = random.Random(1)
+    restaurants = make_restaurants(size)
+    menus = make_menus(restaurants, items_per_menu=2)
+    orders = make_orders(size, restaurants)
+
+    path = os.path.join(workdir, f"catalog_{size}.db")
+    start = time.perf_counter()
+    import_catalog(path, restaurants, menus, orders)
+    import_s = time.perf_counter() - start
+    db_mb = os.path.getsize(path) / 2**20
+    sqlite = SQLiteCatalog(path)
+
+    before = rss_mb()
+    start = time.perf_counter()
+    memory = CatalogIndex(restaurants, menus, orders)
+    build_s = time.perf_counter() - start
+    index_mb = rss_mb() - before
+
+    order_ids = [(f"ORD{100000 + rng.randrange(size)}",) for _ in range(50)]
+    rest_ids = [(restaurants[rng.randrange(size)]['id'],) for _ in range(50)]
+    searches = [(q,) for q in QUERIES]
+    names = [(restaurants[rng.randrange(size)]['name'],) for _ in range(5)] + [("blues",), ("nowhere",)]
+    area = restaurants[0]['area']
+    # (min_rating or max_minutes, limit, city, area, open_now): "top rated in <area>", "quick delivery open now in <area>"
+    popular_in_area = [(4.3, 3, None, area, False), (4.3, 3, None, area, True)]
+    quick_in_area = [(30, 3, None, area, True), (30, 3, restaurants[0]['city'], None, True)]
+
+    # Same answers from both engines
+    for args in order_ids[:10]:
+        assert memory.get_order(*args) == sqlite.get_order(*args), args
+    for args in rest_ids[:10]:
+        assert memory.get_menu(*args) == sqlite.get_menu(*args), args
+    for args in searches:
+        assert memory.search_restaurants(*args) == sqlite.search_restaurants(*args), args
+    for args in names:
+        assert memory.find_restaurant_by_name(*args) == sqlite.find_restaurant_by_name(*args), args
+    assert memory.popular() == sqlite.popular()
+    assert memory.quick_delivery() == sqlite.quick_delivery()
+    assert memory.quick_delivery(limit=3) == sqlite.quick_delivery(limit=3)
+    for args in popular_in_area:
+        assert memory.popular(*args) == sqlite.popular(*args), args
+    for args in quick_in_area:
+        assert memory.quick_delivery(*args) == sqlite.quick_delivery(*args), args
+
+    rows = [
+        ("get_order_status", order_ids, 200, "get_order"),
+        ("get_restaurant_menu", rest_ids, 200, "get_menu"),
+        ("search_restaurants", searches, 20, "search_restaurants"),
+        ("get_restaurant_by_name", names, 20, "find_restaurant_by_name"),
+        ("get_popular_restaurants", [()], 3, "popular"),
+        ("get_quick_delivery (top 3)", [(30, 3)], 20, "quick_delivery"),
+        ("popular in area", popular_in_area, 20, "popular"),
+        ("quick, open, in area/city", quick_in_area, 20, "quick_delivery"),
+    ]
+
+    print(f"\n📊 {size:,} restaurants / {size:,} orders")
+    print(f"  memory: index build {build_s:.1f}s, +{index_mb:.0f} MB RSS for the indexes (records not counted)")
+    print(f"  sqlite: import {import_s:.1f}s, {db_mb:.0f} MB file")
+    print(f"  {'lookup':<26}{'memory µs':>12}{'sqlite µs':>12}")
+    for label, args_list, repeat, method in rows:
+        memory_us = per_call_us(getattr(memory, method), args_list, repeat)
+        sqlite_us = per_call_us(getattr(sqlite, method), args_list, repeat)
+        print(f"  {label:<26}{memory_us:>12,.1f}{sqlite_us:>12,.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_catalog_")
+    try:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            run(size, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
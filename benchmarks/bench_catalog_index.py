@@ -0,0 +1,92 @@
+"""
+Linear scans vs CatalogIndex lookups at catalog sizes of 100k and 1M records.
+
+    python -m benchmarks.bench_catalog_index [--sizes 100000,1000000]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.synthetic import make_menus, make_orders, make_restaurants
+from catalog_index import CatalogIndex
+
+QUERIES = ["pizza", "biryani", "north indian", "burger king", "dosa", "domino's", "xyz", "spice kitchen"]
+
+
+# The pre-index DataManager implementations, kept here as the baseline
+def linear_search(restaurants, query):
+    query = query.lower()
+    return [r for r in restaurants if query in r['name'].lower() or query in r['cuisine'].lower()][:5]
+
+def linear_order(orders, order_id):
+    for order in orders:
+        if order['order_id'] == order_id:
+            return order
+    return None
+
+def linear_menu(menus, restaurant_id):
+    for menu in menus:
+        if menu['restaurant_id'] == restaurant_id:
+            return menu['items']
+    return []
+
+def linear_by_name(restaurants, name):
+    for r in restaurants:
+        if name.lower() in r['name'].lower():
+            return r
+    return None
+
+
+def per_call_us(fn, args_list, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for args in args_list:
+            fn(*args)
+    return (time.perf_counter() - start) / (repeat * len(args_list)) * 1e6
+
+
+def run(size: int):
+    rng = random.Random(1)
+    restaurants = make_restaurants(size)
+    menus = make_menus(restaurants, items_per_menu=2)
+    orders = make_orders(size, restaurants)
+
+    start = time.perf_counter()
+    index = CatalogIndex(restaurants, menus, orders)
+    build_s = time.perf_counter() - start
+
+    # Results must match the substring semantics exactly
+    for q in QUERIES:
+        assert index.search_restaurants(q) == linear_search(restaurants, q), q
+        assert index.find_restaurant_by_name(q) == linear_by_name(restaurants, q), q
+
+    # Look up ids near the end so the linear baseline pays its worst case
+    order_ids = [(f"ORD{100000 + size - 1 - rng.randrange(100)}",) for _ in range(20)]
+    rest_ids = [(restaurants[-1 - rng.randrange(100)]['id'],) for _ in range(20)]
+    searches = [(q,) for q in QUERIES]
+    names = [(restaurants[-1 - rng.randrange(100)]['name'],) for _ in range(5)] + [("blues",), ("nowhere",)]
+
+    rows = [
+        ("get_order_status", per_call_us(lambda i: linear_order(orders, i), order_ids[:3]),
+         per_call_us(index.get_order, order_ids, repeat=1000)),
+        ("get_restaurant_menu", per_call_us(lambda i: linear_menu(menus, i), rest_ids[:3]),
+         per_call_us(index.get_menu, rest_ids, repeat=1000)),
+        ("search_restaurants", per_call_us(lambda q: linear_search(restaurants, q), searches),
+         per_call_us(index.search_restaurants, searches, repeat=200)),
+        ("get_restaurant_by_name", per_call_us(lambda n: linear_by_name(restaurants, n), names),
+         per_call_us(index.find_restaurant_by_name, names, repeat=200)),
+    ]
+
+    print(f"\n📊 {size:,} restaurants / {size:,} orders (index build {build_s:.1f}s)")
+    print(f"  {'lookup':<24}{'linear µs':>14}{'indexed µs':>14}{'speedup':>10}")
+    for name, linear_us, indexed_us in rows:
+        print(f"  {name:<24}{linear_us:>14,.1f}{indexed_us:>14,.2f}{linear_us / indexed_us:>9,.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000")
+    args = parser.parse_args()
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        run(size)
@@ -0,0 +1,93 @@
+"""
+Typo-tolerant search latency: FuzzyIndex (memory engine) and the SQLite engine's fuzzy path.
+
+Misspelt queries ("dominoes", "biriyani", "burgerking", "garlic bred") are
+run against synthetic catalogs. For each size, the first pass times cold
+lookups (word memo empty) and the repeats time warm ones. Also reports the
+index build time and the vocabulary size. The synthetic names reuse a few
+dozen words; --unique-words gives every restaurant an extra made-up name
+word, so the vocabulary grows with the catalog (a worst case for the
+trigram word index).
+
+    python -m benchmarks.bench_fuzzy_search [--sizes 10000,100000] [--unique-words] [--sqlite]
+"""
+import argparse
+import os
+import random
+import shutil
+import string
+import tempfile
+import time
+
+from benchmarks.synthetic import make_menus, make_orders, make_restaurants
+from catalog_store import SQLiteCatalog, import_catalog
+from fuzzy_index import FuzzyIndex
+
+QUERIES = ["dominoes", "biriyani", "burgerking", "panjabi dhaba", "koramangla", "garlic bred",
+           "chiken biryani", "masla dosa", "tandor grill", "xyzzy"]
+
+
+def made_up_names(restaurants, seed: int = 3):
+    rng = random.Random(seed)
+    for restaurant in restaurants:
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9)))
+        restaurant['name'] = f"{restaurant['name']} {word.title()}"
+
+
+def time_queries(search, repeat: int):
+    start = time.perf_counter()
+    for query in QUERIES:
+        search(query)
+    cold = (time.perf_counter() - start) / len(QUERIES) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            search(query)
+    warm = (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1e6
+    return cold, warm
+
+
+def run(size: int, unique_words: bool, sqlite: bool, workdir: str):
+    restaurants = make_restaurants(size)
+    if unique_words:
+        made_up_names(restaurants)
+    menus = make_menus(restaurants, items_per_menu=2)
+    menu_by_restaurant = {m['restaurant_id']: m['items'] for m in menus}
+
+    start = time.perf_counter()
+    index = FuzzyIndex(restaurants, ('name', 'cuisine'), menu_by_restaurant)
+    build_s = time.perf_counter() - start
+
+    print(f"\n📊 {size:,} restaurants, {len(index.vocabulary.words):,} distinct words "
+          f"(index build {build_s:.1f}s)")
+    for query in QUERIES[:6]:
+        top = index.search_scored(query, limit=1)
+        print(f"  {query!r:<18} -> " + (f"{top[0][1]['name']} ({top[0][0]:.2f})" if top else "no match"))
+
+    index.vocabulary._memo.clear()
+    cold, warm = time_queries(lambda q: index.search_scored(q, limit=5), repeat=50)
+    print(f"  {'engine':<10}{'cold µs':>10}{'warm µs':>10}")
+    print(f"  {'memory':<10}{cold:>10,.0f}{warm:>10,.0f}")
+
+    if sqlite:
+        path = os.path.join(workdir, f"catalog_{size}.db")
+        import_catalog(path, restaurants, menus, make_orders(10, restaurants))
+        catalog = SQLiteCatalog(path)
+        cold, warm = time_queries(lambda q: catalog.fuzzy_search(q, limit=5), repeat=5)
+        print(f"  {'sqlite':<10}{cold:>10,.0f}{warm:>10,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--unique-words", action="store_true", help="one made-up name word per restaurant")
+    parser.add_argument("--sqlite", action="store_true", help="also time SQLiteCatalog.fuzzy_search")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_fuzzy_")
+    try:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            run(size, args.unique_words, args.sqlite, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
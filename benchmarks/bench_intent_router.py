@@ -0,0 +1,69 @@
+"""
+Per-message routing cost as the keyword table grows.
+
+Compares the compiled IntentRouter (one Aho-Corasick pass) with the old
+style of sequential `any(word in message ...)` scans over the same table.
+
+    python -m benchmarks.bench_intent_router [--sizes 10,100,1000,5000]
+"""
+import argparse
+import json
+import random
+import string
+import time
+
+from intent_router import IntentRouter
+
+MESSAGES = [
+    "Track order ORD100000", "Show pizza restaurants", "What's on Burger King menu",
+    "Show popular restaurants", "Quick delivery restaurants", "I want a refund for my last meal",
+    "Can you tell me something about your delivery partners and how they are assigned?",
+    "मेरा ऑर्डर कहाँ है",
+]
+QUICK_RESPONSES = {'hi': '', 'hello': '', 'help': '', 'thanks': '', 'thank you': '', 'bye': ''}
+
+
+def synthetic_restaurants(n_keywords: int, base):
+    """Pad the real catalog with restaurants whose cuisines/names are random words"""
+    rng = random.Random(7)
+    word = lambda: ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(6, 10)))
+    extra = [{"name": f"{word().title()} {word().title()}", "cuisine": word()}
+             for _ in range(max(0, n_keywords // 3))]
+    return base + extra
+
+
+def sequential_route(groups, message):
+    """The pre-router approach: check each keyword list in turn"""
+    message_lower = message.lower().strip()
+    for intent, keywords in groups:
+        if any(keyword in message_lower for keyword in keywords):
+            return intent
+    return None
+
+
+def per_message_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in MESSAGES:
+            fn(message)
+    return (time.perf_counter() - start) / (repeat * len(MESSAGES)) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000,5000")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    with open("data/restaurants.json", 'r', encoding='utf-8') as f:
+        base = json.load(f)['restaurants']
+
+    print(f"  {'keywords':>10}{'router µs/msg':>16}{'sequential µs/msg':>20}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        router = IntentRouter.from_catalog(synthetic_restaurants(size, base), QUICK_RESPONSES)
+        groups = [(intent, list(keywords)) for intent, keywords in router.keywords.items()]
+        total = sum(len(k) for _, k in groups)
+
+        router_us = per_message_us(router.route, args.repeat)
+        sequential_us = per_message_us(lambda m: sequential_route(groups, m), max(1, args.repeat // 10))
+        print(f"  {total:>10,}{router_us:>16.1f}{sequential_us:>20.1f}")
@@ -0,0 +1,64 @@
+"""
+Prompt prefill time with and without the system-prompt prefix cache.
+
+Every request is timed as llm(prompt, max_tokens=1): prompt prefill plus one
+sampled token. Three cases:
+
+- cold: the context is reset first, so the whole prompt is evaluated (no cache)
+- cached: PrefixCache.prepare() with the prefix already in the context (the normal steady state)
+- restored: the context is reset first and PrefixCache.prepare() copies the saved state back
+
+    python -m benchmarks.bench_prefix_cache --model ./models/mistral-7b-instruct-v0.2.Q4_K_M.gguf
+"""
+import argparse
+import statistics
+import time
+
+from llama_cpp import Llama
+
+from benchmarks.bench_batching import PROMPTS
+from config import Config
+from prefix_cache import PrefixCache, template_prefix
+
+
+def prefill_ms(llm, prompt: str, before=None) -> float:
+    if before is not None:
+        before()
+    start = time.perf_counter()
+    llm(prompt, max_tokens=1, temperature=0)
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=Config.MODEL_PATH)
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the prompt set")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--system", default=None,
+                        help="replace the system prompt text, e.g. to try a longer preamble")
+    args = parser.parse_args()
+
+    template = Config.PROMPT_TEMPLATE
+    if args.system:
+        template = template.replace("You are Swiggy support. Be brief and helpful.", args.system)
+    prefix = template_prefix(template)
+    prompts = [template.format(user_message=m) for m in PROMPTS] * args.rounds
+
+    llm = Llama(model_path=args.model, n_ctx=2048, n_threads=args.threads, n_batch=512, verbose=False)
+    cache = PrefixCache(llm)
+    cache.prepare(prefix)
+
+    def reset_then_prepare():
+        llm.reset()
+        cache.prepare(prefix)
+
+    cold = [prefill_ms(llm, p, llm.reset) for p in prompts]
+    cached = [prefill_ms(llm, p, lambda: cache.prepare(prefix)) for p in prompts]
+    restored = [prefill_ms(llm, p, reset_then_prepare) for p in prompts]
+
+    prompt_tokens = statistics.mean(len(llm.tokenize(p.encode("utf-8"), special=True)) for p in prompts)
+    print(f"\n  prefix: {len(cache.tokens)} tokens of ~{prompt_tokens:.0f} per prompt, "
+          f"state {cache.stats()['state_bytes'] / 1024:.0f} KiB")
+    print(f"  {'case':<10} {'mean ms':>9} {'p50 ms':>9}")
+    for name, values in (("cold", cold), ("cached", cached), ("restored", restored)):
+        print(f"  {name:<10} {statistics.mean(values):>9.1f} {statistics.median(values):>9.1f}")
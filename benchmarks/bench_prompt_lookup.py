@@ -0,0 +1,102 @@
+"""
+Plain llm(...) decoding vs prompt-lookup decoding on a fixed set of templated prompts.
+
+Each prompt is a chat where the previous turn got one of the bot's
+templated replies (an order card, the refund steps, a menu) and the
+follow-up question invites an answer that repeats it, built with the same
+PromptBuilder as SwiggyBot. Both paths start from a reset context and run
+the same parameters; by default sampling is greedy, so the two outputs must
+match token for token. Reports tokens/sec for both, the decode steps
+prompt lookup needed and how many drafted tokens were accepted.
+
+    python -m benchmarks.bench_prompt_lookup --model ./models/mistral-7b-instruct-v0.2.Q4_K_M.gguf [--temperature 0.7]
+"""
+import argparse
+import time
+
+from llama_cpp import Llama
+
+from config import Config
+from llm_handler import SwiggyBot
+from prompt_builder import PromptBuilder
+from prompt_lookup import PromptLookupDecoder
+
+# (message answered by a template, follow-up that goes to the LLM)
+CHATS = [
+    ("Where is my order ORD100001?", "Can you repeat my order details in one line?"),
+    ("track ORD100002", "Who is delivering order ORD100002 and what's their number?"),
+    ("status of ORD100003", "Why was ORD100003 cancelled and where is my refund?"),
+    ("I want a refund", "What exactly do I need to send you for order ORD100000?"),
+    ("show menu of Biryani Blues", "Which of these dishes are vegetarian?"),
+    ("show menu of Burger King", "List the items with their prices please."),
+]
+
+
+def build_prompts(bot: SwiggyBot, count_tokens) -> list:
+    builder = PromptBuilder(Config.PROMPT_TEMPLATE, Config.CHAT_HISTORY["turn_template"], count_tokens,
+                            max_prompt_tokens=Config.CHAT_HISTORY["max_prompt_tokens"], max_turns=1)
+    prompts = []
+    for message, follow_up in CHATS:
+        history = [{"role": "user", "content": message},
+                   {"role": "assistant", "content": bot.process_intent(message) or ""},
+                   {"role": "user", "content": follow_up}]
+        prompts.append(builder.build(follow_up, history)[0])
+    return prompts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=Config.MODEL_PATH)
+    parser.add_argument("--threads", type=int, default=Config.MODEL_PARAMS["n_threads"])
+    parser.add_argument("--temperature", type=float, default=0.0, help="0 = greedy (outputs must match)")
+    parser.add_argument("--num-pred-tokens", type=int, default=Config.PROMPT_LOOKUP["num_pred_tokens"])
+    parser.add_argument("--max-ngram-size", type=int, default=Config.PROMPT_LOOKUP["max_ngram_size"])
+    args = parser.parse_args()
+
+    llm = Llama(model_path=args.model, n_ctx=Config.MODEL_PARAMS["n_ctx"], n_threads=args.threads, n_batch=512,
+                verbose=False)
+    decoder = PromptLookupDecoder(llm, num_pred_tokens=args.num_pred_tokens, max_ngram_size=args.max_ngram_size,
+                                  seed=0)
+    bot = SwiggyBot()  # Not loaded: only its templated replies and generation settings are used
+    prompts = build_prompts(bot, lambda text: len(llm.tokenize(text.encode("utf-8"), special=True)))
+    params = dict(bot.generation_params, temperature=args.temperature)
+
+    print(f"\n📊 {len(prompts)} prompts, temperature {args.temperature}, drafts up to {decoder.num_pred_tokens} tokens")
+    print(f"  {'#':>2}{'tokens':>8}{'plain tok/s':>13}{'lookup tok/s':>14}{'speedup':>9}{'steps':>7}"
+          f"{'accepted':>10}{'same':>6}")
+    totals = {"plain_s": 0.0, "lookup_s": 0.0, "tokens": 0, "lookup_tokens": 0, "same": 0}
+    for i, prompt in enumerate(prompts):
+        llm.reset()
+        start = time.perf_counter()
+        plain = llm(prompt, echo=False, **params)
+        plain_s = time.perf_counter() - start
+        plain_text = plain['choices'][0]['text']
+        tokens = plain['usage']['completion_tokens']
+
+        llm.reset()
+        before = decoder.stats()
+        start = time.perf_counter()
+        lookup_text = ''.join(decoder.stream(prompt, **params))
+        lookup_s = time.perf_counter() - start
+        after = decoder.stats()
+        lookup_tokens = after["tokens_generated"] - before["tokens_generated"]
+        steps = after["decode_steps"] - before["decode_steps"]
+        drafted = after["drafted"] - before["drafted"]
+        accepted = after["accepted"] - before["accepted"]
+
+        same = plain_text == lookup_text
+        totals["plain_s"] += plain_s
+        totals["lookup_s"] += lookup_s
+        totals["tokens"] += tokens
+        totals["lookup_tokens"] += lookup_tokens
+        totals["same"] += same
+        print(f"  {i:>2}{tokens:>8}{tokens / plain_s:>13.1f}{lookup_tokens / lookup_s:>14.1f}"
+              f"{plain_s / lookup_s:>8.2f}x{steps:>7}{f'{accepted}/{drafted}':>10}{'yes' if same else 'no':>6}")
+
+    plain_tps = totals["tokens"] / totals["plain_s"]
+    lookup_tps = totals["lookup_tokens"] / totals["lookup_s"]
+    print(f"  {'all':>2}{totals['tokens']:>8}{plain_tps:>13.1f}{lookup_tps:>14.1f}"
+          f"{lookup_tps / plain_tps:>8.2f}x{'':>17}{totals['same']:>4}/{len(prompts)}")
+    if args.temperature > 0:
+        print("  (sampled: outputs are expected to differ, only the distribution is the same)")
+    decoder.close()
@@ -0,0 +1,124 @@
+"""
+LLM calls avoided by the near-duplicate cache tier on a replayed conversation log.
+
+Each user message goes through the same steps as SwiggyBot.fast_response:
+rule-based intents, the exact ResponseCache, then the SemanticCache; a
+message that gets past all three counts as an LLM call and its logged
+answer is cached. Reported per similarity threshold: exact and semantic
+hits, LLM calls left, and the per-lookup cost of the semantic tier.
+
+With --log the user messages of a JSONL conversation log are replayed in
+order. Without it (or when the log has no LLM-bound messages) a built-in
+set of paraphrase groups is replayed in random order; since the group of
+every message is known, hits that return another group's answer are
+counted as wrong.
+
+    python -m benchmarks.bench_semantic_cache [--log data/conversations.jsonl] [--thresholds 0.6,0.7,0.8,0.9]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from config import Config
+from conversation_log import iter_conversations
+from llm_handler import SwiggyBot
+from response_cache import ResponseCache
+from semantic_cache import SemanticCache
+
+# Questions the rules do not answer, each asked several ways
+PARAPHRASES = [
+    ["Can I pay with UPI?", "can i pay using upi", "Is UPI payment allowed?", "pay with UPI possible?"],
+    ["What is Swiggy One membership?", "what's swiggy one membership", "Swiggy One membership - what is it?",
+     "tell me about swiggy one membership"],
+    ["How do I apply a coupon code?", "how to apply coupon code", "apply a coupon code how?",
+     "How can I apply my coupon code"],
+    ["Can I schedule a delivery for tomorrow?", "can i schedule delivery for tomorrow",
+     "Is it possible to schedule a delivery tomorrow?", "schedule delivery tomorrow"],
+    ["How do I change my delivery address?", "change delivery address", "how can i change the delivery address",
+     "I want to change my delivery address"],
+    ["Is cash on delivery available?", "cash on delivery available?", "is there cash on delivery",
+     "Do you have cash on delivery"],
+    ["How do I delete my account?", "delete my account", "how can I delete my swiggy account",
+     "please delete my account"],
+    ["Can I tip the delivery partner?", "how do i tip the delivery partner", "tip delivery partner",
+     "Is it possible to tip my delivery partner?"],
+    ["How do I talk to customer care?", "talk to customer care", "I want to talk to customer care",
+     "how can i talk to customer care please"],
+    ["What are the delivery charges?", "delivery charges?", "how much are delivery charges",
+     "tell me the delivery charges"],
+    ["Do you deliver after midnight?", "delivery after midnight?", "can you deliver after midnight",
+     "Is delivery available after midnight?"],
+    ["Is there a minimum order value?", "minimum order value?", "what is the minimum order value",
+     "Do you have a minimum order value"],
+]
+
+
+def synthetic_replay(repeats: int, seed: int = 1):
+    rng = random.Random(seed)
+    messages = [(text, group) for group, texts in enumerate(PARAPHRASES) for text in texts] * repeats
+    rng.shuffle(messages)
+    return [(text, f"answer {group}", group) for text, group in messages]
+
+
+def log_replay(path: str):
+    return [(r.get('user_message') or '', r.get('bot_response') or '', None) for r in iter_conversations(path)]
+
+
+def run(bot: SwiggyBot, replay, threshold: float):
+    exact = ResponseCache(**Config.RESPONSE_CACHE)
+    semantic = SemanticCache(**dict({k: v for k, v in Config.SEMANTIC_CACHE.items() if k != "enabled"},
+                                    threshold=threshold))
+    counts = {"instant": 0, "exact": 0, "semantic": 0, "llm": 0, "wrong": 0}
+    lookup_us = []
+    answers = {}
+
+    for message, answer, group in replay:
+        if bot.process_intent(message):
+            counts["instant"] += 1
+            continue
+        if exact.get(message) is not None:
+            counts["exact"] += 1
+            continue
+
+        start = time.perf_counter()
+        similar = semantic.get(message)
+        lookup_us.append((time.perf_counter() - start) * 1e6)
+        if similar is not None:
+            counts["semantic"] += 1
+            if group is not None and answers[similar] != group:
+                counts["wrong"] += 1
+            continue
+
+        counts["llm"] += 1
+        answers[answer] = group
+        exact.set(message, answer)
+        semantic.set(message, answer)
+
+    lookup_us.sort()
+    return counts, statistics.mean(lookup_us or [0]), lookup_us[int(len(lookup_us) * 0.99)] if lookup_us else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=None, help="JSONL conversation log to replay")
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the paraphrase set (no --log)")
+    parser.add_argument("--thresholds", default="0.6,0.7,0.8,0.9")
+    args = parser.parse_args()
+
+    bot = SwiggyBot()
+    replay = log_replay(args.log) if args.log else []
+    if not any(not bot.process_intent(message) for message, _, _ in replay):
+        if args.log:
+            print(f"⚠️ No LLM-bound messages in {args.log}; replaying the built-in paraphrase set")
+        replay = synthetic_replay(args.repeats)
+    bound = sum(1 for message, _, _ in replay if not bot.process_intent(message))
+
+    print(f"\n📊 {len(replay)} messages, {bound} LLM-bound without caching")
+    print(f"  {'threshold':>9}{'exact':>8}{'semantic':>10}{'llm calls':>11}{'avoided':>9}{'wrong':>7}"
+          f"{'mean µs':>9}{'p99 µs':>8}")
+    for threshold in [float(t) for t in args.thresholds.split(",")]:
+        counts, mean_us, p99_us = run(bot, replay, threshold)
+        avoided = counts["semantic"] / bound if bound else 0.0
+        print(f"  {threshold:>9.2f}{counts['exact']:>8}{counts['semantic']:>10}{counts['llm']:>11}"
+              f"{avoided:>9.0%}{counts['wrong']:>7}{mean_us:>9.1f}{p99_us:>8.1f}")
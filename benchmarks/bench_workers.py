@@ -0,0 +1,136 @@
+"""
+Throughput of rule-based traffic against the number of server worker processes.
+
+For each --workers count a pre-forked server (stub LLM backend, sessions and
+conversations in the shared SQLite store) is started on a scratch copy of
+the catalog, then --clients load-generator processes run benchmarks.load_test
+against it with only rule-based categories. One Python client tops out well
+below a multi-worker server, hence several. Reports requests/sec, the p95 of
+the slowest client and the speed-up over the first worker count.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --clients 4 --concurrency 64 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+from benchmarks import load_test
+
+RULE_BASED_MIX = "order_tracking=4,restaurant_search=3,menu_queries=2"
+CATALOG_FILES = ("restaurants.json", "menu.json", "orders.json")
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def serve(workers: int, port: int):
+    """Server side (runs in the scratch directory): stub model, shared store, N workers"""
+    from config import Config
+    Config.LLM_BACKEND = "stub"
+    Config.STUB_BACKEND = dict(Config.STUB_BACKEND, load_seconds=0.0)
+    Config.SESSION_STORAGE = "sqlite"
+    Config.CONVERSATION_STORAGE = "sqlite"
+    Config.LOG_LEVEL = "WARNING"
+
+    import app
+    app.main(workers, "127.0.0.1", port)
+
+
+def start_server(workers: int, port: int, workdir: str) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=REPO + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_workers", "--serve", str(workers), "--port", str(port)],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise SystemExit(f"❌ Server with {workers} workers exited with {process.returncode}")
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"❌ Server with {workers} workers did not become ready")
+
+
+def client(url: str, concurrency: int, duration: float, seed: int):
+    args = argparse.Namespace(
+        url=url, concurrency=concurrency, ramp_up=1.0, duration=duration, think_time=0.0,
+        mix=RULE_BASED_MIX, stream=False, timeout=30.0, seed=seed)
+    return asyncio.run(load_test.run(args))["overall"]
+
+
+def measure(workers: int, args, workdir: str) -> dict:
+    server = start_server(workers, args.port, workdir)
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        per_client = max(1, args.concurrency // args.clients)
+        with ProcessPoolExecutor(args.clients) as pool:
+            results = list(pool.map(client, [url] * args.clients, [per_client] * args.clients,
+                                    [args.duration] * args.clients, range(1, args.clients + 1)))
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    requests = sum(r["requests"] for r in results)
+    failed = sum(sum(r["errors"].values()) for r in results)
+    return {
+        "workers": workers,
+        "throughput": sum(r["throughput"] for r in results),
+        "p95": max(r.get("p95", 0.0) for r in results),
+        "error_rate": failed / requests if requests else 0.0
+    }
+
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="bench_workers_")
+    try:
+        data_dir = os.path.join(workdir, "data")
+        os.makedirs(data_dir)
+        for name in CATALOG_FILES:
+            shutil.copy(os.path.join(REPO, "data", name), data_dir)
+
+        rows = []
+        for workers in args.workers:
+            # A fresh store per run so earlier runs' sessions do not skew it
+            for suffix in ("", "-wal", "-shm"):
+                path = os.path.join(data_dir, "chatbot.db" + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+            rows.append(measure(workers, args, workdir))
+            print(f"  {workers} worker(s): {rows[-1]['throughput']:.0f} req/s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    base = rows[0]["throughput"] or 1.0
+    print(f"\n📊 Rule-based /chat · {args.clients} clients · {args.concurrency} users · {args.duration}s per run "
+          f"· {os.cpu_count()} CPUs")
+    print(f"  {'workers':>7} {'req/s':>9} {'speed-up':>9} {'p95 ms':>8} {'err%':>6}")
+    for row in rows:
+        print(f"  {row['workers']:>7} {row['throughput']:>9.0f} {row['throughput'] / base:>8.2f}x "
+              f"{row['p95'] * 1000:>8.1f} {row['error_rate'] * 100:>6.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=64, help="virtual users across all clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per worker count")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+    else:
+        main(args)
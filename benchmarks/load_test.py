@@ -0,0 +1,298 @@
+"""
+Concurrent load test against a running server (python app.py).
+
+Virtual users are started evenly over --ramp-up seconds and then send
+requests back to back until --duration ends. Each request picks a category
+by --mix weight and a message from that category's test_chatbot.TEST_CASES.
+Throughput, error rates and p50/p95/p99 latency are reported overall and per
+category. With --stream, /chat/stream is used and time to first token is
+reported too. Results go to --output as JSON, and --compare checks them
+against an earlier run; the exit code is 1 on a regression.
+
+    python -m benchmarks.load_test --concurrency 32 --ramp-up 10 --duration 60 --output results.json
+    python -m benchmarks.load_test --duration 60 --compare results.json
+
+Run the server with Config.LLM_BACKEND = "stub" to load test without the model.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+
+from test_chatbot import TEST_CASES
+
+DEFAULT_MIX = "order_tracking=4,restaurant_search=3,menu_queries=2,general_queries=1,hindi_support=1,llm_fallback=1"
+
+# Metrics compared by --compare: name -> True when higher is better
+COMPARED = {"throughput": True, "p50": False, "p95": False, "p99": False, "error_rate": False}
+
+
+def slug(category: str) -> str:
+    return category.lower().replace(" ", "_")
+
+
+MESSAGES: Dict[str, List[str]] = {
+    slug(case["category"]): [message for message, _ in case["tests"]] for case in TEST_CASES
+}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in MESSAGES:
+            raise SystemExit(f"Unknown category '{name}', expected one of {sorted(MESSAGES)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class Recorder:
+    """Latency samples and outcomes per category"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.first_tokens: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.degraded: Dict[str, int] = {}
+
+    def ok(self, category: str, latency: float, first_token: float = None, degraded: bool = False):
+        self.latencies.setdefault(category, []).append(latency)
+        if first_token is not None:
+            self.first_tokens.setdefault(category, []).append(first_token)
+        if degraded:
+            self.degraded[category] = self.degraded.get(category, 0) + 1
+
+    def error(self, category: str, kind: str):
+        counts = self.errors.setdefault(category, {})
+        counts[kind] = counts.get(kind, 0) + 1
+
+    def summary(self, category: str, elapsed: float) -> Dict:
+        if category == "overall":
+            latencies = [v for values in self.latencies.values() for v in values]
+            first_tokens = [v for values in self.first_tokens.values() for v in values]
+            errors: Dict[str, int] = {}
+            for counts in self.errors.values():
+                for kind, n in counts.items():
+                    errors[kind] = errors.get(kind, 0) + n
+            degraded = sum(self.degraded.values())
+        else:
+            latencies = self.latencies.get(category, [])
+            first_tokens = self.first_tokens.get(category, [])
+            errors = self.errors.get(category, {})
+            degraded = self.degraded.get(category, 0)
+
+        failed = sum(errors.values())
+        total = len(latencies) + failed
+        result = {
+            "requests": total,
+            "ok": len(latencies),
+            "errors": errors,
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "degraded": degraded,
+            "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0
+        }
+        if latencies:
+            result.update({
+                "mean": round(sum(latencies) / len(latencies), 4),
+                "p50": round(percentile(latencies, 50), 4),
+                "p95": round(percentile(latencies, 95), 4),
+                "p99": round(percentile(latencies, 99), 4),
+                "max": round(max(latencies), 4)
+            })
+        if first_tokens:
+            result.update({
+                "ttft_p50": round(percentile(first_tokens, 50), 4),
+                "ttft_p95": round(percentile(first_tokens, 95), 4),
+                "ttft_p99": round(percentile(first_tokens, 99), 4)
+            })
+        return result
+
+
+async def send(client: httpx.AsyncClient, args, category: str, message: str, session_id: str, recorder: Recorder):
+    payload = {"message": message, "session_id": session_id}
+    start = time.perf_counter()
+    try:
+        if not args.stream:
+            response = await client.post("/chat", json=payload)
+            if response.status_code != 200:
+                recorder.error(category, str(response.status_code))
+                return
+            recorder.ok(category, time.perf_counter() - start, degraded=response.json().get("degraded", False))
+            return
+
+        first_token = None
+        done = None
+        async with client.stream("POST", "/chat/stream", json=payload) as response:
+            if response.status_code != 200:
+                recorder.error(category, str(response.status_code))
+                return
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[6:])
+                if "error" in event:
+                    recorder.error(category, "stream_error")
+                    return
+                if "token" in event and first_token is None:
+                    first_token = time.perf_counter() - start
+                if event.get("done"):
+                    done = event
+        if done is None:
+            recorder.error(category, "incomplete_stream")
+            return
+        recorder.ok(category, time.perf_counter() - start, first_token, done.get("degraded", False))
+    except httpx.TimeoutException:
+        recorder.error(category, "client_timeout")
+    except httpx.HTTPError as e:
+        recorder.error(category, type(e).__name__)
+
+
+async def user(client: httpx.AsyncClient, args, index: int, mix: Dict[str, float], deadline: float,
+               recorder: Recorder):
+    """One virtual user: its own session, requests back to back (plus optional think time)"""
+    rng = random.Random(args.seed + index)
+    categories, weights = list(mix), list(mix.values())
+    session_id = f"load_{args.seed}_{index}"
+
+    while time.monotonic() < deadline:
+        category = rng.choices(categories, weights)[0]
+        await send(client, args, category, rng.choice(MESSAGES[category]), session_id, recorder)
+        if args.think_time:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+
+
+async def _delayed(delay: float, coro):
+    await asyncio.sleep(delay)
+    await coro
+
+
+async def run(args) -> Dict:
+    mix = parse_mix(args.mix)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        health = (await client.get("/health")).json()
+
+        started_at = datetime.now().isoformat()
+        start = time.monotonic()
+        deadline = start + args.ramp_up + args.duration
+        tasks = []
+        for i in range(args.concurrency):
+            # Ramp-up: spread user start times evenly
+            delay = args.ramp_up * i / args.concurrency
+            tasks.append(asyncio.create_task(_delayed(delay, user(client, args, i, mix, deadline, recorder))))
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - start
+
+        server = (await client.get("/health")).json()
+
+    return {
+        "started_at": started_at,
+        "config": {
+            "url": args.url, "endpoint": "/chat/stream" if args.stream else "/chat",
+            "concurrency": args.concurrency, "ramp_up": args.ramp_up, "duration": args.duration,
+            "think_time": args.think_time, "mix": mix, "seed": args.seed,
+            "backend": health.get("llm", {}).get("backend")
+        },
+        "elapsed": round(elapsed, 2),
+        "overall": recorder.summary("overall", elapsed),
+        "categories": {c: recorder.summary(c, elapsed) for c in mix},
+        "server": server
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, min_delta: float = 0.01) -> List[str]:
+    """Metrics that got worse than the baseline by more than threshold percent
+
+    Latency changes smaller than min_delta seconds are ignored: a 3ms rule-based
+    answer taking 4ms is noise, not a regression.
+    """
+    regressions = []
+    sections = [("overall", current["overall"], baseline.get("overall", {}))]
+    sections += [(c, current["categories"][c], baseline.get("categories", {}).get(c, {}))
+                 for c in current["categories"]]
+
+    for name, now, before in sections:
+        for metric, higher_is_better in COMPARED.items():
+            if metric not in now or metric not in before:
+                continue
+            old, new = before[metric], now[metric]
+            if metric == "error_rate":
+                # Absolute change: a rate going from 0 to anything is not a percentage
+                worse = new - old > threshold / 100
+            elif old == 0 or (not higher_is_better and new - old < min_delta):
+                continue
+            else:
+                change = (new - old) / old * 100
+                worse = change < -threshold if higher_is_better else change > threshold
+            if worse:
+                regressions.append(f"{name}.{metric}: {old} -> {new}")
+    return regressions
+
+
+def print_report(results: Dict):
+    header = f"  {'category':<18} {'req':>6} {'err%':>6} {'rps':>7} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7}"
+    if results["config"]["endpoint"] == "/chat/stream":
+        header += f" {'ttft p95':>9}"
+    print(f"\n📊 {results['config']['endpoint']} · {results['config']['concurrency']} users · {results['elapsed']}s")
+    print(header)
+    rows = list(results["categories"].items()) + [("overall", results["overall"])]
+    for name, r in rows:
+        line = (f"  {name:<18} {r['requests']:>6} {r['error_rate'] * 100:>6.1f} {r['throughput']:>7.2f} "
+                f"{r.get('p50', 0):>7.3f} {r.get('p95', 0):>7.3f} {r.get('p99', 0):>7.3f}")
+        if "ttft_p95" in r:
+            line += f" {r['ttft_p95']:>9.3f}"
+        print(line)
+    if results["overall"]["errors"]:
+        print(f"  errors: {results['overall']['errors']}")
+    if results["overall"]["degraded"]:
+        print(f"  degraded answers (model not ready): {results['overall']['degraded']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds to start all users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds at full concurrency")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between a user's requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="category=weight,...")
+    parser.add_argument("--stream", action="store_true", help="use /chat/stream and report time to first token")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    parser.add_argument("--min-delta", type=float, default=0.01, help="ignore latency changes below this many seconds")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold}%:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold}% against {args.compare}")
@@ -0,0 +1,69 @@
+import random
+from typing import Dict, List
+
+NAME_WORDS = ["Domino's", "Biryani", "Burger", "Punjabi", "Udupi", "Royal", "Spice", "Tandoor",
+              "Garden", "Blues", "King", "Rasoi", "Kitchen", "Express", "Cafe", "Dhaba", "Grill",
+              "House", "Corner", "Palace", "Hut", "Bowl", "Wok", "Curry", "Masala", "Chaat"]
+CUISINES = ["Pizza", "Fast Food", "Italian", "Biryani", "North Indian", "Mughlai", "Burgers",
+            "American", "Punjabi", "Chinese", "South Indian", "Dosa", "Idli", "Desserts",
+            "Beverages", "Street Food", "Kebabs", "Continental", "Thai", "Momos"]
+AREAS = ["Koramangala", "Indiranagar", "Whitefield", "BTM Layout", "HSR Layout", "Jayanagar",
+         "Malleshwaram", "Marathahalli", "Electronic City", "Bellandur"]
+CITIES = ["bangalore", "mumbai", "delhi", "hyderabad", "chennai", "pune"]
+DISHES = ["Margherita Pizza", "Chicken Biryani", "Veg Biryani", "Whopper", "Masala Dosa",
+          "Paneer Tikka", "Butter Chicken", "Garlic Bread", "Hakka Noodles", "Idli Sambar",
+          "Gulab Jamun", "Cold Coffee", "Chicken Wings", "Veg Burger", "Dal Makhani"]
+STATUSES = ["preparing", "out_for_delivery", "delivered", "cancelled"]
+
+
+def make_restaurants(n: int, seed: int = 42) -> List[Dict]:
+    """Synthetic restaurants shaped like data/restaurants.json"""
+    rng = random.Random(seed)
+    restaurants = []
+    for i in range(n):
+        area = rng.choice(AREAS)
+        name = " ".join(rng.sample(NAME_WORDS, 2)) + f" {area.split()[0]}"
+        restaurants.append({
+            "id": f"REST{i:07d}",
+            "name": name,
+            "cuisine": ", ".join(rng.sample(CUISINES, 3)),
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "delivery_time": f"{rng.choice(range(15, 65, 5))} mins",
+            "city": rng.choice(CITIES),
+            "area": area,
+            "is_open": rng.random() < 0.8,
+            "delivery_fee": rng.choice([0, 20, 30, 40]),
+            "minimum_order": rng.choice([100, 150, 200]),
+            "image": "🍴"
+        })
+    return restaurants
+
+
+def make_menus(restaurants: List[Dict], items_per_menu: int = 4, seed: int = 42) -> List[Dict]:
+    """Synthetic menu_items entries for the given restaurants"""
+    rng = random.Random(seed)
+    return [{
+        "restaurant_id": r["id"],
+        "items": [{
+            "name": dish,
+            "price": rng.choice(range(99, 499, 10)),
+            "veg": rng.random() < 0.5,
+            "rating": round(rng.uniform(3.5, 5.0), 1),
+            "description": "Chef's special"
+        } for dish in rng.sample(DISHES, items_per_menu)]
+    } for r in restaurants]
+
+
+def make_orders(n: int, restaurants: List[Dict], seed: int = 42) -> List[Dict]:
+    """Synthetic orders shaped like data/orders.json"""
+    rng = random.Random(seed)
+    return [{
+        "order_id": f"ORD{100000 + i}",
+        "customer_name": "Customer",
+        "restaurant": rng.choice(restaurants)["name"],
+        "items": [f"{rng.choice(DISHES)} x1"],
+        "total": rng.choice(range(150, 900)),
+        "status": rng.choice(STATUSES),
+        "order_time": "2024-01-15 12:30",
+        "payment": "paid_online"
+    } for i in range(n)]
@@ -0,0 +1,217 @@
+import re
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from catalog_store import delivery_minutes
+from fuzzy_index import FuzzyIndex
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class SubstringIndex:
+    """Token-level inverted index that answers substring queries over a few text fields
+
+    Every field is lowercased and split into word tokens; each token maps to the
+    sorted positions of the records containing it. A sorted array of token
+    suffixes lets a query token find every vocabulary token it is a substring of
+    with a binary search, so lookups cost O(log vocabulary + matches) instead of
+    a pass over the whole catalog.
+    """
+
+    def __init__(self, records: List[Dict], fields: tuple):
+        self.records = records
+        self.fields = fields
+        self.texts = [tuple(str(r.get(field, '')).lower() for field in fields) for r in records]
+
+        postings: Dict[str, List[int]] = {}
+        for pos, texts in enumerate(self.texts):
+            for token in {t for text in texts for t in TOKEN_PATTERN.findall(text)}:
+                postings.setdefault(token, []).append(pos)
+        self.postings = postings
+
+        # (suffix, token) pairs sorted by suffix: q is a substring of token
+        # exactly when q is a prefix of one of its suffixes
+        suffixes = []
+        for token in postings:
+            for i in range(len(token)):
+                suffixes.append((token[i:], token))
+        suffixes.sort()
+        self._suffix_keys = [s for s, _ in suffixes]
+        self._suffix_tokens = [t for _, t in suffixes]
+
+        self._expansions: Dict[str, List[str]] = {}
+
+    def expand(self, query_token: str) -> List[str]:
+        """Vocabulary tokens that contain query_token as a substring"""
+        cached = self._expansions.get(query_token)
+        if cached is not None:
+            return cached
+
+        tokens = set()
+        i = bisect_left(self._suffix_keys, query_token)
+        while i < len(self._suffix_keys) and self._suffix_keys[i].startswith(query_token):
+            tokens.add(self._suffix_tokens[i])
+            i += 1
+
+        result = sorted(tokens)
+        if len(self._expansions) < 10000:
+            self._expansions[query_token] = result
+        return result
+
+    def candidates(self, query_token: str) -> Iterator[int]:
+        """Ascending, de-duplicated record positions whose tokens contain query_token"""
+        last = -1
+        for pos in merge(*(self.postings[t] for t in self.expand(query_token))):
+            if pos != last:
+                yield pos
+                last = pos
+
+    def _candidate_size(self, query_token: str) -> int:
+        return sum(len(self.postings[t]) for t in self.expand(query_token))
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Records where query is a substring of any field, in catalog order
+
+        Same results as scanning every record with `query in field.lower()`:
+        the rarest query token narrows the candidates and each candidate is
+        verified with the plain substring test. The cost is the number of
+        candidates checked before `limit` matches are found, which does not
+        grow with the catalog unless a query is a rare phrase of common words.
+        """
+        query = query.lower()
+        query_tokens = TOKEN_PATTERN.findall(query)
+
+        if query_tokens:
+            rarest = min(set(query_tokens), key=self._candidate_size)
+            positions = self.candidates(rarest)
+        else:
+            # Punctuation/whitespace-only query: nothing to index on
+            positions = range(len(self.records))
+
+        results = []
+        for pos in positions:
+            if any(query in text for text in self.texts[pos]):
+                results.append(self.records[pos])
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+
+class CatalogIndex:
+    """Hash and inverted indexes over restaurants, menus and orders"""
+
+    def __init__(self, restaurants: List[Dict], menu_items: List[Dict], orders: List[Dict],
+                 fuzzy_threshold: float = 0.5):
+        self.restaurants = restaurants
+
+        # order_id -> order (first occurrence wins, like the old linear scan)
+        self.orders_by_id: Dict[str, Dict] = {}
+        for order in orders:
+            self.orders_by_id.setdefault(order['order_id'], order)
+
+        # restaurant_id -> menu items
+        self.menu_by_restaurant: Dict[str, List[Dict]] = {}
+        for menu in menu_items:
+            self.menu_by_restaurant.setdefault(menu['restaurant_id'], menu['items'])
+
+        # Inverted indexes for search (name + cuisine) and name lookups
+        self.search_index = SubstringIndex(restaurants, ('name', 'cuisine'))
+        self.name_index = SubstringIndex(restaurants, ('name',))
+
+        # Typo-tolerant fallbacks: search also covers menu dishes
+        self.fuzzy_search_index = FuzzyIndex(restaurants, ('name', 'cuisine'), self.menu_by_restaurant,
+                                             threshold=fuzzy_threshold)
+        self.fuzzy_name_index = FuzzyIndex(restaurants, ('name',), threshold=fuzzy_threshold)
+
+        # Typed columns, parsed once instead of per request
+        self.ratings = [float(r['rating']) for r in restaurants]
+        self.minutes = [delivery_minutes(r) for r in restaurants]
+        self.open_flags = [bool(r.get('is_open', True)) for r in restaurants]
+        self.cities = [str(r.get('city', '')).lower() for r in restaurants]
+        self.areas = [str(r.get('area', '')).lower() for r in restaurants]
+
+        # Rating order (ties in catalog order), and catalog-order buckets per
+        # delivery time, city and area; the city/area buckets also in rating order
+        self.by_rating = sorted(range(len(restaurants)), key=lambda pos: (-self.ratings[pos], pos))
+        self.delivery_buckets: Dict[int, List[int]] = {}
+        self.city_buckets: Dict[str, List[int]] = {}
+        self.area_buckets: Dict[str, List[int]] = {}
+        for pos in range(len(restaurants)):
+            self.delivery_buckets.setdefault(self.minutes[pos], []).append(pos)
+            self.city_buckets.setdefault(self.cities[pos], []).append(pos)
+            self.area_buckets.setdefault(self.areas[pos], []).append(pos)
+        self.bucket_minutes = sorted(self.delivery_buckets)
+        self.city_by_rating: Dict[str, List[int]] = {}
+        self.area_by_rating: Dict[str, List[int]] = {}
+        for pos in self.by_rating:
+            self.city_by_rating.setdefault(self.cities[pos], []).append(pos)
+            self.area_by_rating.setdefault(self.areas[pos], []).append(pos)
+
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        return self.orders_by_id.get(order_id)
+
+    def get_menu(self, restaurant_id: str) -> List[Dict]:
+        return self.menu_by_restaurant.get(restaurant_id, [])
+
+    def search_restaurants(self, query: str, limit: int = 5) -> List[Dict]:
+        return self.search_index.search(query, limit)
+
+    def find_restaurant_by_name(self, name: str) -> Optional[Dict]:
+        matches = self.name_index.search(name, limit=1)
+        return matches[0] if matches else None
+
+    def fuzzy_search(self, query: str, limit: int = 5) -> List[Tuple[float, Dict]]:
+        return self.fuzzy_search_index.search_scored(query, limit)
+
+    def fuzzy_find_restaurant(self, name: str) -> Optional[Tuple[float, Dict]]:
+        matches = self.fuzzy_name_index.search_scored(name, limit=1)
+        return matches[0] if matches else None
+
+    def _matches(self, pos: int, city: Optional[str], area: Optional[str], open_now: bool) -> bool:
+        return ((city is None or self.cities[pos] == city) and (area is None or self.areas[pos] == area)
+                and (self.open_flags[pos] or not open_now))
+
+    def popular(self, min_rating: float = 4.3, limit: int = 3, city: Optional[str] = None,
+                area: Optional[str] = None, open_now: bool = False) -> List[Dict]:
+        """Highest rated first: a walk down the rating order (of the area or city bucket) that stops at limit"""
+        city, area = city and city.lower(), area and area.lower()
+        if area is not None:
+            ranked = self.area_by_rating.get(area, [])
+        elif city is not None:
+            ranked = self.city_by_rating.get(city, [])
+        else:
+            ranked = self.by_rating
+
+        results = []
+        for pos in ranked:
+            if len(results) >= limit or self.ratings[pos] < min_rating:
+                break  # Ratings only go down from here
+            if self._matches(pos, city, area, open_now):
+                results.append(self.restaurants[pos])
+        return results
+
+    def quick_delivery(self, max_minutes: int = 30, limit: Optional[int] = None, city: Optional[str] = None,
+                       area: Optional[str] = None, open_now: bool = False) -> List[Dict]:
+        """Delivery within max_minutes in catalog order: the delivery-time buckets merged, or one area/city bucket"""
+        city, area = city and city.lower(), area and area.lower()
+        if area is not None or city is not None:
+            bucket = self.area_buckets.get(area, []) if area is not None else self.city_buckets.get(city, [])
+            positions = (pos for pos in bucket if self.minutes[pos] <= max_minutes)
+        else:
+            fast = self.bucket_minutes[:bisect_right(self.bucket_minutes, max_minutes)]
+            positions = merge(*(self.delivery_buckets[m] for m in fast))
+        return [self.restaurants[pos] for pos in
+                islice((pos for pos in positions if self._matches(pos, city, area, open_now)), limit)]
+
+    def iter_restaurants(self) -> Iterator[Dict]:
+        return iter(self.restaurants)
+
+    def stats(self) -> Dict:
+        return {
+            "engine": "memory",
+            "restaurants": len(self.restaurants),
+            "menus": len(self.menu_by_restaurant),
+            "orders": len(self.orders_by_id)
+        }
@@ -0,0 +1,110 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, mtime_ns, size): catches in-place edits and atomic rename-over alike"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class CatalogReloader:
+    """Polls the catalog files and hot-swaps a rebuilt catalog when they change
+
+    Changes are applied once the files have stayed the same for one poll,
+    so a file that is still being written is not picked up half-way. The
+    rebuild runs on this thread and DataManager swaps it in with a single
+    reference assignment, so requests see the old or the new catalog,
+    never a mix. A failed rebuild (bad JSON, missing field) keeps the old
+    catalog and is retried on the next change.
+    """
+
+    def __init__(self, data_manager, interval: float = 2.0):
+        self.data_manager = data_manager
+        self.interval = interval
+
+        self._signatures = self._scan()
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Statistics
+        self.reloads = 0
+        self.failures = 0
+        self.last_duration = None
+        self.last_reload_at = None
+        self.last_error = None
+        self.last_error_at = None
+
+    def _scan(self) -> Dict[str, Optional[Tuple[int, int, int]]]:
+        return {path: file_signature(path) for path in self.data_manager.catalog_files()}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="catalog-reloader", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self) -> bool:
+        """Reload if the files changed and have settled since the last check"""
+        signatures = self._scan()
+        if signatures == self._signatures:
+            self._pending = None
+            return False
+        if signatures != self._pending:
+            self._pending = signatures  # Still changing (or just changed): wait one more poll
+            return False
+
+        self._pending = None
+        reloaded = self.reload()
+        # A rebuild may rewrite a watched file itself (the SQLite import)
+        self._signatures = self._scan() if reloaded else signatures
+        return reloaded
+
+    def reload(self) -> bool:
+        start = time.perf_counter()
+        try:
+            self.data_manager.reload_catalog()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            self.last_error_at = time.time()
+            metrics.CATALOG_RELOADS.inc(result="error")
+            logger.error("❌ Catalog reload failed, keeping the current catalog: %s", e)
+            return False
+
+        self.last_duration = time.perf_counter() - start
+        self.last_reload_at = time.time()
+        self.reloads += 1
+        metrics.CATALOG_RELOADS.inc(result="ok")
+        logger.info("🔄 Catalog reloaded in %.0fms", self.last_duration * 1000)
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            "interval": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_duration_ms": round(self.last_duration * 1000, 1) if self.last_duration is not None else None,
+            "last_reload_at": self.last_reload_at,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at
+        }
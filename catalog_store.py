@@ -0,0 +1,277 @@
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fuzzy_index import TrigramVocabulary, words
+from shared_store import ThreadConnections, connect
+
+SCHEMA = """
+CREATE TABLE restaurants (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT,
+    name TEXT NOT NULL,
+    cuisine TEXT NOT NULL,
+    rating REAL,
+    delivery_minutes INTEGER,
+    city TEXT NOT NULL,
+    area TEXT NOT NULL,
+    is_open INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE menus (restaurant_id TEXT PRIMARY KEY, items TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE orders (order_id TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE words (field TEXT NOT NULL, word TEXT NOT NULL, PRIMARY KEY (field, word)) WITHOUT ROWID;
+CREATE VIRTUAL TABLE restaurants_fts USING fts5(
+    name, cuisine, content='restaurants', content_rowid='rowid', tokenize='trigram'
+);
+"""
+
+# Built after the bulk insert, which is much faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX restaurants_id ON restaurants (id);
+CREATE INDEX restaurants_rating ON restaurants (rating DESC);  -- ties stay in rowid order: popular() stops after limit rows
+CREATE INDEX restaurants_delivery ON restaurants (delivery_minutes);
+CREATE INDEX restaurants_area_rating ON restaurants (area, rating DESC);
+CREATE INDEX restaurants_city_rating ON restaurants (city, rating DESC);
+CREATE INDEX restaurants_area ON restaurants (area);  -- rowid order within an area, for quick_delivery()
+CREATE INDEX restaurants_city ON restaurants (city);
+INSERT INTO restaurants_fts (restaurants_fts) VALUES ('rebuild');
+"""
+
+# Stored as PRAGMA user_version; a catalog.db from another version is reimported
+SCHEMA_VERSION = 1
+
+# FTS5 trigram matching needs at least three characters; shorter queries use LIKE
+MIN_FTS_QUERY = 3
+
+
+def delivery_minutes(restaurant: Dict) -> int:
+    """"30 mins" -> 30"""
+    return int(restaurant['delivery_time'].split()[0])
+
+
+def schema_version(path: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def import_catalog(path: str, restaurants: Iterable[Dict], menu_items: Iterable[Dict], orders: Iterable[Dict]) -> Dict:
+    """Build a catalog database from restaurants/menu/orders records
+
+    Written to a temp file and renamed into place, so a running reader never
+    sees a half-built catalog. Duplicate order and menu ids keep their first
+    occurrence, like CatalogIndex. Returns the row counts.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"  # Worker processes may import at the same time
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(tmp_path + suffix):
+            os.remove(tmp_path + suffix)
+
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    counts = {}
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA)
+        conn.execute("BEGIN")
+        vocabulary = {"name": set(), "cuisine": set()}  # For the fuzzy search word lists
+
+        def rows():
+            for r in restaurants:
+                vocabulary["name"].update(words(r['name']))
+                vocabulary["cuisine"].update(words(r['cuisine']))
+                yield (r['id'], r['name'], r['cuisine'], r['rating'], delivery_minutes(r),
+                       str(r.get('city', '')).lower(), str(r.get('area', '')).lower(), bool(r.get('is_open', True)),
+                       json.dumps(r, ensure_ascii=False))
+
+        conn.executemany(
+            "INSERT INTO restaurants (id, name, cuisine, rating, delivery_minutes, city, area, is_open, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows())
+        conn.executemany("INSERT INTO words (field, word) VALUES (?, ?)",
+                         ((field, word) for field, field_words in vocabulary.items() for word in field_words))
+        conn.executemany(
+            "INSERT OR IGNORE INTO menus (restaurant_id, items) VALUES (?, ?)",
+            ((m['restaurant_id'], json.dumps(m['items'], ensure_ascii=False)) for m in menu_items))
+        conn.executemany(
+            "INSERT OR IGNORE INTO orders (order_id, data) VALUES (?, ?)",
+            ((o['order_id'], json.dumps(o, ensure_ascii=False)) for o in orders))
+        conn.execute("COMMIT")
+        conn.executescript(INDEXES)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.execute("PRAGMA journal_mode=WAL")
+        for table in ("restaurants", "menus", "orders"):
+            counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return counts
+
+
+def import_json_files(path: str, data_dir: str) -> Dict:
+    """Importer for the current restaurants.json / menu.json / orders.json"""
+    def load(name: str, key: str) -> List[Dict]:
+        with open(os.path.join(data_dir, name), 'r', encoding='utf-8') as f:
+            return json.load(f)[key]
+
+    return import_catalog(path, load("restaurants.json", "restaurants"), load("menu.json", "menu_items"),
+                          load("orders.json", "orders"))
+
+
+class SQLiteCatalog:
+    """CatalogIndex interface served from an indexed SQLite file instead of RAM
+
+    Orders and menus are primary-key lookups; restaurant search uses an FTS5
+    trigram index, which answers the same case-insensitive substring queries
+    as SubstringIndex (results in catalog order). Popular and quick-delivery
+    lists are range scans on the rating and delivery_minutes indexes, or on
+    the (area|city, rating) ones when filtered by location. Only
+    the rows a query returns are decoded, so memory does not grow with the
+    catalog; the one thing held in RAM is the trigram index over the
+    catalog's distinct words, for fuzzy search.
+    """
+
+    def __init__(self, path: str, fuzzy_threshold: float = 0.5, fuzzy_candidates: int = 500):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Catalog database not found: {path}")
+        self.path = path
+        self.fuzzy_candidates = fuzzy_candidates
+        self._connections = ThreadConnections(path, busy_timeout=5.0)
+
+        try:
+            vocabulary = self._connections.get().execute("SELECT field, word FROM words").fetchall()
+        except sqlite3.OperationalError:
+            vocabulary = []  # Imported before fuzzy search existed: reimport to enable it
+        self.fuzzy_search_vocabulary = TrigramVocabulary((w for _, w in vocabulary), fuzzy_threshold)
+        self.fuzzy_name_vocabulary = TrigramVocabulary((w for f, w in vocabulary if f == "name"), fuzzy_threshold)
+
+    def _rows(self, sql: str, params=()) -> List[Dict]:
+        return [json.loads(row[0]) for row in self._connections.get().execute(sql, params)]
+
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        rows = self._rows("SELECT data FROM orders WHERE order_id = ?", (order_id,))
+        return rows[0] if rows else None
+
+    def get_menu(self, restaurant_id: str) -> List[Dict]:
+        row = self._connections.get().execute(
+            "SELECT items FROM menus WHERE restaurant_id = ?", (restaurant_id,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def _match(self, query: str, column: Optional[str], limit: Optional[int]) -> List[Dict]:
+        columns = (column,) if column else ("name", "cuisine")
+        limit_sql = "LIMIT ?" if limit is not None else ""
+        limit_params = (limit,) if limit is not None else ()
+
+        if len(query) >= MIN_FTS_QUERY:
+            phrase = '"' + query.replace('"', '""') + '"'
+            if column:
+                phrase = f"{column} : {phrase}"
+            return self._rows(
+                "SELECT r.data FROM restaurants_fts f JOIN restaurants r ON r.rowid = f.rowid "
+                f"WHERE restaurants_fts MATCH ? ORDER BY f.rowid {limit_sql}", (phrase,) + limit_params)
+
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        where = " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in columns)
+        return self._rows(f"SELECT data FROM restaurants WHERE {where} ORDER BY rowid {limit_sql}",
+                          (pattern,) * len(columns) + limit_params)
+
+    def search_restaurants(self, query: str, limit: int = 5) -> List[Dict]:
+        return self._match(query.lower(), None, limit)
+
+    def find_restaurant_by_name(self, name: str) -> Optional[Dict]:
+        matches = self._match(name.lower(), "name", 1)
+        return matches[0] if matches else None
+
+    def _fuzzy(self, vocabulary: TrigramVocabulary, query: str, column: Optional[str],
+               limit: int) -> List[Tuple[float, Dict]]:
+        """FuzzyIndex ranking over FTS: rows matching every query word first, then any of them"""
+        # FTS trigram phrases need three characters
+        expansions = [{w: s for w, s in m.items() if len(w) >= 3} for m in vocabulary.expand(query)]
+        matched = [m for m in expansions if m]
+        if not matched:
+            return []
+
+        groups = ["(" + " OR ".join(f'"{w}"' for w in m) + ")" for m in matched]
+        rows = {}
+        for operator in (" AND ", " OR ") if len(groups) > 1 else (" AND ",):
+            match = operator.join(groups)
+            if column:
+                match = f"{column} : ({match})"
+            for rowid, rating, data in self._connections.get().execute(
+                    "SELECT r.rowid, r.rating, r.data FROM restaurants_fts f JOIN restaurants r ON r.rowid = f.rowid "
+                    "WHERE restaurants_fts MATCH ? ORDER BY r.rating DESC, r.rowid LIMIT ?",
+                    (match, self.fuzzy_candidates)):
+                rows[rowid] = (rating, data)
+            if len(rows) >= limit:
+                break
+
+        scored = []
+        for rowid, (rating, data) in rows.items():
+            restaurant = json.loads(data)
+            text = restaurant['name'] if column else f"{restaurant['name']} {restaurant['cuisine']}"
+            restaurant_words = set(words(text))
+            score = sum(max((s for w, s in m.items() if w in restaurant_words), default=0.0)
+                        for m in matched) / len(expansions)
+            scored.append((-score, -rating, rowid, restaurant))
+        scored.sort(key=lambda s: s[:3])
+        return [(-neg_score, restaurant) for neg_score, _, _, restaurant in scored[:limit]]
+
+    def fuzzy_search(self, query: str, limit: int = 5) -> List[Tuple[float, Dict]]:
+        return self._fuzzy(self.fuzzy_search_vocabulary, query, None, limit)
+
+    def fuzzy_find_restaurant(self, name: str) -> Optional[Tuple[float, Dict]]:
+        matches = self._fuzzy(self.fuzzy_name_vocabulary, name, "name", 1)
+        return matches[0] if matches else None
+
+    @staticmethod
+    def _filters(city: Optional[str], area: Optional[str], open_now: bool) -> Tuple[str, tuple]:
+        where, params = "", ()
+        if area is not None:
+            where, params = where + " AND area = ?", params + (area.lower(),)
+        if city is not None:
+            where, params = where + " AND city = ?", params + (city.lower(),)
+        if open_now:
+            where += " AND is_open"
+        return where, params
+
+    def popular(self, min_rating: float = 4.3, limit: int = 3, city: Optional[str] = None,
+                area: Optional[str] = None, open_now: bool = False) -> List[Dict]:
+        where, params = self._filters(city, area, open_now)
+        return self._rows(f"SELECT data FROM restaurants WHERE rating >= ?{where} ORDER BY rating DESC, rowid LIMIT ?",
+                          (min_rating,) + params + (limit,))
+
+    def quick_delivery(self, max_minutes: int = 30, limit: Optional[int] = None, city: Optional[str] = None,
+                       area: Optional[str] = None, open_now: bool = False) -> List[Dict]:
+        where, params = self._filters(city, area, open_now)
+        return self._rows(f"SELECT data FROM restaurants WHERE delivery_minutes <= ?{where} ORDER BY rowid LIMIT ?",
+                          (max_minutes,) + params + (-1 if limit is None else limit,))
+
+    def iter_restaurants(self) -> Iterator[Dict]:
+        """Every restaurant in catalog order, streamed"""
+        conn = connect(self.path)
+        try:
+            for row in conn.execute("SELECT data FROM restaurants ORDER BY rowid"):
+                yield json.loads(row[0])
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        conn = self._connections.get()
+        return {
+            "engine": "sqlite",
+            "path": self.path,
+            "restaurants": conn.execute("SELECT COUNT(*) FROM restaurants").fetchone()[0],
+            "menus": conn.execute("SELECT COUNT(*) FROM menus").fetchone()[0],
+            "orders": conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+        }
+
+
+if __name__ == "__main__":
+    from config import Config
+
+    counts = import_json_files(Config.get_data_path("catalog_db"), Config.DATA_DIR)
+    print(f"✅ Imported {counts} into {Config.get_data_path('catalog_db')}")
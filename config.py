@@ -8,6 +8,8 @@ class Config:
     API_HOST = "0.0.0.0"
     API_PORT = 8000
     DEBUG = True
+    LOG_LEVEL = "INFO"  # "DEBUG" also logs one line per answer (route and timing)
+    SERVER_WORKERS = 1  # >1 pre-forks worker processes (needs the sqlite session/conversation storage)
     
     # Model Settings
     MODEL_PATH = "./models/mistral-7b-instruct-v0.2.Q4_K_M.gguf"
@@ -20,18 +22,140 @@ class Config:
         "max_tokens": 256
     }
     
+    # LLM Backend: "llama_cpp" (the GGUF model) or "stub" (no model, for load tests)
+    LLM_BACKEND = "llama_cpp"
+    STUB_BACKEND = {
+        "tokens_per_second": 20.0,  # Streaming rate after the first token
+        "first_token_latency": {"distribution": "lognormal", "median": 0.4, "sigma": 0.5},
+        "response_tokens": [20, 80],  # Min/max tokens per answer (capped by max_tokens)
+        "load_seconds": 2.0,        # Simulated model load before /ready
+        "seed": 42                  # Same prompt + seed -> same text and timings
+    }
+    
+    # LLM Prompt (everything before {user_message} is evaluated once and its KV state reused;
+    # editing the text invalidates that cache automatically)
+    PROMPT_TEMPLATE = "<s>[INST] You are Swiggy support. Be brief and helpful.\n\nUser: {user_message}\n[/INST]"
+    PREFIX_CACHE = True
+    
+    # Recent chat turns in the LLM prompt, newest kept, while the whole prompt fits max_prompt_tokens
+    # (counted with the model tokenizer; n_ctx must leave room for max_tokens after it). Each turn is
+    # turn_template between the template prefix and the question: with the template above, one
+    # turn's prompt + answer is exactly how the next turn's prompt starts
+    CHAT_HISTORY = {
+        "max_turns": 6,              # 0 = every message is answered on its own
+        "max_prompt_tokens": 1536,
+        "turn_template": "{user_message}\n[/INST] {assistant_message}</s>[INST] User: "
+    }
+    # Evaluated context per chat session (serial llama-cpp path), so a follow-up turn only prefills
+    # the new turn. A saved state holds only the used KV cells, ~128 KB per token for Mistral-7B:
+    # a short session takes tens of MB, one at the full prompt budget plus its answer ~210 MB
+    SESSION_KV_CACHE = {
+        "enabled": True,
+        "max_sessions": 16,
+        "max_bytes": 1024 * 1024 * 1024
+    }
+    # Prompt-lookup decoding (serial llama-cpp path): tokens that followed the answer's last n-gram
+    # earlier in the prompt/answer are verified as a draft in one decode step, so answers repeating
+    # the prompt (order ids, restaurant names, refund wording) take fewer sequential steps.
+    # Same tokens as plain decoding when greedy; compare with benchmarks/bench_prompt_lookup.py
+    PROMPT_LOOKUP = {
+        "enabled": False,
+        "num_pred_tokens": 10,   # Longest draft per step
+        "max_ngram_size": 3      # Longest n-gram looked up (shorter ones are tried next)
+    }
+    
     # Data Settings
     DATA_DIR = "data"
     DATA_FILES = {
         "restaurants": "restaurants.json",
         "orders": "orders.json",
         "menu": "menu.json",
-        "conversations": "conversations.json"
+        "conversations": "conversations.json",
+        "conversation_log": "conversations.jsonl",
+        "shared_store": "chatbot.db",
+        "catalog_db": "catalog.db",
+        "analytics_checkpoint": "analytics_checkpoint.json"
+    }
+    CATALOG_ENGINE = "memory"  # "memory" (JSON files in RAM) or "sqlite" (indexed catalog.db, imported from the JSON)
+    FUZZY_SEARCH = {
+        "threshold": 0.5,        # Trigram Dice similarity for a misspelt word to match a catalog word
+        "max_candidates": 500,   # Restaurants scored per multi-word query
+        "min_score": 0.6,        # Below this a fuzzy match is not taken as the restaurant/dish asked for
+        "intent_max_words": 3    # Unrouted messages up to this many words may be answered from fuzzy search
+    }
+    CATALOG_RELOAD = {
+        "enabled": True,
+        "interval": 2.0  # Seconds between checks; a change is applied once a file is unchanged for one check
+    }
+    
+    # Conversation Storage
+    CONVERSATION_STORAGE = "jsonl"  # "jsonl" (append-only log), "sqlite" (shared store) or "json" (legacy full rewrite)
+    CONVERSATION_LOG = {
+        "flush_interval": 0.5,  # Max seconds a record waits for its group commit
+        "flush_size": 64,       # Commit as soon as this many records are queued
+        "fsync": "commit",      # "commit" (every group), "interval" or "never"
+        "fsync_interval": 1.0   # Seconds between fsyncs with the "interval" policy
+    }
+    SESSION_HISTORY = {
+        "history_per_session": 10,  # Records returned by get_conversation_history
+        "max_sessions": 100000      # Least recently active sessions are dropped past this
+    }
+    
+    # Analytics (analytics.py resumes from a checkpoint; memory stays flat as the log grows)
+    ANALYTICS = {
+        "keyword_capacity": 5000,  # Distinct keywords kept between prunes (top 10 are reported)
+        "hll_precision": 14        # Unique-session sketch: 2**14 registers, ~0.8% error
+    }
+    
+    # Inference Worker (LLM calls run off the event loop)
+    INFERENCE = {
+        "max_queue_size": 32,   # Pending LLM requests before /chat answers 503
+        "timeout_seconds": 60   # Per-request limit including queue wait (504 after)
+    }
+    
+    # Continuous Batching (many sessions share each decode step)
+    BATCHING = {
+        "enabled": False,
+        "max_sequences": 8,  # Sequences decoded together; also the inference worker count
+        "n_batch": 512       # Max tokens per decode step (prompt chunks + one per sequence)
+    }
+    
+    # Response Cache (LLM answers)
+    RESPONSE_CACHE = {
+        "max_entries": 1000,
+        "max_bytes": 2 * 1024 * 1024,  # 2 MB of cached text
+        "ttl_seconds": 3600            # 0/None disables expiry
+    }
+    
+    # Near-duplicate LLM answers (MinHash/LSH over content words and trigrams)
+    SEMANTIC_CACHE = {
+        "enabled": True,
+        "threshold": 0.8,     # Jaccard similarity needed for a hit (1.0 = same content words)
+        "num_perm": 32,       # MinHash signature length
+        "bands": 8,           # LSH bands (num_perm / bands rows each)
+        "max_entries": 1000,
+        "max_bucket": 16,     # Entries per LSH bucket: bounds candidates per lookup
+        "max_features": 96,   # Longer messages skip this tier
+        "ttl_seconds": 3600
+    }
+    
+    # Rendered order/search/menu replies, keyed by catalog version
+    RENDER_CACHE = {
+        "max_entries": 5000
     }
     
     # Chat Settings
     MAX_HISTORY_LENGTH = 20
+    MAX_MESSAGE_LENGTH = 2000  # Characters per chat message; longer ones are rejected with 422
     SESSION_TIMEOUT = 3600  # 1 hour
+    MAX_SESSION_MEMORY = 64 * 1024 * 1024  # Bytes of in-memory chat history; least recently active sessions go first
+    SESSION_STORAGE = "memory"  # "memory" (this process) or "sqlite" (shared store, seen by every worker)
+    
+    # Shared Store (SQLite in WAL mode, used by the "sqlite" storage options)
+    SHARED_STORE = {
+        "busy_timeout": 5.0,   # Seconds a write waits for another process's transaction
+        "sweep_interval": 1.0  # Min seconds between session expiry/cap passes (per process)
+    }
     
     # Response Templates
     WELCOME_MESSAGE = """👋 Welcome to Swiggy Support! I'm your AI assistant.
@@ -49,7 +173,11 @@ How can I assist you today?"""
         "order_not_found": "❌ Order {} not found. Please check the order ID.",
         "restaurant_not_found": "❌ Restaurant not found. Try searching differently.",
         "server_error": "❌ Sorry, I encountered an error. Please try again.",
-        "invalid_input": "❌ I didn't understand that. Can you please rephrase?"
+        "invalid_input": "❌ I didn't understand that. Can you please rephrase?",
+        "server_busy": "⏳ I'm handling a lot of questions right now. Please try again in a moment.",
+        "timeout": "⏳ That took too long to answer. Please try again.",
+        "model_loading": "⏳ I'm still warming up, so I can only answer the basics for a moment.",
+        "model_failed": "😔 Smart answers are unavailable right now, but I can still help with the basics."
     }
     
     # Feature Flags
@@ -69,8 +197,8 @@ How can I assist you today?"""
     @classmethod
     def validate_config(cls) -> bool:
         """Validate configuration"""
-        # Check if model exists
-        if not os.path.exists(cls.MODEL_PATH):
+        # Check if model exists (the stub backend needs none)
+        if cls.LLM_BACKEND == "llama_cpp" and not os.path.exists(cls.MODEL_PATH):
             print(f"⚠️ Model not found at: {cls.MODEL_PATH}")
             print("Download from: https://huggingface.co/TheBloke/Mistral-7B-Instruct-v0.2-GGUF")
             return False
@@ -84,6 +212,8 @@ How can I assist you today?"""
         for file_type, filename in cls.DATA_FILES.items():
             path = cls.get_data_path(file_type)
             if not os.path.exists(path):
+                if file_type in ("conversation_log", "shared_store", "catalog_db", "analytics_checkpoint"):
+                    continue  # Created on first write / import
                 print(f"⚠️ Missing data file: {path}")
                 if file_type == "conversations":
                     # Create empty conversations file
@@ -0,0 +1,298 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+FSYNC_POLICIES = ("commit", "interval", "never")
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationLog:
+    """Append-only JSONL conversation log fed by a single group-commit writer thread"""
+
+    def __init__(self, path: str, flush_interval: float = 0.5, flush_size: int = 64,
+                 fsync: str = "commit", fsync_interval: float = 1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {FSYNC_POLICIES}")
+
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = max(1, flush_size)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+
+        # Writer statistics
+        self.records_written = 0
+        self.commits = 0
+        self.last_error = None
+
+        self._start()
+        atexit.register(self.close)
+
+    def _start(self):
+        self._queue = queue.Queue()
+        self._closed = False
+        self._failed = None  # Why the writer thread stopped, once it has died
+        self._lock = threading.Lock()
+        handle = self._open()  # In the caller, so a bad path fails here and not in the thread
+        self._thread = threading.Thread(target=self._writer, args=(handle,), name="conversation-log-writer",
+                                        daemon=True)
+        self._thread.start()
+
+    def after_fork(self):
+        """Start a writer in a forked worker (threads do not survive fork)"""
+        self.records_written = 0
+        self.commits = 0
+        self._start()
+
+    def append(self, record: Dict):
+        """Queue a record for the next group commit (never blocks on disk)"""
+        with self._lock:
+            if self._failed is not None:
+                raise RuntimeError(f"Conversation log writer stopped: {self._failed}")
+            if self._closed:
+                raise RuntimeError("Conversation log is closed")
+            self._queue.put(record)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every record queued so far has been committed; False if one was lost or on timeout"""
+        with self._lock:
+            if self._failed is not None:
+                return False
+            if self._closed:
+                return True
+            done = Future()
+            self._queue.put(done)
+        try:
+            return done.result(timeout)
+        except TimeoutError:
+            return False
+
+    def close(self, timeout: float = 5.0):
+        """Commit pending records and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _open(self):
+        f = open(self.path, 'a+', encoding='utf-8')
+        try:
+            self._repair_tail(f)
+        except BaseException:
+            f.close()
+            raise
+        return f
+
+    def _writer(self, handle):
+        """Thread body: run the writer loop; if it dies, refuse new records and fail pending flushes"""
+        try:
+            self._run(handle)
+        except BaseException as e:
+            self.last_error = str(e)
+            logger.error("❌ Conversation log writer stopped: %s", e)
+            with self._lock:
+                self._failed = str(e)
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, Future):
+                        item.set_result(False)
+
+    def _run(self, f):
+        """Writer loop: collect records into batches and commit them together"""
+        last_sync = time.monotonic()
+        lost = False  # A batch since the last flush barrier failed to commit
+
+        with f:
+            while True:
+                batch, waiters, stop = self._next_batch()
+
+                if batch:
+                    try:
+                        f.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in batch))
+                        f.flush()
+                        now = time.monotonic()
+                        if self.fsync == "commit" or (
+                                self.fsync == "interval" and now - last_sync >= self.fsync_interval):
+                            os.fsync(f.fileno())
+                            last_sync = now
+                        self.records_written += len(batch)
+                        self.commits += 1
+                    except (OSError, TypeError, ValueError) as e:
+                        self.last_error = str(e)
+                        lost = True
+                        logger.error("❌ Conversation log write failed: %s", e)
+
+                for waiter in waiters:
+                    waiter.set_result(not lost)
+                if waiters:
+                    lost = False
+
+                if stop:
+                    if self.fsync != "never":
+                        os.fsync(f.fileno())
+                    return
+
+    def _next_batch(self):
+        """Block for the first record, then gather more until size or interval is reached"""
+        batch: List[Dict] = []
+        waiters = []
+
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            if item is None:
+                return batch, waiters, True
+            if isinstance(item, Future):
+                # Flush barrier: commit what we have right away
+                waiters.append(item)
+                return batch, waiters, False
+
+            batch.append(item)
+            if len(batch) >= self.flush_size:
+                return batch, waiters, False
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch, waiters, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, waiters, False
+
+    @staticmethod
+    def _repair_tail(f):
+        """Terminate a torn last line (crash mid-write) so new records start cleanly"""
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return
+        f.seek(f.tell() - 1)
+        if f.read(1) != '\n':
+            f.write('\n')
+            f.flush()
+
+
+class SessionHistoryIndex:
+    """Last N conversation records per session, in bounded ring buffers
+
+    Sessions are kept in least-recently-updated order and the oldest are
+    dropped past max_sessions, so memory stays bounded no matter how long the
+    process runs. All access goes through one lock because records are added
+    from the BackgroundTasks thread pool while requests read them.
+    """
+
+    def __init__(self, history_per_session: int = 10, max_sessions: int = 100000):
+        self.history_per_session = history_per_session
+        self.max_sessions = max_sessions
+        self.evicted_sessions = 0
+        self._sessions: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict):
+        session_id = record.get('session_id')
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is None:
+                history = self._sessions[session_id] = deque(maxlen=self.history_per_session)
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted_sessions += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            history.append(record)
+
+    def get(self, session_id: str) -> List[Dict]:
+        with self._lock:
+            history = self._sessions.get(session_id)
+            return list(history) if history is not None else []
+
+    def rebuild(self, records: Iterable[Dict]):
+        """Replay persisted records; only the bounded tail of each session is retained"""
+        for record in records:
+            self.add(record)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+def iter_conversations(path: str) -> Iterator[Dict]:
+    """Stream records from a JSONL conversation log, skipping torn or corrupt lines"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def iter_conversations_from(path: str, offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+    """(record, byte offset after it) for complete lines from offset on
+
+    A last line without its newline may still be being written, so it is
+    left for the next call; corrupt lines are skipped like in iter_conversations.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                return
+            offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line), offset
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+
+
+def migrate_json_log(json_path: str, log_path: str) -> int:
+    """One-shot migration of a legacy conversations.json into the JSONL log
+
+    Runs only when the log does not exist yet, so calling it on every start is safe.
+    Returns the number of migrated records.
+    """
+    if os.path.exists(log_path) or not os.path.exists(json_path):
+        return 0
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        try:
+            conversations = json.load(f).get('conversations', [])
+        except json.JSONDecodeError:
+            conversations = []
+
+    # Write to a temp file and rename so a crash never leaves a half-migrated log
+    tmp_path = log_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for conv in conversations:
+            f.write(json.dumps(conv, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, log_path)
+
+    return len(conversations)
+
+
+if __name__ == "__main__":
+    from config import Config
+
+    migrated = migrate_json_log(Config.get_data_path("conversations"),
+                                Config.get_data_path("conversation_log"))
+    print(f"✅ Migrated {migrated} conversations to {Config.get_data_path('conversation_log')}")
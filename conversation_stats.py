@@ -0,0 +1,175 @@
+import base64
+import hashlib
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+STOP_WORDS = {'i', 'the', 'is', 'my', 'a', 'to', 'and', 'of', 'in', 'for'}
+
+# First match wins; anything else is "general"
+INTENT_KEYWORDS = (
+    ("order_tracking", ('track', 'order', 'ord', 'status', 'where')),
+    ("restaurant_search", ('restaurant', 'pizza', 'biryani', 'burger', 'food')),
+    ("menu_query", ('menu',)),
+)
+INTENTS = tuple(name for name, _ in INTENT_KEYWORDS) + ("general",)
+
+
+def classify_intent(message: str) -> str:
+    msg = message.lower()
+    for intent, words in INTENT_KEYWORDS:
+        if any(word in msg for word in words):
+            return intent
+    return "general"
+
+
+class HyperLogLog:
+    """Distinct-count sketch in 2**p one-byte registers (~1.04/sqrt(2**p) relative error)
+
+    Memory is fixed whatever the number of distinct values; small counts use
+    the linear-counting correction. The harmonic sum is kept up to date on
+    add, so count() is O(1).
+    """
+
+    def __init__(self, p: int = 14, registers: Optional[bytes] = None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        self._sum = sum(2.0 ** -r for r in self.registers)
+        self._zeros = self.registers.count(0)
+
+    def add(self, value: str):
+        h = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = h >> (64 - self.p)
+        rank = (64 - self.p) - (h & ((1 << (64 - self.p)) - 1)).bit_length() + 1
+        old = self.registers[index]
+        if rank > old:
+            self.registers[index] = rank
+            self._sum += 2.0 ** -rank - 2.0 ** -old
+            if old == 0:
+                self._zeros -= 1
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / self._sum
+        if estimate <= 2.5 * self.m and self._zeros:
+            estimate = self.m * math.log(self.m / self._zeros)
+        return int(round(estimate))
+
+    def to_str(self) -> str:
+        return base64.b64encode(bytes(self.registers)).decode('ascii')
+
+    @classmethod
+    def from_str(cls, p: int, data: str) -> "HyperLogLog":
+        return cls(p, base64.b64decode(data))
+
+
+class ConversationStats:
+    """Report aggregates updated one record at a time, in memory that does not grow with the log
+
+    Unique sessions come from a HyperLogLog, keywords from a counter pruned
+    back to its most frequent keyword_capacity words whenever it doubles
+    (top-10 stays exact for any realistic word distribution), and the
+    chart series are capped at the first few sessions/responses, as before.
+    The state round-trips through to_dict/from_dict for checkpoints.
+    """
+
+    SESSION_SERIES = 10   # Messages-per-session chart
+    RESPONSE_SERIES = 20  # Response-length chart
+
+    def __init__(self, keyword_capacity: int = 5000, hll_precision: int = 14):
+        self.keyword_capacity = keyword_capacity
+        self.total = 0
+        self.sessions = HyperLogLog(hll_precision)
+        self.hours = [0] * 24
+        self.intents = {intent: 0 for intent in INTENTS}
+        self.keywords = Counter()
+        self.session_lengths: Dict[str, int] = {}
+        self.response_words: List[int] = []
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+    def add(self, record: Dict):
+        self.total += 1
+        session_id = str(record.get('session_id'))
+        self.sessions.add(session_id)
+
+        message = record.get('user_message') or ''
+        self.intents[classify_intent(message)] += 1
+        for word in message.lower().split():
+            if word not in STOP_WORDS:
+                self.keywords[word] += 1
+        if len(self.keywords) > 2 * self.keyword_capacity:
+            self.keywords = Counter(dict(self.keywords.most_common(self.keyword_capacity)))
+
+        timestamp = record.get('timestamp')
+        try:
+            self.hours[datetime.fromisoformat(timestamp).hour] += 1
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+        except (TypeError, ValueError):
+            pass
+
+        if session_id in self.session_lengths:
+            self.session_lengths[session_id] += 1
+        elif len(self.session_lengths) < self.SESSION_SERIES:
+            self.session_lengths[session_id] = 1
+        if len(self.response_words) < self.RESPONSE_SERIES:
+            self.response_words.append(len((record.get('bot_response') or '').split()))
+
+    @property
+    def unique_sessions(self) -> int:
+        return self.sessions.count()
+
+    def top_keywords(self, n: int = 10) -> List[Tuple[str, int]]:
+        return self.keywords.most_common(n)
+
+    def peak_hour(self) -> Optional[int]:
+        if not any(self.hours):
+            return None
+        return max(range(24), key=lambda h: self.hours[h])
+
+    def summary(self) -> Dict:
+        """Headline numbers for /api/stats (cost bounded by keyword_capacity, not the log)"""
+        unique = self.unique_sessions
+        return {
+            "total_conversations": self.total,
+            "unique_sessions": unique,
+            "avg_messages_per_session": round(self.total / unique, 2) if unique else 0,
+            "intents": dict(self.intents),
+            "top_keywords": [{"word": word, "count": count} for word, count in self.top_keywords()],
+            "peak_hour": self.peak_hour(),
+            "messages_by_hour": list(self.hours),
+            "first_conversation_at": self.first_timestamp,
+            "last_conversation_at": self.last_timestamp
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "keyword_capacity": self.keyword_capacity,
+            "total": self.total,
+            "sessions": {"p": self.sessions.p, "registers": self.sessions.to_str()},
+            "hours": self.hours,
+            "intents": self.intents,
+            "keywords": dict(self.keywords),
+            "session_lengths": self.session_lengths,
+            "response_words": self.response_words,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ConversationStats":
+        stats = cls(keyword_capacity=data["keyword_capacity"])
+        stats.total = data["total"]
+        stats.sessions = HyperLogLog.from_str(data["sessions"]["p"], data["sessions"]["registers"])
+        stats.hours = data["hours"]
+        stats.intents.update(data["intents"])
+        stats.keywords = Counter(data["keywords"])
+        stats.session_lengths = data["session_lengths"]
+        stats.response_words = data["response_words"]
+        stats.first_timestamp = data["first_timestamp"]
+        stats.last_timestamp = data["last_timestamp"]
+        return stats
@@ -1,13 +1,73 @@
 import json
+import logging
 import os
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+from catalog_index import CatalogIndex
+from catalog_store import SCHEMA_VERSION, SQLiteCatalog, import_json_files, schema_version
+from config import Config
+from conversation_log import ConversationLog, SessionHistoryIndex, iter_conversations, migrate_json_log
+from conversation_stats import ConversationStats
+from shared_store import SQLiteConversationLog, iter_sqlite_conversation_rows
+
+logger = logging.getLogger(__name__)
+
 class DataManager:
-    def __init__(self):
-        self.data_dir = "data"
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = data_dir
+        self.conversation_storage = Config.CONVERSATION_STORAGE
+        self.catalog_engine = Config.CATALOG_ENGINE
+        self.conversation_log = None
+        self.session_history = SessionHistoryIndex(**Config.SESSION_HISTORY)
+        self._reload_lock = threading.Lock()
+        self._reload_listeners: List[Callable[[], None]] = []
+        self.catalog_version = 0  # Bumped on every swap; stamps anything rendered from the catalog
+        
+        # Live aggregates for /api/stats, updated as conversations are saved
+        self.conversation_stats = ConversationStats(**Config.ANALYTICS)
+        self.stats_updated_at = time.time()
+        self._stats_lock = threading.Lock()
+        self._stats_summary = None
+        self._stats_row_id = 0  # sqlite: last shared-store row folded in
+        
         self.ensure_data_files()
         self.load_all_data()
+        
+        if self.conversation_storage == "jsonl":
+            self.conversation_log = ConversationLog(self.conversation_log_path, **Config.CONVERSATION_LOG)
+        elif self.conversation_storage == "sqlite":
+            self.conversation_log = SQLiteConversationLog(
+                self.shared_store_path, busy_timeout=Config.SHARED_STORE["busy_timeout"], **Config.CONVERSATION_LOG)
+            self.import_into_shared_store()
+            self.get_stats()  # Fold in the existing records now rather than on the first request
+    
+    @property
+    def conversation_log_path(self) -> str:
+        return os.path.join(self.data_dir, Config.DATA_FILES["conversation_log"])
+    
+    @property
+    def catalog_db_path(self) -> str:
+        return os.path.join(self.data_dir, Config.DATA_FILES["catalog_db"])
+    
+    @property
+    def shared_store_path(self) -> str:
+        return os.path.join(self.data_dir, Config.DATA_FILES["shared_store"])
+    
+    def import_into_shared_store(self):
+        """One-shot import of the JSONL log (or legacy json) into an empty shared store"""
+        if self.conversation_log.count():
+            return
+        if os.path.exists(self.conversation_log_path):
+            records = iter_conversations(self.conversation_log_path)
+        else:
+            with open(os.path.join(self.data_dir, "conversations.json"), 'r', encoding='utf-8') as f:
+                records = json.load(f).get('conversations', [])
+        imported = self.conversation_log.import_records(records)
+        if imported:
+            logger.info("📦 Imported %d conversations into %s", imported, self.shared_store_path)
     
     def ensure_data_files(self):
         """Ensure all data files exist"""
@@ -21,58 +81,141 @@ class DataManager:
                 json.dump({"conversations": []}, f)
     
     def load_all_data(self):
-        """Load all data into memory"""
+        """Load all data into memory (or open the SQLite catalog)"""
+        if self.catalog_engine == "sqlite":
+            self.load_catalog_db()
+        else:
+            self.load_catalog_json()
+        self.load_conversations()
+    
+    def load_catalog_db(self):
+        """Serve the catalog from catalog.db, (re)importing it when the JSON files are newer or the schema changed"""
+        json_files = self.catalog_files()[:3]
+        if all(os.path.exists(path) for path in json_files) and (
+                not os.path.exists(self.catalog_db_path) or
+                max(os.path.getmtime(path) for path in json_files) > os.path.getmtime(self.catalog_db_path) or
+                schema_version(self.catalog_db_path) != SCHEMA_VERSION):
+            counts = import_json_files(self.catalog_db_path, self.data_dir)
+            logger.info("📦 Imported catalog into %s: %s", self.catalog_db_path, counts)
+        
+        index = SQLiteCatalog(self.catalog_db_path, fuzzy_threshold=Config.FUZZY_SEARCH["threshold"],
+                              fuzzy_candidates=Config.FUZZY_SEARCH["max_candidates"])
+        catalog_stats = index.stats()
+        self.restaurants_data = self.menu_data = self.orders_data = None
+        self.index = index
+        self._catalog_swapped(catalog_stats)
+    
+    def load_catalog_json(self):
+        """Load the JSON catalog into memory and index it"""
         # Load restaurants
         with open(os.path.join(self.data_dir, "restaurants.json"), 'r', encoding='utf-8') as f:
-            self.restaurants_data = json.load(f)
+            restaurants_data = json.load(f)
         
         # Load menu
         with open(os.path.join(self.data_dir, "menu.json"), 'r', encoding='utf-8') as f:
-            self.menu_data = json.load(f)
+            menu_data = json.load(f)
         
         # Load orders
         with open(os.path.join(self.data_dir, "orders.json"), 'r', encoding='utf-8') as f:
-            self.orders_data = json.load(f)
-        
-        # Load conversations
-        with open(os.path.join(self.data_dir, "conversations.json"), 'r', encoding='utf-8') as f:
-            self.conversations_data = json.load(f)
-    
-    def search_restaurants(self, query: str) -> List[Dict]:
-        """Search restaurants by name or cuisine"""
-        query = query.lower()
-        results = []
+            orders_data = json.load(f)
         
-        for restaurant in self.restaurants_data['restaurants']:
-            if (query in restaurant['name'].lower() or 
-                query in restaurant['cuisine'].lower()):
-                results.append(restaurant)
+        # Build lookup indexes so queries don't scan the catalog
+        index = CatalogIndex(
+            restaurants_data['restaurants'],
+            menu_data['menu_items'],
+            orders_data['orders'],
+            fuzzy_threshold=Config.FUZZY_SEARCH["threshold"]
+        )
         
-        return results[:5]  # Return top 5 results
+        # Requests only go through self.index, so this one assignment is the swap
+        self.restaurants_data, self.menu_data, self.orders_data = restaurants_data, menu_data, orders_data
+        self.index = index
+        self._catalog_swapped(index.stats())
+    
+    def _catalog_swapped(self, catalog_stats: Dict):
+        self.catalog_stats = {key: catalog_stats[key] for key in ("restaurants", "menus", "orders")}
+        self.catalog_loaded_at = time.time()  # Last-Modified of the catalog API responses
+        self.catalog_version += 1  # After the index assignment: a reader seeing the new version sees the new index
+    
+    def catalog_files(self) -> List[str]:
+        """Files the catalog is built from (watched by CatalogReloader)"""
+        files = [os.path.join(self.data_dir, name) for name in ("restaurants.json", "menu.json", "orders.json")]
+        if self.catalog_engine == "sqlite":
+            files.append(self.catalog_db_path)
+        return files
+    
+    def reload_catalog(self):
+        """Rebuild the catalog and its indexes, then swap them in; raises (keeping the old one) on bad data"""
+        with self._reload_lock:
+            if self.catalog_engine == "sqlite":
+                self.load_catalog_db()
+            else:
+                self.load_catalog_json()
+            for listener in self._reload_listeners:
+                listener()
+    
+    def on_catalog_reload(self, listener: Callable[[], None]):
+        """Call listener after each catalog swap (to rebuild anything derived from it)"""
+        self._reload_listeners.append(listener)
+    
+    def load_conversations(self):
+        """Rebuild session history from the conversation log"""
+        if self.conversation_storage == "jsonl":
+            migrated = migrate_json_log(os.path.join(self.data_dir, "conversations.json"),
+                                        self.conversation_log_path)
+            if migrated:
+                logger.info("📦 Migrated %d conversations to %s", migrated, self.conversation_log_path)
+            # Stream the log: only the per-session tails stay in memory
+            self.conversations_data = None
+            self.session_history.rebuild(self._with_stats(iter_conversations(self.conversation_log_path)))
+        elif self.conversation_storage == "sqlite":
+            # History and stats are read from the shared store, so every worker sees every write
+            self.conversations_data = None
+        else:
+            with open(os.path.join(self.data_dir, "conversations.json"), 'r', encoding='utf-8') as f:
+                self.conversations_data = json.load(f)
+            self.session_history.rebuild(self._with_stats(self.conversations_data['conversations']))
+    
+    def _with_stats(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        """Pass records through, counting them into the live stats (same single pass as the history rebuild)"""
+        for record in records:
+            self.conversation_stats.add(record)
+            yield record
+    
+    def search_restaurants(self, query: str, limit: int = 5, fuzzy: bool = True) -> List[Dict]:
+        """Search restaurants by name or cuisine (substring match, then typo-tolerant if nothing matched and fuzzy)"""
+        results = self.index.search_restaurants(query, limit=limit)  # Top 5 results by default
+        if not results and fuzzy:
+            results = [restaurant for _, restaurant in self.index.fuzzy_search(query, limit=limit)]
+        return results
+    
+    def fuzzy_search_restaurants(self, query: str, limit: int = 5) -> List[Tuple[float, Dict]]:
+        """(similarity, restaurant) for misspelt names, cuisines or dishes, best match then rating first"""
+        return self.index.fuzzy_search(query, limit=limit)
+    
+    def fuzzy_find_restaurant(self, name: str) -> Optional[Tuple[float, Dict]]:
+        """(similarity, restaurant) with the closest-spelt name, if any"""
+        return self.index.fuzzy_find_restaurant(name)
     
     def get_order_status(self, order_id: str) -> Optional[Dict]:
         """Get order status by order ID"""
-        for order in self.orders_data['orders']:
-            if order['order_id'] == order_id.upper():
-                return order
-        return None
+        return self.index.get_order(order_id.upper())
     
     def get_restaurant_menu(self, restaurant_id: str) -> List[Dict]:
         """Get menu items for a restaurant"""
-        for menu in self.menu_data['menu_items']:
-            if menu['restaurant_id'] == restaurant_id:
-                return menu['items']
-        return []
+        return self.index.get_menu(restaurant_id)
     
     def get_restaurant_by_name(self, name: str) -> Optional[Dict]:
-        """Get restaurant details by name"""
-        for restaurant in self.restaurants_data['restaurants']:
-            if name.lower() in restaurant['name'].lower():
-                return restaurant
-        return None
+        """Get restaurant details by name (closest spelling if no name contains it)"""
+        restaurant = self.index.find_restaurant_by_name(name)
+        if restaurant is None:
+            match = self.index.fuzzy_find_restaurant(name)
+            if match and match[0] >= Config.FUZZY_SEARCH["min_score"]:
+                restaurant = match[1]
+        return restaurant
     
     def save_conversation(self, session_id: str, user_msg: str, bot_response: str):
-        """Save conversation to file"""
+        """Save conversation (group-committed log append, or full rewrite in json mode)"""
         conversation = {
             "session_id": session_id,
             "user_message": user_msg,
@@ -80,36 +223,77 @@ class DataManager:
             "timestamp": datetime.now().isoformat()
         }
         
-        self.conversations_data['conversations'].append(conversation)
+        if self.conversation_storage != "sqlite":
+            self.session_history.add(conversation)
+            with self._stats_lock:
+                self._add_stats(conversation)
+        
+        if self.conversation_log is not None:
+            self.conversation_log.append(conversation)
+            return
         
-        # Save to file
+        # Legacy json mode: rewrite the whole file
+        self.conversations_data['conversations'].append(conversation)
         with open(os.path.join(self.data_dir, "conversations.json"), 'w', encoding='utf-8') as f:
             json.dump(self.conversations_data, f, indent=2, ensure_ascii=False)
     
     def get_conversation_history(self, session_id: str) -> List[Dict]:
         """Get chat history for a session"""
-        history = []
-        for conv in self.conversations_data['conversations']:
-            if conv['session_id'] == session_id:
-                history.append(conv)
-        return history[-10:]  # Return last 10 messages
-    
-    def get_popular_restaurants(self) -> List[Dict]:
-        """Get popular restaurants (rating > 4.3)"""
-        popular = []
-        for restaurant in self.restaurants_data['restaurants']:
-            if restaurant['rating'] >= 4.3:
-                popular.append(restaurant)
-        return sorted(popular, key=lambda x: x['rating'], reverse=True)[:3]
-    
-    def get_quick_delivery_restaurants(self) -> List[Dict]:
-        """Get restaurants with quick delivery (< 30 mins)"""
-        quick = []
-        for restaurant in self.restaurants_data['restaurants']:
-            delivery_time = int(restaurant['delivery_time'].split()[0])
-            if delivery_time <= 30:
-                quick.append(restaurant)
-        return quick
+        if self.conversation_storage == "sqlite":
+            # Committed records only: the group commit lags by up to flush_interval
+            return self.conversation_log.history(session_id, Config.SESSION_HISTORY["history_per_session"])
+        return self.session_history.get(session_id)  # Last 10 messages
+    
+    def _add_stats(self, record: Dict):
+        self.conversation_stats.add(record)
+        self.stats_updated_at = time.time()
+        self._stats_summary = None
+    
+    def get_stats(self) -> Tuple[Dict, float]:
+        """Conversation and catalog aggregates, and when they last changed
+        
+        Kept up to date per saved conversation, so this does not scan the log.
+        With the shared store each worker folds in the rows committed (by any
+        worker) since its previous call.
+        """
+        with self._stats_lock:
+            if self.conversation_storage == "sqlite":
+                for row_id, record in iter_sqlite_conversation_rows(self.shared_store_path, self._stats_row_id):
+                    self._add_stats(record)
+                    self._stats_row_id = row_id
+            if self._stats_summary is None:
+                self._stats_summary = self.conversation_stats.summary()
+            summary = dict(self._stats_summary, catalog=self.catalog_stats)
+            return summary, max(self.stats_updated_at, self.catalog_loaded_at)
+    
+    def get_popular_restaurants(self, city: Optional[str] = None, area: Optional[str] = None,
+                                open_now: bool = False) -> List[Dict]:
+        """Get popular restaurants (rating > 4.3), optionally in one city/area or open now"""
+        return self.index.popular(min_rating=4.3, limit=3, city=city, area=area, open_now=open_now)
+    
+    def get_quick_delivery_restaurants(self, limit: Optional[int] = None, city: Optional[str] = None,
+                                       area: Optional[str] = None, open_now: bool = False) -> List[Dict]:
+        """Get restaurants with quick delivery (< 30 mins), the first limit in catalog order"""
+        return self.index.quick_delivery(max_minutes=30, limit=limit, city=city, area=area, open_now=open_now)
+    
+    def list_restaurants(self, limit: int = 5, city: Optional[str] = None, area: Optional[str] = None,
+                         open_now: bool = False) -> List[Dict]:
+        """Restaurants in one city/area (or open now), best rated first"""
+        return self.index.popular(min_rating=0.0, limit=limit, city=city, area=area, open_now=open_now)
+    
+    def iter_restaurants(self) -> Iterator[Dict]:
+        """All restaurants in catalog order (streamed from the SQLite engine)"""
+        return self.index.iter_restaurants()
+    
+    def after_fork(self):
+        """Restart the log writer in a forked worker process"""
+        if self.conversation_log is not None:
+            self.conversation_log.after_fork()
+    
+    def close(self):
+        """Flush pending conversation writes"""
+        if self.conversation_log is not None:
+            self.conversation_log.close()
 
 # Create global instance
 data_manager = DataManager()
\ No newline at end of file
@@ -1,4 +1,4 @@
-// Update sendMessage function
+// Update sendMessage function (streams tokens from /chat/stream)
 async function sendMessage() {
     const input = document.getElementById('messageInput');
     const message = input.value.trim();
@@ -12,7 +12,7 @@ async function sendMessage() {
     const startTime = Date.now();
     
     try {
-        const response = await fetch(`${API_URL}/chat`, {
+        const response = await fetch(`${API_URL}/chat/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -23,13 +23,15 @@ async function sendMessage() {
             })
         });
         
-        const data = await response.json();
-        const responseTime = ((Date.now() - startTime) / 1000).toFixed(2);
+        // Server busy (503): show the server's message
+        if (!response.ok) {
+            const data = await response.json();
+            hideTypingIndicator();
+            addMessage(data.detail || 'Sorry, something went wrong. Try again.', 'bot');
+            return;
+        }
         
-        hideTypingIndicator();
-        
-        // Add response with timing
-        addMessage(data.response, 'bot', responseTime);
+        await readStream(response, startTime);
         
     } catch (error) {
         console.error('Error:', error);
@@ -38,6 +40,60 @@ async function sendMessage() {
     }
 }
 
+// Render Server-Sent Events as they arrive: {token} chunks, then {done} or {error}
+async function readStream(response, startTime) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+    let bot = null;
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        
+        for (const event of events) {
+            if (!event.startsWith('data: ')) continue;
+            const data = JSON.parse(event.slice(6));
+            
+            if (data.token) {
+                // First token replaces the typing indicator
+                if (!bot) {
+                    hideTypingIndicator();
+                    bot = addMessage('', 'bot');
+                }
+                text += data.token;
+                bot.bubble.innerHTML = formatMessage(text);
+                scrollToBottom();
+            } else if (data.error) {
+                hideTypingIndicator();
+                addMessage(data.error, 'bot');
+            } else if (data.done && bot) {
+                const responseTime = ((Date.now() - startTime) / 1000).toFixed(2);
+                bot.time.innerHTML = `${formatTime()} • ⚡ ${responseTime}s`;
+            }
+        }
+    }
+    
+    if (!bot) hideTypingIndicator();
+}
+
+function scrollToBottom() {
+    const messagesContainer = document.getElementById('chatMessages');
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+}
+
+function formatTime() {
+    return new Date().toLocaleTimeString('en-US', { 
+        hour: 'numeric', 
+        minute: '2-digit' 
+    });
+}
+
 // Update addMessage to show response time
 function addMessage(text, sender, responseTime = null) {
     const messagesContainer = document.getElementById('chatMessages');
@@ -64,15 +120,9 @@ function addMessage(text, sender, responseTime = null) {
     
     // Show response time for bot
     if (sender === 'bot' && responseTime) {
-        timeSpan.innerHTML = `${new Date().toLocaleTimeString('en-US', { 
-            hour: 'numeric', 
-            minute: '2-digit' 
-        })} • ⚡ ${responseTime}s`;
+        timeSpan.innerHTML = `${formatTime()} • ⚡ ${responseTime}s`;
     } else {
-        timeSpan.textContent = new Date().toLocaleTimeString('en-US', { 
-            hour: 'numeric', 
-            minute: '2-digit' 
-        });
+        timeSpan.textContent = formatTime();
     }
     
     contentDiv.appendChild(bubbleDiv);
@@ -88,4 +138,7 @@ function addMessage(text, sender, responseTime = null) {
     
     messagesContainer.appendChild(messageDiv);
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    
+    // Returned so streamed responses can be filled in as tokens arrive
+    return { bubble: bubbleDiv, time: timeSpan };
 }
\ No newline at end of file
@@ -0,0 +1,203 @@
+import math
+import re
+from heapq import heappush, heapreplace, merge
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WORD_PATTERN = re.compile(r"[^\W_]{2,}")
+
+# Filler in search-like messages ("show me the menu of dominoz"); never matched fuzzily
+QUERY_STOP_WORDS = frozenset(
+    "a an the i me my we show find get give want need any some of for in on at near from with to and or "
+    "is are what whats which where please pls menu restaurant restaurants place places food order".split())
+
+
+def words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+def query_words(query: str) -> List[str]:
+    return [w for w in words(query) if w not in QUERY_STOP_WORDS]
+
+
+def trigrams(word: str) -> List[str]:
+    """Padded like pg_trgm, so short words and word starts still get distinctive trigrams"""
+    padded = f"  {word} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class TrigramVocabulary:
+    """Catalog words indexed by trigram, for typo-tolerant word lookup
+
+    similar() scores vocabulary words by the Dice coefficient of their
+    trigram sets. A word reaching threshold must share a minimum number of
+    trigrams with the query, so the commonest query trigrams (" k", a first
+    letter) are not scanned: candidates come from the rarer ones and are
+    checked against the common ones with set lookups. The vocabulary is the
+    distinct words of the catalog, which grows far slower than the number
+    of restaurants, and results are memoized per query word.
+    """
+
+    def __init__(self, vocabulary: Iterable[str], threshold: float = 0.5, max_matches: int = 8):
+        self.threshold = threshold
+        self.max_matches = max_matches
+        self.words = sorted(set(vocabulary))
+        self.word_set = frozenset(self.words)
+        self.gram_counts = []
+
+        postings: Dict[str, List[int]] = {}
+        for word_id, word in enumerate(self.words):
+            grams = set(trigrams(word))
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(word_id)
+        self.postings = postings
+
+        self._posting_sets: Dict[str, frozenset] = {}
+        self._memo: Dict[str, List[Tuple[str, float]]] = {}
+
+    def _posting_set(self, gram: str) -> frozenset:
+        posting_set = self._posting_sets.get(gram)
+        if posting_set is None:
+            posting_set = self._posting_sets[gram] = frozenset(self.postings.get(gram, ()))
+        return posting_set
+
+    def similar(self, word: str) -> List[Tuple[str, float]]:
+        """(vocabulary word, similarity) at or above threshold, most similar first"""
+        cached = self._memo.get(word)
+        if cached is not None:
+            return cached
+
+        grams = sorted(set(trigrams(word)), key=lambda g: len(self.postings.get(g, ())))
+        # Dice >= t needs shared >= t * n / (2 - t): any such word shares one of the n - min + 1 rarest
+        min_shared = max(1, math.ceil(self.threshold * len(grams) / (2 - self.threshold)))
+        probe, common = grams[:len(grams) - min_shared + 1], grams[len(grams) - min_shared + 1:]
+
+        overlap: Dict[int, int] = {}
+        for gram in probe:
+            for word_id in self.postings.get(gram, ()):
+                overlap[word_id] = overlap.get(word_id, 0) + 1
+        common_sets = [self._posting_set(gram) for gram in common]
+
+        scored = []
+        for word_id, shared in overlap.items():
+            for posting_set in common_sets:
+                if word_id in posting_set:
+                    shared += 1
+            similarity = 2 * shared / (len(grams) + self.gram_counts[word_id])
+            if similarity >= self.threshold:
+                scored.append((self.words[word_id], similarity))
+        scored.sort(key=lambda m: (-m[1], m[0]))
+        result = scored[:self.max_matches]
+
+        if len(self._memo) < 10000:
+            self._memo[word] = result
+        return result
+
+    def split(self, word: str) -> Optional[Tuple[str, str]]:
+        """Two vocabulary words run together ("burgerking"), the most even split if several"""
+        splits = [(word[:i], word[i:]) for i in range(2, len(word) - 1)
+                  if word[:i] in self.word_set and word[i:] in self.word_set]
+        return max(splits, key=lambda s: min(len(s[0]), len(s[1])), default=None)
+
+    def expand(self, query: str) -> List[Dict[str, float]]:
+        """Per query word, the catalog words it may stand for (empty when it matches nothing)"""
+        expansions = []
+        for word in query_words(query):
+            if word not in self.word_set:
+                parts = self.split(word)
+                if parts:
+                    expansions.extend({part: 1.0} for part in parts)
+                    continue
+            expansions.append(dict(self.similar(word)))
+        return expansions
+
+
+class FuzzyIndex:
+    """Typo-tolerant restaurant search over names, cuisines and (optionally) menu dishes
+
+    Query words are matched to catalog words by trigram similarity (or split
+    when two words were run together); restaurants are ranked by the mean
+    similarity of their best match per query word (0 for a word matching
+    nothing in the catalog), then by rating. Word postings are kept in
+    rating order, so a one-word query reads only the first `limit`
+    postings; longer queries score at most max_candidates restaurants taken
+    from their rarest word.
+    """
+
+    def __init__(self, restaurants: List[Dict], fields: tuple = ('name', 'cuisine'),
+                 menu_by_restaurant: Optional[Dict[str, List[Dict]]] = None,
+                 threshold: float = 0.5, max_candidates: int = 500):
+        self.max_candidates = max_candidates
+
+        # Rank = position in (rating desc, catalog order); postings hold ranks
+        order = sorted(range(len(restaurants)), key=lambda pos: (-restaurants[pos]['rating'], pos))
+        self.ranked = [restaurants[pos] for pos in order]
+
+        postings: Dict[str, List[int]] = {}
+        self.rank_words: List[frozenset] = []
+        for rank, restaurant in enumerate(self.ranked):
+            text = ' '.join(str(restaurant.get(field, '')) for field in fields)
+            if menu_by_restaurant is not None:
+                text += ' ' + ' '.join(item['name'] for item in menu_by_restaurant.get(restaurant['id'], []))
+            restaurant_words = set(words(text))
+            for word in restaurant_words:
+                postings.setdefault(word, []).append(rank)
+            self.rank_words.append(frozenset(restaurant_words))
+        self.postings = postings
+
+        self.vocabulary = TrigramVocabulary(postings, threshold)
+
+    def _ranks(self, matches: Dict[str, float]) -> Iterable[Tuple[float, int]]:
+        """(similarity, rank) for every restaurant matching one query word, best first, de-duplicated"""
+        seen = set()
+        by_similarity: Dict[float, List[str]] = {}
+        for word, similarity in matches.items():
+            by_similarity.setdefault(similarity, []).append(word)
+        for similarity in sorted(by_similarity, reverse=True):
+            for rank in merge(*(self.postings[w] for w in by_similarity[similarity])):
+                if rank not in seen:
+                    seen.add(rank)
+                    yield similarity, rank
+
+    def search_scored(self, query: str, limit: int = 5) -> List[Tuple[float, Dict]]:
+        """(score, restaurant) pairs, best first; score is in (0, 1]"""
+        expansions = self.vocabulary.expand(query)
+        matched = [m for m in expansions if m]
+        if not matched:
+            return []
+
+        if len(expansions) == 1:
+            results = []
+            for similarity, rank in self._ranks(expansions[0]):
+                results.append((similarity, self.ranked[rank]))
+                if len(results) >= limit:
+                    break
+            return results
+
+        # Candidates come from the rarest word, best similarity then best rating first: stop
+        # once `limit` of them score at least what any later candidate could
+        rarest = min(matched, key=lambda m: sum(len(self.postings[w]) for w in m))
+        others_best = sum(max(m.values()) for m in matched) - max(rarest.values())
+        top = []  # Min-heap of (score, -rank): the worst kept result on top
+        for checked, (similarity, rank) in enumerate(self._ranks(rarest)):
+            if checked >= self.max_candidates or (
+                    len(top) >= limit and top[0][0] >= (others_best + similarity) / len(expansions)):
+                break
+            restaurant_words = self.rank_words[rank]
+            score = 0.0
+            for m in matched:
+                best = 0.0
+                for word, s in m.items():
+                    if s > best and word in restaurant_words:
+                        best = s
+                score += best
+            entry = (score / len(expansions), -rank)
+            if len(top) < limit:
+                heappush(top, entry)
+            elif entry > top[0]:
+                heapreplace(top, entry)
+        top.sort(reverse=True)
+        return [(score, self.ranked[-neg_rank]) for score, neg_rank in top]
+
+    def search(self, query: str, limit: int = 5) -> List[Dict]:
+        return [restaurant for _, restaurant in self.search_scored(query, limit)]
@@ -0,0 +1,151 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import metrics
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue is at capacity"""
+
+
+class InferenceExecutor:
+    """Bounded job queue served by dedicated threads, off the event loop
+
+    llama-cpp calls block for seconds, so they must never run on the asyncio
+    event loop. With the default single worker every job runs on the same
+    thread, one at a time, which keeps the (not thread-safe) Llama instance
+    single-owner. With continuous batching the scheduler thread owns the model
+    and several workers wait on it at once, so their prompts share decode steps.
+    """
+
+    def __init__(self, max_queue_size: int = 32, timeout_seconds: Optional[float] = 60, workers: int = 1):
+        self.max_queue_size = max_queue_size
+        self.timeout_seconds = timeout_seconds
+        self.workers = max(1, workers)
+        self._start()
+
+    def _start(self):
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"inference-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+        # Statistics
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.busy = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue a job; the future resolves to (result, seconds spent waiting in the queue)"""
+        future = Future()
+        try:
+            self._queue.put_nowait((fn, args, kwargs, future, time.monotonic()))
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFullError(f"Inference queue is full ({self.max_queue_size} pending)")
+        return future
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Tuple[Any, float]:
+        """Await a job from the event loop without blocking it"""
+        timeout = self.timeout_seconds if timeout is None else timeout
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or None)
+        except asyncio.TimeoutError:
+            # Cancelling only helps while the job is still queued; a running
+            # generation finishes in the worker and its result is dropped
+            future.cancel()
+            self.timeouts += 1
+            raise
+
+    def after_fork(self):
+        """Fresh queue and worker threads in a forked server process"""
+        self._start()
+
+    def close(self, timeout: float = 5.0):
+        """Cancel queued jobs and stop the workers, waiting at most timeout seconds in total"""
+        self._stopping.set()
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job[3].cancel()
+
+        # Wake idle workers; one still busy sees _stopping when its job ends
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None or self._stopping.is_set():
+                if job is not None:
+                    job[3].cancel()
+                return
+
+            fn, args, kwargs, future, enqueued_at = job
+            if not future.set_running_or_notify_cancel():
+                continue  # Timed out while waiting in the queue
+
+            wait = time.monotonic() - enqueued_at
+            metrics.STAGE_SECONDS.observe(wait, stage="queue_wait")
+            with self._lock:
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+                self.busy += 1
+
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                with self._lock:
+                    self.failed += 1
+                future.set_exception(e)
+            else:
+                with self._lock:
+                    self.completed += 1
+                future.set_result((result, wait))
+            finally:
+                with self._lock:
+                    self.busy -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict:
+        started = self.completed + self.failed
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "workers": self.workers,
+            "busy": self.busy,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_wait": round(self.total_wait / started, 4) if started else 0.0,
+            "max_wait": round(self.max_wait, 4),
+            "timeout_seconds": self.timeout_seconds
+        }
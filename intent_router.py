@@ -0,0 +1,187 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Declarative intent table, highest priority first. Keyword groups marked
+# None are filled from the catalog when the router is built.
+INTENT_TABLE = [
+    ("greeting", None),          # quick_responses keys, only at the start of the message
+    ("order_id", None),          # "ORD" followed by 6 digits anywhere
+    ("order_tracking", ['track', 'order', 'status', 'where']),
+    ("restaurant_menu", None),   # "menu" together with a restaurant keyword
+    ("cuisine", None),           # cuisines from restaurants.json
+    ("menu", ['menu']),
+    ("popular", ['popular', 'best', 'recommend', 'suggest', 'top']),
+    ("quick_delivery", ['quick', 'fast', 'urgent', 'asap']),
+    ("refund", ['refund', 'payment', 'money', 'paid', 'charge']),
+    ("complaint", ['complaint', 'issue', 'problem', 'wrong', 'late', 'cold']),
+    ("food", ['restaurant', 'food', 'eat', 'hungry', 'order food']),
+]
+
+# Not intents: filters narrowing popular/quick-delivery/food answers. The
+# area and city groups are filled from the catalog.
+FILTER_TABLE = [
+    ("area", None),
+    ("city", None),
+    ("open_now", ['open']),
+]
+
+ORDER_ID_PATTERN = re.compile(r'ORD\d+')
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: one pass over the text finds every keyword hit"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, object]]] = [[]]
+
+    def add(self, pattern: str, value):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), value))
+
+    def build(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, object]]:
+        """Yield (start, value) for every pattern occurrence, overlapping ones included"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, value in out[state]:
+                yield i - length + 1, value
+
+
+class IntentRouter:
+    """Intent table compiled into one Aho-Corasick automaton plus priority rules"""
+
+    def __init__(self, keyword_groups: Dict[str, Iterable[str]], table=INTENT_TABLE, filter_table=FILTER_TABLE):
+        self.priority = [intent for intent, _ in table]
+        self.filter_names = [name for name, _ in filter_table]
+        self.keywords: Dict[str, Dict[str, str]] = {}
+
+        self.matcher = AhoCorasick()
+        for intent, keywords in table + filter_table:
+            mapping = keyword_groups.get(intent, keywords) or {}
+            if not isinstance(mapping, dict):
+                mapping = {k: k for k in mapping}
+            self.keywords[intent] = mapping
+            for keyword in mapping:
+                self.matcher.add(keyword, (intent, keyword))
+
+        # "ord" only triggers the order id regex, it is not an intent by itself
+        self.matcher.add('ord', ('order_ref', 'ord'))
+        self.matcher.build()
+
+    @classmethod
+    def from_catalog(cls, restaurants: List[Dict], quick_responses: Dict[str, str]) -> "IntentRouter":
+        """Build the keyword groups from restaurants.json instead of literal lists"""
+        cuisines: Dict[str, str] = {}
+        restaurant_keywords: Dict[str, str] = {}
+        areas: Dict[str, str] = {}
+        cities: Dict[str, str] = {}
+
+        for restaurant in restaurants:
+            for cuisine in restaurant['cuisine'].lower().split(','):
+                cuisine = cuisine.strip()
+                if not cuisine:
+                    continue
+                cuisines.setdefault(cuisine, cuisine)
+                # "burgers" should also catch "burger"
+                if len(cuisine) > 4 and cuisine.endswith('s') and not cuisine.endswith('ss'):
+                    cuisines.setdefault(cuisine[:-1], cuisine[:-1])
+
+            name = restaurant['name'].lower()
+            restaurant_keywords.setdefault(name, restaurant['name'])
+            first_word = name.split()[0].replace("'s", "").strip("'")
+            if len(first_word) >= 3:
+                restaurant_keywords.setdefault(first_word, restaurant['name'])
+
+            if restaurant.get('area'):
+                areas.setdefault(restaurant['area'].lower(), restaurant['area'])
+            if restaurant.get('city'):
+                cities.setdefault(restaurant['city'].lower(), restaurant['city'].title())
+
+        return cls({
+            "greeting": list(quick_responses),
+            "cuisine": cuisines,
+            "restaurant_menu": restaurant_keywords,
+            "area": areas,
+            "city": cities,
+        })
+
+    def hits(self, message_lower: str) -> Dict[str, List[Tuple[int, str]]]:
+        """Every (position, keyword) hit per intent, from a single pass"""
+        found: Dict[str, List[Tuple[int, str]]] = {}
+        for start, (intent, keyword) in self.matcher.iter_matches(message_lower):
+            found.setdefault(intent, []).append((start, keyword))
+        return found
+
+    def filters(self, user_message: str) -> Dict[str, str]:
+        """Area/city (display name, first mentioned) and open_now filters found in a message"""
+        hits = self.hits(user_message.lower())
+        return {name: self.keywords[name][min(hits[name], key=lambda h: (h[0], -len(h[1])))[1]]
+                for name in self.filter_names if name in hits}
+
+    def route(self, user_message: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Resolve a message to (intent, argument) using the table's priority order"""
+        message_lower = user_message.lower().strip()
+        hits = self.hits(message_lower)
+        if not hits:
+            return None
+
+        order_ids = []
+        if 'order_ref' in hits:
+            order_ids = ORDER_ID_PATTERN.findall(user_message.upper())
+
+        for intent in self.priority:
+            if intent == "greeting":
+                at_start = [k for pos, k in hits.get(intent, []) if pos == 0]
+                if at_start:
+                    return intent, max(at_start, key=len)
+
+            elif intent == "order_id":
+                full_ids = [o for o in order_ids if len(o) >= 9]
+                if full_ids:
+                    return "order_status", full_ids[0][:9]
+
+            elif intent == "order_tracking":
+                if intent in hits:
+                    if order_ids:
+                        return "order_status", order_ids[0]
+                    return intent, None
+
+            elif intent == "restaurant_menu":
+                if intent in hits and 'menu' in hits:
+                    keyword = min(hits[intent], key=lambda h: (h[0], -len(h[1])))[1]
+                    return intent, self.keywords[intent][keyword]
+
+            elif intent in hits:
+                keyword = min(hits[intent], key=lambda h: (h[0], -len(h[1])))[1]
+                return intent, self.keywords[intent][keyword]
+
+        return None
@@ -0,0 +1,263 @@
+import logging
+import os
+import random
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, Optional
+
+from config import Config
+from prefix_cache import PrefixCache, SessionKVCache, template_prefix
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend(ABC):
+    """What SwiggyBot needs from a model: a blocking load and a streaming generate"""
+
+    name = "base"
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+
+    @property
+    def concurrency(self) -> int:
+        """How many generations can usefully run at once (known before load)"""
+        return Config.BATCHING["max_sequences"] if Config.BATCHING["enabled"] else 1
+
+    @abstractmethod
+    def load(self):
+        """Load the model (blocking)"""
+
+    @abstractmethod
+    def stream(self, prompt: str, prefix: Optional[str] = None, session: Optional[str] = None,
+               **params) -> Iterator[str]:
+        """Yield text pieces for prompt; prefix is its fixed leading part, if any, and session the chat it continues"""
+
+    @abstractmethod
+    def count_tokens(self, text: str) -> int:
+        """Tokens text takes up as a prompt (for the history budget)"""
+
+    def stats(self) -> Dict:
+        return {"backend": self.name, "model": os.path.basename(self.model_path)}
+
+    def after_fork(self):
+        """Called in each worker process of a pre-forked server"""
+
+    def close(self):
+        pass
+
+
+class LlamaCppBackend(LLMBackend):
+    """The GGUF model through llama-cpp-python, optionally behind the batch scheduler"""
+
+    name = "llama_cpp"
+
+    def __init__(self, model_path: str):
+        super().__init__(model_path)
+        self.llm = None
+        self.scheduler = None
+        self.prefix_cache = None
+        self.session_cache = None
+        self.lookup_decoder = None
+
+    def load(self):
+        # Imported here so the stub backend runs without llama-cpp installed
+        from llama_cpp import Llama
+
+        # Optimized model settings for SPEED
+        llm = Llama(
+            model_path=self.model_path,
+            n_ctx=Config.MODEL_PARAMS["n_ctx"],
+            n_threads=Config.MODEL_PARAMS["n_threads"],
+            n_gpu_layers=Config.MODEL_PARAMS["n_gpu_layers"],
+            n_batch=512,       # Larger batch for speed
+            use_mlock=True,    # Keep in RAM (faster)
+            use_mmap=True,     # Memory mapped
+            verbose=False      # No debug logs
+        )
+
+        # Continuous batching: concurrent requests share decode steps
+        scheduler = None
+        if Config.BATCHING["enabled"]:
+            from batch_scheduler import BatchScheduler
+            scheduler = BatchScheduler(
+                llm,
+                max_sequences=Config.BATCHING["max_sequences"],
+                n_batch=Config.BATCHING["n_batch"]
+            )
+            logger.info("📦 Continuous batching on (%d sequences)", scheduler.max_sequences)
+
+        # KV state of the fixed system prompt, evaluated once (serial path;
+        # the batch scheduler shares prefix cells between sequences itself)
+        prefix_cache = None
+        if Config.PREFIX_CACHE and scheduler is None:
+            prefix_cache = PrefixCache(llm)
+            prefix_cache.prepare(template_prefix(Config.PROMPT_TEMPLATE))
+
+        # Context state per chat session, so a follow-up turn only prefills the new turn (serial path)
+        session_cache = None
+        session_kv = dict(Config.SESSION_KV_CACHE)
+        if session_kv.pop("enabled") and scheduler is None:
+            session_cache = SessionKVCache(llm, **session_kv)
+
+        # Draft tokens from n-grams of the prompt, verified in one step (serial path)
+        lookup_decoder = None
+        prompt_lookup = dict(Config.PROMPT_LOOKUP)
+        if prompt_lookup.pop("enabled") and scheduler is None:
+            from prompt_lookup import PromptLookupDecoder
+            lookup_decoder = PromptLookupDecoder(llm, **prompt_lookup)
+            logger.info("🔮 Prompt-lookup decoding on (drafts up to %d tokens)", lookup_decoder.num_pred_tokens)
+
+        self.llm, self.scheduler, self.prefix_cache = llm, scheduler, prefix_cache
+        self.session_cache, self.lookup_decoder = session_cache, lookup_decoder
+
+    def stream(self, prompt: str, prefix: Optional[str] = None, session: Optional[str] = None,
+               **params) -> Iterator[str]:
+        """Text pieces from the batch scheduler, or straight from llama-cpp when batching is off"""
+        if self.scheduler is not None:
+            prefix = prefix if Config.PREFIX_CACHE else None
+            yield from self.scheduler.stream(prompt, prefix=prefix, **params)
+            return
+
+        # Continue from the session's previous turn, else reuse the evaluated
+        # system prompt; either way only the rest of the prompt is prefilled
+        use_session = self.session_cache is not None and session is not None
+        prefix_tokens = len(self.prefix_cache.tokens) if self.prefix_cache is not None and prefix else 0
+        if not (use_session and self.session_cache.restore(session, prompt, at_least=prefix_tokens)):
+            if self.prefix_cache is not None and prefix:
+                self.prefix_cache.prepare(prefix)
+
+        # Generate with optimized settings
+        if self.lookup_decoder is not None:
+            yield from self.lookup_decoder.stream(prompt, **params)
+        else:
+            for chunk in self.llm(prompt, echo=False, stream=True, **params):
+                yield chunk['choices'][0]['text']
+
+        if use_session:
+            self.session_cache.save(session)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.llm.tokenize(text.encode("utf-8"), special=True))
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        if self.scheduler is not None:
+            stats["batching"] = self.scheduler.stats()
+        if self.prefix_cache is not None:
+            stats["prompt_prefix"] = self.prefix_cache.stats()
+        if self.session_cache is not None:
+            stats["session_kv"] = self.session_cache.stats()
+        if self.lookup_decoder is not None:
+            stats["prompt_lookup"] = self.lookup_decoder.stats()
+        return stats
+
+    def after_fork(self):
+        if self.scheduler is not None:
+            self.scheduler.after_fork()
+
+    def close(self):
+        if self.scheduler is not None:
+            self.scheduler.close()
+        if self.lookup_decoder is not None:
+            self.lookup_decoder.close()
+
+
+STUB_WORDS = (
+    "Your order is on the way and should reach you soon. You can track it live in the app. "
+    "For refunds please share the order ID and we will check it right away. "
+    "Sorry for the trouble, our support team is here to help with anything you need."
+).split()
+
+
+def sample_latency(rng: random.Random, spec: Dict) -> float:
+    """Seconds drawn from a {"distribution": fixed|uniform|normal|lognormal, ...} spec"""
+    kind = spec.get("distribution", "fixed")
+    if kind == "fixed":
+        value = spec["value"]
+    elif kind == "uniform":
+        value = rng.uniform(spec["low"], spec["high"])
+    elif kind == "normal":
+        value = rng.gauss(spec["mean"], spec["stddev"])
+    elif kind == "lognormal":
+        # median rather than mu: easier to read off a latency chart
+        value = spec["median"] * rng.lognormvariate(0.0, spec["sigma"])
+    else:
+        raise ValueError(f"Unknown latency distribution '{kind}'")
+    return max(0.0, value)
+
+
+class StubBackend(LLMBackend):
+    """Deterministic fake model for load tests: no weights, realistic streaming timing
+
+    The same prompt always produces the same text, length and latencies
+    (everything is drawn from a RNG seeded by the prompt), so runs are
+    comparable. Time to first token follows the configured distribution and
+    tokens then arrive at tokens_per_second. Generations sleep instead of
+    using the CPU, so concurrency is bounded by the inference workers exactly
+    as with the real model.
+    """
+
+    name = "stub"
+
+    def __init__(self, tokens_per_second: float = 20.0, first_token_latency: Optional[Dict] = None,
+                 response_tokens=(20, 80), load_seconds: float = 0.0, seed: int = 0):
+        super().__init__("stub")
+        self.tokens_per_second = tokens_per_second
+        self.first_token_latency = first_token_latency or {"distribution": "fixed", "value": 0.0}
+        self.response_tokens = tuple(response_tokens)
+        self.load_seconds = load_seconds
+        self.seed = seed
+
+        # Statistics
+        self.generations = 0
+        self.tokens_generated = 0
+
+    def load(self):
+        # Simulated model load so /ready and the degraded path can be exercised
+        time.sleep(self.load_seconds)
+
+    def stream(self, prompt: str, prefix: Optional[str] = None, session: Optional[str] = None,
+               max_tokens: int = 150, **params) -> Iterator[str]:
+        rng = random.Random(zlib.crc32(prompt.encode("utf-8")) ^ self.seed)
+        n_tokens = min(max_tokens, rng.randint(*self.response_tokens))
+        start = rng.randrange(len(STUB_WORDS))
+
+        time.sleep(sample_latency(rng, self.first_token_latency))
+
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        next_at = time.monotonic()
+        for i in range(n_tokens):
+            # Pace against a schedule so sleep overshoot does not accumulate
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_at += interval
+            self.tokens_generated += 1
+            yield " " + STUB_WORDS[(start + i) % len(STUB_WORDS)]
+
+        self.generations += 1
+
+    def count_tokens(self, text: str) -> int:
+        # No tokenizer: whitespace-separated words stand in for tokens
+        return len(text.split())
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        stats.update({
+            "tokens_per_second": self.tokens_per_second,
+            "first_token_latency": self.first_token_latency,
+            "generations": self.generations,
+            "tokens_generated": self.tokens_generated
+        })
+        return stats
+
+
+def create_backend(name: str, model_path: str) -> LLMBackend:
+    """Backend named by Config.LLM_BACKEND (not loaded yet)"""
+    if name == "llama_cpp":
+        return LlamaCppBackend(model_path)
+    if name == "stub":
+        return StubBackend(**Config.STUB_BACKEND)
+    raise ValueError(f"Unknown LLM backend '{name}', expected 'llama_cpp' or 'stub'")
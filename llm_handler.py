@@ -1,29 +1,59 @@
-from llama_cpp import Llama
-import re
 from data_manager import data_manager
-from typing import List, Dict, Optional
+from fuzzy_index import query_words
+from intent_router import IntentRouter
+from llm_backends import create_backend
+import metrics
+from prefix_cache import template_prefix
+from prompt_builder import PromptBuilder
+from render_cache import RenderCache, menu_block, order_card, popular_list, quick_list, restaurant_card, suggestion_card
+from response_cache import ResponseCache
+from semantic_cache import SemanticCache
+from config import Config
+from typing import List, Dict, Iterator, Optional
+import logging
+import os
+import threading
 import time
 
+logger = logging.getLogger(__name__)
+
 class SwiggyBot:
     def __init__(self, model_path="./models/mistral-7b-instruct-v0.2.Q4_K_M.gguf"):
-        print("🚀 Loading Optimized Mistral model...")
+        # LLM backend from Config; the model is loaded later by start_loading()
+        self.backend = create_backend(Config.LLM_BACKEND, model_path)
+        
+        # Model lifecycle: not_loaded -> loading -> warming_up -> ready (or failed)
+        self.model_state = "not_loaded"
+        self.model_error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._loader = None
+        
+        # Generation settings shared by the serial and batched paths
+        self.generation_params = {
+            "max_tokens": 150,      # Reduced from 256 (faster)
+            "temperature": 0.7,
+            "top_p": 0.95,
+            "top_k": 40,
+            "repeat_penalty": 1.1,
+            "stop": ["User:", "\n\n"]
+        }
         
-        # Optimized model settings for SPEED
-        self.llm = Llama(
-            model_path=model_path,
-            n_ctx=2048,        # Reduced from 4096 (faster)
-            n_threads=8,       # Use all CPU cores
-            n_batch=512,       # Larger batch for speed
-            n_gpu_layers=0,    # Set to 35 if you have GPU
-            use_mlock=True,    # Keep in RAM (faster)
-            use_mmap=True,     # Memory mapped
-            verbose=False      # No debug logs
-        )
+        # Response cache for instant replies (bounded LRU with TTL)
+        self.response_cache = ResponseCache(**Config.RESPONSE_CACHE)
         
-        print("✅ Model loaded (Optimized for Speed)!")
+        # Near-duplicate tier behind it: paraphrases of a cached question skip the LLM
+        semantic = dict(Config.SEMANTIC_CACHE)
+        self.semantic_cache = SemanticCache(**semantic) if semantic.pop("enabled") else None
         
-        # Response cache for instant replies
-        self.response_cache = {}
+        # Prompts with as much recent history as the token budget allows
+        self.prompt_builder = PromptBuilder(Config.PROMPT_TEMPLATE, Config.CHAT_HISTORY["turn_template"],
+                                            self.backend.count_tokens,
+                                            max_prompt_tokens=Config.CHAT_HISTORY["max_prompt_tokens"],
+                                            max_turns=Config.CHAT_HISTORY["max_turns"])
+        
+        # Rendered catalog replies (order status, search results, menus)
+        self.render_cache = RenderCache(**Config.RENDER_CACHE)
         
         # Common patterns for instant responses
         self.quick_responses = {
@@ -34,64 +64,114 @@ class SwiggyBot:
             'thank you': "😊 Happy to help! Let me know if you need anything else.",
             'bye': "👋 Goodbye! Have a great day!",
         }
+        
+        # Compile the intent table (keywords come from the catalog) into one matcher
+        # and pre-render the fixed lists, and again whenever the catalog is reloaded
+        self.build_router()
+        self.prerender()
+        data_manager.on_catalog_reload(self.build_router)
+        data_manager.on_catalog_reload(self.prerender)
+    
+    def build_router(self):
+        self.router = IntentRouter.from_catalog(data_manager.iter_restaurants(), self.quick_responses)
+    
+    def prerender(self):
+        """Render the popular/quick-delivery/menu-prompt replies once per catalog version"""
+        popular = data_manager.get_popular_restaurants()
+        self.popular_text = popular_list(popular)
+        self.quick_text = quick_list(data_manager.get_quick_delivery_restaurants(limit=3))
+        names = "\n".join(f"• {rest['name']}" for rest in data_manager.list_restaurants(limit=6))
+        self.menu_prompt_text = f"Which restaurant's menu?\n{names}"
+        self.no_match_suggestions = ''.join(suggestion_card(rest) for rest in popular[:3])
+        self.render_cache.clear()
+    
+    def start_loading(self):
+        """Load and warm up the model on a background thread; returns immediately (no-op if preloaded)"""
+        if self._loader is None and self.model_state == "not_loaded":
+            self._loader = threading.Thread(target=self.load_model, name="model-loader", daemon=True)
+            self._loader.start()
+    
+    def load_model(self):
+        """Blocking load + warmup generation; rule-based answers work the whole time"""
+        start_time = time.time()
+        self.model_state = "loading"
+        logger.info("🚀 Loading Optimized Mistral model (%s backend)...", self.backend.name)
+        
+        try:
+            self.backend.load()
+            self.load_seconds = time.time() - start_time
+            logger.info("✅ Model loaded (Optimized for Speed) in %.1fs!", self.load_seconds)
+            
+            # Warmup: one short generation pages in the weights and fills the
+            # prefix cache so the first real user does not pay for it
+            self.model_state = "warming_up"
+            warmup_start = time.time()
+            prompt = Config.PROMPT_TEMPLATE.format(user_message="hi")
+            for _ in self._generate_stream(prompt, template_prefix(Config.PROMPT_TEMPLATE), max_tokens=4):
+                pass
+            self.warmup_seconds = time.time() - warmup_start
+            
+            self.model_state = "ready"
+            logger.info("✅ Model ready (warmup %.1fs, total %.1fs)", self.warmup_seconds, time.time() - start_time)
+        except Exception as e:
+            self.model_error = str(e)
+            self.model_state = "failed"
+            logger.exception("❌ Model failed to load: %s", e)
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.model_state == "ready"
+    
+    def model_status(self) -> Dict:
+        return {
+            "state": self.model_state,
+            "ready": self.is_ready,
+            "backend": self.backend.name,
+            "model": os.path.basename(self.backend.model_path),
+            "load_seconds": round(self.load_seconds, 2) if self.load_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 2) if self.warmup_seconds is not None else None,
+            "error": self.model_error
+        }
+    
+    def degraded_response(self) -> str:
+        """Answer for LLM-bound messages while the model is not ready"""
+        metrics.RESPONSES.inc(route="degraded")
+        key = "model_failed" if self.model_state == "failed" else "model_loading"
+        return Config.ERROR_MESSAGES[key] + "\n\n" + self.quick_responses['help']
     
     def check_order_status(self, order_id: str) -> str:
-        """INSTANT order status check"""
+        """INSTANT order status check (memoized per order and catalog version)"""
+        return self.render_cache.get_or_render(
+            "order", order_id, data_manager.catalog_version, lambda: self._render_order(order_id))
+    
+    def _render_order(self, order_id: str) -> str:
         order = data_manager.get_order_status(order_id)
-        
         if not order:
             return f"❌ Order {order_id} not found. Please check the ID.\n\n📝 Sample IDs: ORD100000, ORD100001, ORD100002"
-        
-        # Quick status templates
-        status_emoji = {
-            "preparing": "🍳",
-            "out_for_delivery": "🛵",
-            "delivered": "✅",
-            "cancelled": "❌"
-        }
-        
-        emoji = status_emoji.get(order['status'], '📦')
-        
-        response = f"{emoji} **Order {order['order_id']}**\n\n"
-        response += f"Restaurant: {order['restaurant']}\n"
-        response += f"Items: {', '.join(order['items'])}\n"
-        response += f"Total: ₹{order['total']}\n"
-        response += f"Status: **{order['status'].upper()}**\n"
-        
-        if order['status'] == 'out_for_delivery':
-            response += f"\nDelivery Partner: {order.get('delivery_partner', 'Assigned')}"
-            response += f"\n📞 {order.get('partner_phone', 'Updating...')}"
-        elif order['status'] == 'delivered':
-            response += f"\n✅ Delivered at {order.get('delivery_time', 'Recently')}"
-        elif order['status'] == 'preparing':
-            response += f"\n⏱️ Expected: {order.get('expected_delivery', '30-40 mins')}"
-        elif order['status'] == 'cancelled':
-            response += f"\n💰 Refund: {order.get('refund_status', 'Processing')}"
-        
-        return response
+        return order_card(order)
     
     def search_restaurants(self, query: str) -> str:
         """INSTANT restaurant search"""
+        return self.render_cache.get_or_render(
+            "search", query, data_manager.catalog_version, lambda: self._render_search(query))
+    
+    def _render_search(self, query: str) -> str:
         results = data_manager.search_restaurants(query)
         
         if not results:
-            popular = data_manager.get_popular_restaurants()
-            response = f"No exact match for '{query}'. Try these popular ones:\n\n"
-            for rest in popular[:3]:
-                response += f"🍴 **{rest['name']}**\n   {rest['cuisine']}\n   ⭐ {rest['rating']} | ⏱️ {rest['delivery_time']}\n\n"
-            return response
+            return f"No exact match for '{query}'. Try these popular ones:\n\n" + self.no_match_suggestions
         
-        response = f"Found {len(results)} restaurant(s):\n\n"
-        for rest in results[:5]:
-            response += f"🍴 **{rest['name']}**\n"
-            response += f"   📍 {rest['area']}\n"
-            response += f"   🍽️ {rest['cuisine']}\n"
-            response += f"   ⭐ {rest['rating']} | ⏱️ {rest['delivery_time']} | 💵 ₹{rest['delivery_fee']}\n\n"
-        
-        return response
+        version = data_manager.catalog_version
+        cards = [self.render_cache.get_or_render("card", rest['id'], version, lambda rest=rest: restaurant_card(rest))
+                 for rest in results[:5]]
+        return f"Found {len(results)} restaurant(s):\n\n" + ''.join(cards)
     
     def show_menu(self, restaurant_name: str) -> str:
         """INSTANT menu display"""
+        return self.render_cache.get_or_render(
+            "menu", restaurant_name, data_manager.catalog_version, lambda: self._render_menu(restaurant_name))
+    
+    def _render_menu(self, restaurant_name: str) -> str:
         restaurant = data_manager.get_restaurant_by_name(restaurant_name)
         
         if not restaurant:
@@ -102,123 +182,225 @@ class SwiggyBot:
         if not menu_items:
             return f"Menu not available for {restaurant['name']}."
         
-        response = f"📋 **{restaurant['name']} Menu**\n\n"
-        for item in menu_items:
-            veg = "🟢" if item['veg'] else "🔴"
-            response += f"{veg} **{item['name']}** - ₹{item['price']}\n"
-            response += f"   {item['description']} | ⭐ {item['rating']}\n\n"
+        return menu_block(restaurant, menu_items)
+    
+    def filtered_list(self, intent: str, filters: Dict[str, str]) -> str:
+        """Popular, quick-delivery or restaurant list for an area/city or open now (memoized per filter set)"""
+        return self.render_cache.get_or_render(
+            intent, tuple(sorted(filters.items())), data_manager.catalog_version,
+            lambda: self._render_filtered(intent, filters))
+    
+    def _render_filtered(self, intent: str, filters: Dict[str, str]) -> str:
+        area, city, open_now = filters.get("area"), filters.get("city"), "open_now" in filters
+        places = [place for place in (area, city) if place]
+        where = (f" in {', '.join(places)}" if places else "") + (" (open now)" if open_now else "")
+        
+        if intent == "popular":
+            results = data_manager.get_popular_restaurants(city=city, area=area, open_now=open_now)
+            label, text = "top-rated restaurants", popular_list(results, where)
+        elif intent == "quick_delivery":
+            results = data_manager.get_quick_delivery_restaurants(limit=3, city=city, area=area, open_now=open_now)
+            label, text = "quick-delivery restaurants", quick_list(results, where)
+        else:
+            results = data_manager.list_restaurants(limit=5, city=city, area=area, open_now=open_now)
+            label = "restaurants"
+            text = f"Found {len(results)} restaurant(s){where}:\n\n" + ''.join(restaurant_card(r) for r in results)
         
-        return response
+        if not results:
+            return f"No {label}{where} right now. Try these popular ones:\n\n" + self.no_match_suggestions
+        return text
     
     def process_intent(self, user_message: str) -> Optional[str]:
         """INSTANT intent-based responses"""
-        message_lower = user_message.lower().strip()
+        route = self.router.route(user_message)
+        if route is None:
+            # A short message may be a misspelt restaurant, cuisine or dish ("biriyani")
+            return self.fuzzy_response(user_message)
         
-        # 1. Check quick responses (INSTANT)
-        for key, response in self.quick_responses.items():
-            if message_lower == key or message_lower.startswith(key):
-                return response
+        intent, arg = route
         
-        # 2. Order tracking (INSTANT)
-        order_pattern = r'ORD\d{6}'
-        order_match = re.search(order_pattern, user_message.upper())
+        # 1. Quick responses (INSTANT)
+        if intent == "greeting":
+            return self.quick_responses[arg]
         
-        if order_match:
-            return self.check_order_status(order_match.group())
+        # 2. Order tracking (INSTANT)
+        if intent == "order_status":
+            return self.check_order_status(arg)
         
-        if any(word in message_lower for word in ['track', 'order', 'status', 'where']):
-            if 'ORD' in user_message.upper():
-                match = re.search(r'ORD\d+', user_message.upper())
-                if match:
-                    return self.check_order_status(match.group())
+        if intent == "order_tracking":
             return "Please provide order ID (e.g., ORD100000)\n\n📝 Test IDs:\n• ORD100000 (Delivered)\n• ORD100001 (Preparing)\n• ORD100002 (Out for Delivery)"
         
-        # 3. Restaurant search (INSTANT)
-        cuisines = ['pizza', 'burger', 'biryani', 'dosa', 'chinese', 'north indian', 'south indian', 'fast food']
-        for cuisine in cuisines:
-            if cuisine in message_lower:
-                return self.search_restaurants(cuisine)
-        
-        if any(word in message_lower for word in ['restaurant', 'food', 'eat', 'hungry', 'order food']):
-            return self.search_restaurants("restaurant")
-        
-        # 4. Menu (INSTANT)
-        if 'menu' in message_lower:
-            restaurants = ['domino', 'burger king', 'biryani', 'kfc', 'udupi', 'punjabi']
-            for rest_keyword in restaurants:
-                if rest_keyword in message_lower:
-                    return self.show_menu(rest_keyword)
-            return "Which restaurant's menu?\n• Domino's Pizza\n• Burger King\n• Biryani Blues\n• KFC\n• Udupi Garden\n• Punjabi Rasoi"
-        
-        # 5. Popular/Recommendations (INSTANT)
-        if any(word in message_lower for word in ['popular', 'best', 'recommend', 'suggest', 'top']):
-            popular = data_manager.get_popular_restaurants()
-            response = "🌟 **Top Rated Restaurants:**\n\n"
-            for rest in popular:
-                response += f"{rest['image']} **{rest['name']}** - ⭐ {rest['rating']}\n"
-                response += f"   {rest['cuisine']} | {rest['delivery_time']}\n\n"
-            return response
+        # 3. Menu (INSTANT)
+        if intent == "restaurant_menu":
+            return self.show_menu(arg)
+        
+        # 4. Restaurant search (INSTANT)
+        if intent == "cuisine":
+            return self.search_restaurants(arg)
+        
+        if intent == "menu":
+            match = data_manager.fuzzy_find_restaurant(user_message)
+            if match and match[0] >= Config.FUZZY_SEARCH["min_score"]:
+                return self.show_menu(match[1]['name'])
+            return self.menu_prompt_text
+        
+        # 5. Popular/Recommendations (INSTANT), narrowed by area/city/"open now" when mentioned
+        if intent == "popular":
+            filters = self.router.filters(user_message)
+            return self.filtered_list(intent, filters) if filters else self.popular_text
         
         # 6. Quick delivery (INSTANT)
-        if any(word in message_lower for word in ['quick', 'fast', 'urgent', 'asap']):
-            quick = data_manager.get_quick_delivery_restaurants()
-            response = "⚡ **Quick Delivery (Under 30 mins):**\n\n"
-            for rest in quick[:3]:
-                response += f"{rest['image']} {rest['name']} - {rest['delivery_time']}\n"
-            return response
+        if intent == "quick_delivery":
+            filters = self.router.filters(user_message)
+            return self.filtered_list(intent, filters) if filters else self.quick_text
         
         # 7. Refund/Payment (INSTANT)
-        if any(word in message_lower for word in ['refund', 'payment', 'money', 'paid', 'charge']):
+        if intent == "refund":
             return "💰 **Refund Help:**\n\nTo process refund:\n1. Provide order ID\n2. Reason for refund\n3. Refunds take 2-3 business days\n\nNeed help with specific order?"
         
         # 8. Complaint/Issue (INSTANT)
-        if any(word in message_lower for word in ['complaint', 'issue', 'problem', 'wrong', 'late', 'cold']):
+        if intent == "complaint":
             return "⚠️ **Report an Issue:**\n\nI'm here to help! Please:\n1. Share your order ID\n2. Describe the issue\n3. I'll connect you with support\n\nOr contact: 1800-1234-5678"
         
-        # No instant match found
+        # 9. Generic food/restaurant words (INSTANT)
+        if intent == "food":
+            filters = self.router.filters(user_message)
+            return self.filtered_list(intent, filters) if filters else self.search_restaurants("restaurant")
+        
         return None
     
-    def generate_response(self, user_message: str, chat_history: List[Dict] = []) -> str:
-        """Generate response - Try instant first, then LLM"""
+    def fuzzy_response(self, user_message: str) -> Optional[str]:
+        """Search results for a short unrouted message that closely matches the catalog, else None (LLM)"""
+        if not 0 < len(query_words(user_message)) <= Config.FUZZY_SEARCH["intent_max_words"]:
+            return None
+        matches = data_manager.fuzzy_search_restaurants(user_message, limit=1)
+        if not matches or matches[0][0] < Config.FUZZY_SEARCH["min_score"]:
+            return None
+        return self.search_restaurants(user_message)
+    
+    def fast_response(self, user_message: str, chat_history: List[Dict] = []) -> Optional[str]:
+        """Rule-based or cached answer; cheap enough to run on the event loop
+
+        Cached answers are standalone, so they are skipped once the session
+        has turns the LLM prompt would include ("is it spicy?" depends on them).
+        """
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Step 1: Try INSTANT response (rules-based)
         instant_response = self.process_intent(user_message)
+        routed = time.perf_counter()
+        metrics.STAGE_SECONDS.observe(routed - start_time, stage="intent")
         if instant_response:
-            print(f"⚡ Instant response ({time.time() - start_time:.2f}s)")
+            metrics.RESPONSES.inc(route="instant")
+            logger.debug("⚡ Instant response (%.4fs)", routed - start_time)
             return instant_response
         
+        if self.prompt_builder.has_history(user_message, chat_history):
+            return None
+        
         # Step 2: Check cache
-        cache_key = user_message.lower().strip()
-        if cache_key in self.response_cache:
-            print(f"💾 Cached response ({time.time() - start_time:.2f}s)")
-            return self.response_cache[cache_key]
-        
-        # Step 3: Use LLM (slower but smart)
-        print(f"🤖 Using LLM...")
-        
-        # Simplified prompt for speed
-        prompt = f"<s>[INST] You are Swiggy support. Be brief and helpful.\n\nUser: {user_message}\n[/INST]"
-        
-        # Generate with optimized settings
-        response = self.llm(
-            prompt,
-            max_tokens=150,      # Reduced from 256 (faster)
-            temperature=0.7,
-            top_p=0.95,
-            top_k=40,
-            repeat_penalty=1.1,
-            stop=["User:", "\n\n"],
-            echo=False
-        )
-        
-        result = response['choices'][0]['text'].strip()
-        
-        # Cache the response
-        self.response_cache[cache_key] = result
-        
-        elapsed = time.time() - start_time
-        print(f"✅ LLM response ({elapsed:.2f}s)")
-        
-        return result
\ No newline at end of file
+        cached = self.response_cache.get(user_message)
+        looked_up = time.perf_counter()
+        metrics.STAGE_SECONDS.observe(looked_up - routed, stage="cache")
+        if cached is not None:
+            metrics.RESPONSES.inc(route="cache")
+            logger.debug("💾 Cached response (%.4fs)", looked_up - start_time)
+            return cached
+        
+        # Step 3: Near-duplicate of a cached question
+        if self.semantic_cache is not None:
+            similar = self.semantic_cache.get(user_message)
+            matched = time.perf_counter()
+            metrics.STAGE_SECONDS.observe(matched - looked_up, stage="semantic_cache")
+            if similar is not None:
+                metrics.RESPONSES.inc(route="semantic_cache")
+                logger.debug("🧩 Similar cached response (%.4fs)", matched - start_time)
+                return similar
+        
+        return None
+    
+    def llm_response_stream(self, user_message: str, chat_history: List[Dict] = [],
+                            session_id: Optional[str] = None) -> Iterator[str]:
+        """Blocking LLM generation, yielding text as tokens arrive (run on the inference worker)"""
+        
+        # Model still loading (or failed): defined fallback instead of an error
+        if not self.is_ready:
+            yield self.degraded_response()
+            return
+        
+        start_time = time.perf_counter()
+        first_chunk_time = None
+        chunks = 0
+        
+        # Step 4: Use LLM (slower but smart)
+        metrics.RESPONSES.inc(route="llm")
+        
+        # Recent turns of the session, as many as fit the prompt token budget
+        prompt, turns = self.prompt_builder.build(user_message, chat_history)
+        
+        pieces = []
+        for text in self._generate_stream(prompt, template_prefix(Config.PROMPT_TEMPLATE), session=session_id):
+            chunks += 1
+            if first_chunk_time is None:
+                first_chunk_time = time.perf_counter()
+            if not pieces:
+                # Match the non-streaming .strip(): drop leading whitespace
+                text = text.lstrip()
+                if not text:
+                    continue
+            pieces.append(text)
+            yield text
+        
+        result = ''.join(pieces).strip()
+        
+        # Cache the response (only a standalone answer: one that used the history may not fit another chat)
+        if not turns:
+            self.response_cache.set(user_message, result)
+            if self.semantic_cache is not None:
+                self.semantic_cache.set(user_message, result)
+        
+        # Prefill = prompt evaluation up to the first token, decode = the rest
+        end_time = time.perf_counter()
+        first_chunk_time = first_chunk_time or end_time
+        decode = end_time - first_chunk_time
+        metrics.STAGE_SECONDS.observe(first_chunk_time - start_time, stage="prefill")
+        metrics.STAGE_SECONDS.observe(decode, stage="decode")
+        metrics.TOKENS.inc(chunks)
+        if chunks > 1 and decode > 0:
+            metrics.TOKENS_PER_SECOND.observe((chunks - 1) / decode)
+        
+        logger.debug("✅ LLM response (%.2fs, first token %.2fs, %d tokens)",
+                     end_time - start_time, first_chunk_time - start_time, chunks)
+    
+    def _generate_stream(self, prompt: str, prefix: Optional[str] = None, session: Optional[str] = None,
+                         **overrides) -> Iterator[str]:
+        """Text pieces from the configured backend, with per-call overrides of generation_params"""
+        return self.backend.stream(prompt, prefix, session=session, **dict(self.generation_params, **overrides))
+    
+    @property
+    def llm_concurrency(self) -> int:
+        """How many generations can usefully run at once (known before the model loads)"""
+        return self.backend.concurrency
+    
+    def llm_response(self, user_message: str, chat_history: List[Dict] = [],
+                     session_id: Optional[str] = None) -> str:
+        """Blocking LLM generation - run it on the inference worker thread"""
+        return ''.join(self.llm_response_stream(user_message, chat_history, session_id)).strip()
+    
+    def generate_response(self, user_message: str, chat_history: List[Dict] = [],
+                          session_id: Optional[str] = None) -> str:
+        """Generate response - Try instant first, then LLM"""
+        response = self.fast_response(user_message, chat_history)
+        if response is not None:
+            return response
+        return self.llm_response(user_message, chat_history, session_id)
+    
+    def generate_response_stream(self, user_message: str, chat_history: List[Dict] = [],
+                                 session_id: Optional[str] = None) -> Iterator[str]:
+        """Streaming variant: instant/cached answers come back as a single chunk"""
+        response = self.fast_response(user_message, chat_history)
+        if response is not None:
+            yield response
+            return
+        yield from self.llm_response_stream(user_message, chat_history, session_id)
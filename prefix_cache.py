@@ -0,0 +1,237 @@
+import ctypes
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def template_prefix(template: str, placeholder: str = "{user_message}") -> str:
+    """Fixed text in front of the first per-request field of a prompt template"""
+    return template.split(placeholder, 1)[0]
+
+
+def stable_prefix_tokens(llm, prefix: str) -> List[int]:
+    """Tokens of prefix that stay the same whatever text follows it
+
+    SentencePiece merges across the boundary ("User: " + "hi" ends in "▁hi",
+    not "▁" + "hi"), so the last token(s) of the prefix on its own may never
+    appear in a real prompt. Only the part shared with a probe continuation
+    is safe to cache.
+    """
+    tokens = llm.tokenize(prefix.encode("utf-8"), special=True)
+    probe = llm.tokenize((prefix + "x").encode("utf-8"), special=True)
+    n = 0
+    while n < min(len(tokens), len(probe)) and tokens[n] == probe[n]:
+        n += 1
+    return tokens[:n]
+
+
+class PrefixCache:
+    """Evaluated KV state of the shared prompt prefix for the serial llama-cpp path
+
+    The prefix is evaluated once and its state saved. Before each generation
+    the context is put back on that state unless it already starts with the
+    prefix, and Llama.generate's prefix match then evaluates only the user
+    part. The cache is keyed by a hash of the prefix text, so editing the
+    prompt template rebuilds it on the next request.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.key = None
+        self.tokens: List[int] = []
+        self.state = None  # llama_copy_state_data bytes after evaluating tokens
+
+        # Statistics
+        self.hits = 0
+        self.restores = 0
+        self.rebuilds = 0
+        self.tokens_saved = 0
+        self.build_seconds = 0.0
+
+    def prepare(self, prefix: str):
+        """Leave the context holding the evaluated prefix; call right before generating"""
+        key = hashlib.sha1(prefix.encode("utf-8")).hexdigest()
+        if key != self.key:
+            self._build(prefix, key)
+            return
+
+        n = len(self.tokens)
+        if self.llm.n_tokens < n or self.llm.input_ids[:n].tolist() != self.tokens:
+            # Something else (another prompt, a reset) replaced the prefix
+            load_context(self.llm, self.tokens, self.state)
+            self.restores += 1
+        self.hits += 1
+        self.tokens_saved += n
+
+    def _build(self, prefix: str, key: str):
+        start = time.perf_counter()
+        self.tokens = stable_prefix_tokens(self.llm, prefix)
+        self.llm.reset()
+        self.llm.eval(self.tokens)
+        _, self.state = save_context(self.llm)
+        self.build_seconds = time.perf_counter() - start
+        self.key = key
+        self.rebuilds += 1
+        logger.info("🧠 Prompt prefix cached (%d tokens, %.0fms)", len(self.tokens), self.build_seconds * 1000)
+
+    def stats(self) -> Dict:
+        return {
+            "prefix_tokens": len(self.tokens),
+            "hits": self.hits,
+            "restores": self.restores,
+            "rebuilds": self.rebuilds,
+            "tokens_saved": self.tokens_saved,
+            "prefill_ms": round(self.build_seconds * 1000, 1),
+            "state_bytes": self.state.nbytes if self.state is not None else 0
+        }
+
+
+def common_prefix_length(a: List[int], b: List[int]) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def save_context(llm) -> Tuple[List[int], "np.ndarray"]:
+    """(evaluated token ids, llama_copy_state_data bytes) of the context
+
+    Unlike Llama.save_state this leaves out Llama.scores, an n_ctx x n_vocab
+    float copy (~0.5 GB at n_ctx 4096 with a 32k vocab) that nothing needs:
+    Llama.generate always evaluates the last prompt token again. The state
+    data holds only the used KV cells, so its size follows the token count.
+    """
+    import numpy as np
+    import llama_cpp
+
+    # Sized for a full context; np.empty leaves the unwritten pages untouched
+    scratch = np.empty(llama_cpp.llama_get_state_size(llm.ctx), dtype=np.uint8)
+    n_bytes = llama_cpp.llama_copy_state_data(llm.ctx, scratch.ctypes.data_as(ctypes.POINTER(ctypes.c_uint8)))
+    if n_bytes > scratch.nbytes:
+        raise RuntimeError("Failed to copy llama state data")
+    return llm.input_ids[:llm.n_tokens].tolist(), scratch[:n_bytes].copy()
+
+
+def load_context(llm, tokens: List[int], data: "np.ndarray"):
+    """Put the context back on what save_context returned"""
+    import llama_cpp
+
+    if llama_cpp.llama_set_state_data(llm.ctx, data.ctypes.data_as(ctypes.POINTER(ctypes.c_uint8))) != data.nbytes:
+        raise RuntimeError("Failed to set llama state data")
+    llm.input_ids[:len(tokens)] = tokens
+    llm.n_tokens = len(tokens)
+
+
+def state_bytes(tokens: List[int], data: "np.ndarray") -> int:
+    """Memory held by a saved context: state data plus its token ids"""
+    return data.nbytes + len(tokens) * 8
+
+
+class SessionKVCache:
+    """LRU of llama-cpp context states per chat session, for the serial path
+
+    The state left after a session's generation (its prompt and answer
+    evaluated) is saved. A follow-up prompt starts with that same text (see
+    PromptBuilder), so restoring the state before generating leaves
+    Llama.generate only the new turn to prefill. A state is restored only
+    when it shares more tokens with the prompt than the context already
+    does. Sessions and total bytes are both capped; the least recently used
+    session goes first.
+    """
+
+    def __init__(self, llm, max_sessions: int = 16, max_bytes: int = 1024 * 1024 * 1024):
+        self.llm = llm
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+
+        # session_id -> (evaluated tokens, state data, bytes)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.restores = 0
+        self.evictions = 0
+        self.skipped = 0
+        self.tokens_saved = 0
+
+    def restore(self, session_id: str, prompt: str, at_least: int = 0) -> int:
+        """Put the context on the session's saved state if that helps; returns the prompt tokens reused (0 on a miss)
+
+        at_least: tokens another cache (the prompt prefix) would reuse anyway.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+        if entry is None:
+            self.misses += 1
+            return 0
+
+        saved_tokens, data, _ = entry
+        tokens = self.llm.tokenize(prompt.encode("utf-8"), special=True)
+        shared = common_prefix_length(saved_tokens, tokens)
+        current = common_prefix_length(self.llm.input_ids[:self.llm.n_tokens].tolist(), tokens)
+        if max(shared, current) <= at_least:
+            self.misses += 1
+            return 0
+
+        if shared > current:
+            load_context(self.llm, saved_tokens, data)
+            self.restores += 1
+        self.hits += 1
+        reused = max(shared, current)
+        self.tokens_saved += reused
+        return reused
+
+    def save(self, session_id: str):
+        """Keep the context's current state for the session's next turn; call right after generating"""
+        tokens, data = save_context(self.llm)
+        size = state_bytes(tokens, data)
+
+        with self._lock:
+            self._drop(session_id)
+            if size > self.max_bytes:
+                self.skipped += 1
+                return
+            self._entries[session_id] = (tokens, data, size)
+            self._bytes += size
+            while len(self._entries) > self.max_sessions or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, session_id: str):
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self._entries),
+                "max_sessions": self.max_sessions,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "restores": self.restores,
+                "evictions": self.evictions,
+                "skipped": self.skipped,
+                "tokens_saved": self.tokens_saved,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
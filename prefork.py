@@ -0,0 +1,81 @@
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict, Optional
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+
+def serve(app, host: str, port: int, workers: int, after_fork: Optional[Callable[[], None]] = None,
+          log_level: str = "info"):
+    """Pre-fork server: bind once, fork workers that accept on the shared socket, restart any that die
+
+    Everything the parent loaded before calling this (catalog indexes, the
+    mmap'd model weights) is shared copy-on-write by the workers instead of
+    being loaded once per process as with uvicorn's own --workers, which
+    spawns fresh interpreters. Threads do not survive fork, so after_fork
+    runs first thing in each worker to start them again.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children: Dict[int, int] = {}  # pid -> worker index
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            # Worker: uvicorn installs its own graceful-shutdown handlers
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 0
+            try:
+                if after_fork is not None:
+                    after_fork()
+                uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+            except BaseException:
+                logger.exception("❌ Worker %d crashed", index)
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = index
+        logger.info("👷 Worker %d started (pid %d)", index, pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    logger.info("⚡ Serving on http://%s:%d with %d workers", host, port, workers)
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        logger.warning("⚠️ Worker %d (pid %d) exited with %d, restarting", index, pid,
+                       os.waitstatus_to_exitcode(status))
+        time.sleep(1.0)  # No tight loop if workers crash on startup
+        spawn(index)
+
+    sock.close()
+    logger.info("👋 All workers stopped")
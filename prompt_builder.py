@@ -0,0 +1,96 @@
+from typing import Callable, Dict, List, Tuple
+
+
+def history_turns(chat_history: List[Dict], user_message: str) -> List[Tuple[str, str]]:
+    """(user, assistant) pairs of a session's history, oldest first
+
+    The session store already holds the message being answered as its last
+    entry; it is dropped here, as is any user message left without a reply.
+    """
+    messages = list(chat_history)
+    if messages and messages[-1]['role'] == 'user' and messages[-1]['content'] == user_message:
+        messages.pop()
+    turns = []
+    for previous, message in zip(messages, messages[1:]):
+        if previous['role'] == 'user' and message['role'] == 'assistant':
+            turns.append((previous['content'], message['content']))
+    return turns
+
+
+class PromptBuilder:
+    """PROMPT_TEMPLATE with the most recent chat turns that fit in a token budget
+
+    Turns go between the template's fixed prefix and the new question, each
+    rendered with turn_template, so the prompt of one turn plus its answer
+    is the start of the next turn's prompt (and its KV state can be reused).
+    Tokens are counted on the whole prompt with the model tokenizer, so the
+    budget is exact; the oldest turns are dropped first, and a question that
+    does not fit on its own is cut short.
+    """
+
+    def __init__(self, template: str, turn_template: str, count_tokens: Callable[[str], int],
+                 max_prompt_tokens: int = 1536, max_turns: int = 6):
+        self.prefix, self.suffix = template.split("{user_message}", 1)
+        self.turn_template = turn_template
+        self.count_tokens = count_tokens
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_turns = max_turns
+
+        # Statistics
+        self.prompts = 0
+        self.turns_included = 0
+        self.turns_dropped = 0
+        self.truncated = 0
+
+    def render(self, turns: List[Tuple[str, str]], user_message: str) -> str:
+        history = ''.join(self.turn_template.format(user_message=user, assistant_message=assistant)
+                          for user, assistant in turns)
+        return self.prefix + history + user_message + self.suffix
+
+    def has_history(self, user_message: str, chat_history: List[Dict]) -> bool:
+        """Whether build() may put history turns in the prompt (without counting tokens)"""
+        return self.max_turns > 0 and bool(history_turns(chat_history, user_message))
+
+    def build(self, user_message: str, chat_history: List[Dict]) -> Tuple[str, int]:
+        """(prompt, number of history turns in it)"""
+        turns = history_turns(chat_history, user_message)[-self.max_turns:] if self.max_turns > 0 else []
+        if self.count_tokens(self.render([], user_message)) > self.max_prompt_tokens:
+            self.prompts += 1
+            self.turns_dropped += len(turns)
+            self.truncated += 1
+            return self.render([], self.truncate(user_message)), 0
+
+        # Token counts only grow with more turns: binary search for the most that fit
+        low, high = 0, len(turns)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count_tokens(self.render(turns[-mid:], user_message)) <= self.max_prompt_tokens:
+                low = mid
+            else:
+                high = mid - 1
+
+        self.prompts += 1
+        self.turns_included += low
+        self.turns_dropped += len(turns) - low
+        return self.render(turns[len(turns) - low:], user_message), low
+
+    def truncate(self, user_message: str) -> str:
+        """Longest start of user_message whose prompt (without history) fits the budget"""
+        low, high = 0, len(user_message)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count_tokens(self.render([], user_message[:mid])) <= self.max_prompt_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        return user_message[:low]
+
+    def stats(self) -> Dict:
+        return {
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "max_turns": self.max_turns,
+            "prompts": self.prompts,
+            "turns_included": self.turns_included,
+            "turns_dropped": self.turns_dropped,
+            "questions_truncated": self.truncated
+        }
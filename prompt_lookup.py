@@ -0,0 +1,190 @@
+import codecs
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import llama_cpp
+
+from batch_scheduler import sample_token
+from prefix_cache import common_prefix_length
+
+
+class NgramIndex:
+    """Where each n-gram (1..max_ngram tokens) of a growing token list first occurred, for draft lookup"""
+
+    def __init__(self, max_ngram: int = 3):
+        self.max_ngram = max_ngram
+        self.tokens: List[int] = []
+        self._follower: Dict[tuple, int] = {}  # n-gram -> position of the token after its first occurrence
+
+    def extend(self, tokens: Iterable[int]):
+        for token in tokens:
+            # The n-grams ending at the previous token now have a follower
+            end = len(self.tokens)
+            for n in range(1, min(self.max_ngram, end) + 1):
+                self._follower.setdefault(tuple(self.tokens[end - n:end]), end)
+            self.tokens.append(token)
+
+    def draft(self, num_tokens: int) -> List[int]:
+        """Tokens that followed an earlier occurrence of the longest trailing n-gram (empty if none)"""
+        if num_tokens <= 0:
+            return []
+        for n in range(min(self.max_ngram, len(self.tokens)), 0, -1):
+            position = self._follower.get(tuple(self.tokens[-n:]))
+            if position is not None:
+                return self.tokens[position:position + num_tokens]
+        return []
+
+
+class PromptLookupDecoder:
+    """Prompt-lookup speculative decoding for the serial llama-cpp path
+
+    Answers often copy text from their prompt: order ids, restaurant names,
+    template wording. After each sampled token the longest trailing n-gram
+    is looked up in the prompt and answer so far, and the tokens that
+    followed it become a draft. The sampled token and the draft are decoded
+    in one batch; the model's own sample at each position is taken while it
+    agrees with the draft (plus the first one that does not), and the KV
+    cells of the rejected rest are dropped. Every token is sampled from the
+    logits plain decoding would have produced, so greedy output is the same
+    token for token and sampled output has the same distribution; a step
+    just yields up to num_pred_tokens + 1 tokens instead of one.
+
+    Llama.input_ids and n_tokens are kept in step with the context, so the
+    prompt prefix and per-session caches work as they do with llm(...).
+    """
+
+    def __init__(self, llm, num_pred_tokens: int = 10, max_ngram_size: int = 3, seed: Optional[int] = None):
+        self.llm = llm
+        self.ctx = llm.ctx
+        self.n_vocab = llm.n_vocab()
+        self.n_ctx = llm.n_ctx()
+        self.eos = llm.token_eos()
+        self.n_batch = llm.n_batch
+        self.num_pred_tokens = min(num_pred_tokens, self.n_batch - 1)
+        self.max_ngram_size = max_ngram_size
+        self._rng = np.random.default_rng(seed)
+        self._batch = llama_cpp.llama_batch_init(self.n_batch, 0, 1)
+
+        # Statistics
+        self.generations = 0
+        self.steps = 0
+        self.tokens_generated = 0
+        self.drafted = 0
+        self.accepted = 0
+
+    def _decode(self, tokens: List[int], n_past: int, all_logits: bool):
+        batch = self._batch
+        for i, token in enumerate(tokens):
+            batch.token[i] = token
+            batch.pos[i] = n_past + i
+            batch.n_seq_id[i] = 1
+            batch.seq_id[i][0] = 0
+            batch.logits[i] = all_logits or i == len(tokens) - 1
+        batch.n_tokens = len(tokens)
+
+        code = llama_cpp.llama_decode(self.ctx, batch)
+        if code != 0:
+            raise RuntimeError(f"llama_decode returned {code}")
+        self.llm.input_ids[n_past:n_past + len(tokens)] = tokens
+        self.llm.n_tokens = n_past + len(tokens)
+
+    def _logits(self, index: int) -> np.ndarray:
+        return np.ctypeslib.as_array(llama_cpp.llama_get_logits_ith(self.ctx, index), shape=(self.n_vocab,)).copy()
+
+    def _truncate(self, n_past: int):
+        llama_cpp.llama_kv_cache_seq_rm(self.ctx, -1, n_past, -1)
+        self.llm.n_tokens = n_past
+
+    def stream(self, prompt: str, max_tokens: int = 150, temperature: float = 0.7, top_p: float = 0.95,
+               top_k: int = 40, min_p: float = 0.05, repeat_penalty: float = 1.1,
+               stop: Optional[List[str]] = None) -> Iterator[str]:
+        """Yield text pieces for prompt, with the same parameters as llm(...)"""
+        params = dict(temperature=temperature, top_p=top_p, top_k=top_k, min_p=min_p, repeat_penalty=repeat_penalty)
+        stop = stop or []
+        tokens = self.llm.tokenize(prompt.encode("utf-8"), special=True)
+        if len(tokens) + max_tokens > self.n_ctx:
+            raise ValueError(f"Requested tokens ({len(tokens) + max_tokens}) exceed context window of {self.n_ctx}")
+
+        # Like Llama.generate: keep what the context already holds of the prompt
+        # (at least the last token is evaluated again, for its logits)
+        n_past = common_prefix_length(self.llm.input_ids[:self.llm.n_tokens].tolist(), tokens[:-1])
+        self._truncate(n_past)
+        for offset in range(n_past, len(tokens), self.n_batch):
+            chunk = tokens[offset:offset + self.n_batch]
+            self._decode(chunk, offset, all_logits=False)
+        n_past = len(tokens)
+        rows = [self._logits(len(chunk) - 1)]
+        draft: List[int] = []
+
+        recent = deque(tokens, maxlen=64)
+        lookup = NgramIndex(self.max_ngram_size)
+        lookup.extend(tokens)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        holdback = max((len(s) - 1 for s in stop), default=0)
+        text, emitted, generated = "", 0, 0
+        self.generations += 1
+
+        while True:
+            # Sample at each decoded position while the model agrees with the draft
+            pending = None
+            for i, logits in enumerate(rows):
+                token = sample_token(logits, params, recent, self._rng)
+                if token == self.eos:
+                    break
+
+                generated += 1
+                self.tokens_generated += 1
+                recent.append(token)
+                lookup.extend([token])
+                text += decoder.decode(self.llm.detokenize([token]))
+
+                hits = [h for h in (text.find(s, max(0, emitted - len(s))) for s in stop) if h >= 0]
+                if hits:
+                    text = text[:min(hits)]
+                    break
+                if generated >= max_tokens:
+                    break
+
+                safe = len(text) - holdback
+                if safe > emitted:
+                    yield text[emitted:safe]
+                    emitted = safe
+
+                if i < len(draft) and token == draft[i]:
+                    n_past += 1  # Already in the context
+                    self.accepted += 1
+                    continue
+                pending = token
+                break
+
+            # Drop the KV cells of rejected draft tokens
+            self._truncate(n_past)
+            if pending is None:
+                break
+
+            draft = lookup.draft(min(self.num_pred_tokens, max_tokens - generated - 1, self.n_ctx - n_past - 1))
+            self._decode([pending] + draft, n_past, all_logits=True)
+            n_past += 1
+            self.steps += 1
+            self.drafted += len(draft)
+            rows = [self._logits(i) for i in range(len(draft) + 1)]
+
+        if len(text) > emitted:
+            yield text[emitted:]
+
+    def close(self):
+        llama_cpp.llama_batch_free(self._batch)
+
+    def stats(self) -> Dict:
+        return {
+            "num_pred_tokens": self.num_pred_tokens,
+            "max_ngram_size": self.max_ngram_size,
+            "generations": self.generations,
+            "decode_steps": self.steps,
+            "tokens_generated": self.tokens_generated,
+            "drafted": self.drafted,
+            "accepted": self.accepted,
+            "acceptance_rate": round(self.accepted / self.drafted, 4) if self.drafted else 0.0,
+            "tokens_per_step": round(self.tokens_generated / self.steps, 2) if self.steps else 0.0
+        }
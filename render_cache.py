@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List
+
+STATUS_EMOJI = {
+    "preparing": "🍳",
+    "out_for_delivery": "🛵",
+    "delivered": "✅",
+    "cancelled": "❌"
+}
+
+
+def order_card(order: Dict) -> str:
+    emoji = STATUS_EMOJI.get(order['status'], '📦')
+    lines = [
+        f"{emoji} **Order {order['order_id']}**\n",
+        f"Restaurant: {order['restaurant']}",
+        f"Items: {', '.join(order['items'])}",
+        f"Total: ₹{order['total']}",
+        f"Status: **{order['status'].upper()}**",
+    ]
+
+    if order['status'] == 'out_for_delivery':
+        lines.append(f"\nDelivery Partner: {order.get('delivery_partner', 'Assigned')}")
+        lines.append(f"📞 {order.get('partner_phone', 'Updating...')}")
+    elif order['status'] == 'delivered':
+        lines.append(f"\n✅ Delivered at {order.get('delivery_time', 'Recently')}")
+    elif order['status'] == 'preparing':
+        lines.append(f"\n⏱️ Expected: {order.get('expected_delivery', '30-40 mins')}")
+    elif order['status'] == 'cancelled':
+        lines.append(f"\n💰 Refund: {order.get('refund_status', 'Processing')}")
+    else:
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def restaurant_card(rest: Dict) -> str:
+    return (f"🍴 **{rest['name']}**\n"
+            f"   📍 {rest['area']}\n"
+            f"   🍽️ {rest['cuisine']}\n"
+            f"   ⭐ {rest['rating']} | ⏱️ {rest['delivery_time']} | 💵 ₹{rest['delivery_fee']}\n\n")
+
+
+def suggestion_card(rest: Dict) -> str:
+    return f"🍴 **{rest['name']}**\n   {rest['cuisine']}\n   ⭐ {rest['rating']} | ⏱️ {rest['delivery_time']}\n\n"
+
+
+def menu_block(restaurant: Dict, items: List[Dict]) -> str:
+    parts = [f"📋 **{restaurant['name']} Menu**\n\n"]
+    for item in items:
+        veg = "🟢" if item['veg'] else "🔴"
+        parts.append(f"{veg} **{item['name']}** - ₹{item['price']}\n"
+                     f"   {item['description']} | ⭐ {item['rating']}\n\n")
+    return ''.join(parts)
+
+
+def popular_list(restaurants: List[Dict], where: str = "") -> str:
+    parts = [f"🌟 **Top Rated Restaurants{where}:**\n\n"]
+    for rest in restaurants:
+        parts.append(f"{rest['image']} **{rest['name']}** - ⭐ {rest['rating']}\n"
+                     f"   {rest['cuisine']} | {rest['delivery_time']}\n\n")
+    return ''.join(parts)
+
+
+def quick_list(restaurants: List[Dict], where: str = "") -> str:
+    parts = [f"⚡ **Quick Delivery (Under 30 mins){where}:**\n\n"]
+    for rest in restaurants:
+        parts.append(f"{rest['image']} {rest['name']} - {rest['delivery_time']}\n")
+    return ''.join(parts)
+
+
+class RenderCache:
+    """Thread-safe LRU of rendered replies, keyed by (kind, key, catalog version)
+
+    The version stamp changes on every catalog swap, so an entry rendered
+    from an old record is never served for the new one; the reload also
+    clears the cache so stale entries do not sit in the LRU.
+    """
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_render(self, kind: str, key: Hashable, version: int, render: Callable[[], str]) -> str:
+        cache_key = (kind, key, version)
+        with self._lock:
+            value = self._entries.get(cache_key)
+            if value is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        # Render outside the lock: it may hit the catalog (SQLite engine)
+        value = render()
+        with self._lock:
+            self._entries[cache_key] = value
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,102 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_key(text: str) -> str:
+    """Cache key for a user message: NFKC, casefold, punctuation dropped, whitespace collapsed"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = ''.join(' ' if unicodedata.category(ch).startswith('P') else ch for ch in text)
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+class ResponseCache:
+    """Thread-safe LRU response cache bounded by entries and bytes, with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 2 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (value, size, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, message: str) -> Optional[str]:
+        key = normalize_key(message)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, message: str, value: str, ttl_seconds: Optional[float] = None):
+        key = normalize_key(message)
+        size = len(key.encode('utf-8')) + len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return  # Would evict everything else; not worth caching
+
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,174 @@
+import hashlib
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from response_cache import normalize_key
+
+# Dropped before fingerprinting, so "can I cancel my order" ~ "how do i cancel order"
+STOP_WORDS = frozenset(
+    "a an the i im me my we our you your is are was be been am to of in on at for and or it its this that "
+    "can could would will do does did how what please pls plz hey hi hello there just".split())
+
+# Must match exactly, however similar the rest is: "not delivered" is not "delivered".
+# normalize_key turns "don't" into "don t", hence the lone "t".
+NEGATIONS = frozenset(
+    "not no never nothing none nor without t dont doesnt didnt cant cannot couldnt wont wouldnt "
+    "isnt arent wasnt werent havent hasnt hadnt shouldnt".split())
+
+
+def fingerprint(message: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """(features, guards): content words plus their character trigrams, and the numbers and negations"""
+    words = [w for w in normalize_key(message).split() if w not in STOP_WORDS]
+    features = set(words)
+    for word in words:
+        padded = f"#{word}#"
+        features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    guards = frozenset(w for w in words if w in NEGATIONS or any(ch.isdigit() for ch in w))
+    return frozenset(features), guards
+
+
+class SemanticCache:
+    """Near-duplicate answer cache: MinHash signatures bucketed by LSH bands
+
+    A message is reduced to its content words and their trigrams; messages
+    sharing any band of their num_perm MinHash signature become candidates,
+    and a candidate is a hit only if the exact Jaccard similarity of the two
+    feature sets reaches threshold and their numbers and negations match. Lookups
+    are bounded: messages over max_features are skipped, and each bucket
+    keeps at most max_bucket entries, so at most bands * max_bucket
+    candidates are compared.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 32, bands: int = 8, max_entries: int = 1000,
+                 max_bucket: int = 16, max_features: int = 96, ttl_seconds: Optional[float] = 3600):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.max_bucket = max_bucket
+        self.max_features = max_features
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (features, guards, band_keys, value, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._buckets: Dict[tuple, List[str]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evictions = 0
+
+    def _band_keys(self, features: FrozenSet[str]) -> List[tuple]:
+        # One SHAKE-128 digest per feature gives its num_perm 32-bit hash values; the minima run in C
+        digest_size = 4 * self.num_perm
+        signature = list(map(min, zip(*[array('I', hashlib.shake_128(f.encode('utf-8')).digest(digest_size))
+                                         for f in features])))
+        return [(band,) + tuple(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def _fingerprint(self, message: str):
+        features, guards = fingerprint(message)
+        if not features or len(features) > self.max_features:
+            return None
+        return features, guards
+
+    def get(self, message: str) -> Optional[str]:
+        fp = self._fingerprint(message)
+        if fp is None:
+            with self._lock:
+                self.skipped += 1
+            return None
+        features, guards = fp
+        band_keys = self._band_keys(features)
+
+        now = time.monotonic()
+        with self._lock:
+            best_key, best_similarity = None, self.threshold
+            seen, expired = set(), []
+            for band_key in band_keys:
+                for key in self._buckets.get(band_key, ()):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    other, other_guards, _, _, expires_at = self._entries[key]
+                    if expires_at is not None and now >= expires_at:
+                        expired.append(key)
+                        continue
+                    if other_guards != guards:
+                        continue
+                    similarity = len(features & other) / len(features | other)
+                    if similarity >= best_similarity:
+                        best_key, best_similarity = key, similarity
+
+            for key in expired:
+                self._remove(key)
+
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key][3]
+
+    def set(self, message: str, value: str):
+        fp = self._fingerprint(message)
+        if fp is None:
+            return
+        features, guards = fp
+        band_keys = self._band_keys(features)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        key = normalize_key(message)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (features, guards, band_keys, value, expires_at)
+            for band_key in band_keys:
+                bucket = self._buckets.setdefault(band_key, [])
+                bucket.append(key)
+                if len(bucket) > self.max_bucket:
+                    del bucket[0]  # Still reachable through its other bands until evicted
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, band_keys, _, _ = self._entries.pop(key)
+        for band_key in band_keys:
+            bucket = self._buckets.get(band_key)
+            if bucket and key in bucket:
+                bucket.remove(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "num_perm": self.num_perm,
+                "bands": self.bands,
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "evictions": self.evictions,
+                "llm_calls_avoided": self.hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
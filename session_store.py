@@ -0,0 +1,147 @@
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List
+
+
+class Message:
+    """One chat turn; slots and an epoch-float timestamp instead of a dict with an ISO string"""
+
+    __slots__ = ("role", "content", "timestamp")
+
+    def __init__(self, role: str, content: str, timestamp: float):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+
+    def as_dict(self) -> Dict:
+        return {"role": self.role, "content": self.content, "timestamp": self.timestamp}
+
+
+class _Session:
+    __slots__ = ("messages", "last_active", "bytes")
+
+    def __init__(self, history_length: int, now: float):
+        self.messages: deque = deque(maxlen=history_length)
+        self.last_active = now
+        self.bytes = 0
+
+
+# Approximate footprint used for the memory cap: the record itself, its
+# timestamp float and the content string (role strings are shared literals)
+MESSAGE_OVERHEAD = sys.getsizeof(Message("user", "", 0.0)) + sys.getsizeof(0.0)
+SESSION_OVERHEAD = sys.getsizeof(_Session(1, 0.0)) + sys.getsizeof(deque(maxlen=1)) + 100  # + dict slot and key
+
+
+def message_size(content: str) -> int:
+    return MESSAGE_OVERHEAD + sys.getsizeof(content)
+
+
+class SessionStore:
+    """Per-session chat history with idle expiry and a global memory cap
+
+    Sessions sit in an OrderedDict in least-recently-active order, so both
+    expiry and the memory cap only ever look at the front: idle sessions are
+    dropped lazily on each write (O(number expired)), and when the estimated
+    bytes exceed max_bytes the least recently active sessions go first.
+    Each session keeps its last history_length messages in a ring buffer.
+    """
+
+    def __init__(self, timeout_seconds: float = 3600, history_length: int = 20,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.timeout_seconds = timeout_seconds
+        self.history_length = history_length
+        self.max_bytes = max_bytes
+
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+        self._messages = 0
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.expired = 0
+        self.evicted = 0
+
+    def add(self, session_id: str, role: str, content: str):
+        now = time.time()
+        size = message_size(content)
+
+        with self._lock:
+            self._expire(now)
+
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session(self.history_length, now)
+                session.bytes = SESSION_OVERHEAD
+                self._bytes += session.bytes
+            else:
+                session.last_active = now
+                self._sessions.move_to_end(session_id)
+
+            if len(session.messages) == session.messages.maxlen:
+                dropped = message_size(session.messages[0].content)
+                session.bytes -= dropped
+                self._bytes -= dropped
+                self._messages -= 1
+            session.messages.append(Message(role, content, now))
+            session.bytes += size
+            self._bytes += size
+            self._messages += 1
+
+            # Global cap: drop least recently active sessions (never the one just written)
+            while self._bytes > self.max_bytes and len(self._sessions) > 1:
+                self._drop(next(iter(self._sessions)))
+                self.evicted += 1
+
+    def history(self, session_id: str) -> List[Dict]:
+        """Messages of a session, oldest first (empty once it has been idle past the timeout)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            if time.time() - session.last_active > self.timeout_seconds:
+                self._drop(session_id)
+                self.expired += 1
+                return []
+            return [m.as_dict() for m in session.messages]
+
+    def sweep(self) -> int:
+        """Expire idle sessions now instead of waiting for the next write"""
+        with self._lock:
+            before = self.expired
+            self._expire(time.time())
+            return self.expired - before
+
+    def _expire(self, now: float):
+        cutoff = now - self.timeout_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_active >= cutoff:
+                break
+            self._drop(session_id)
+            self.expired += 1
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.bytes
+        self._messages -= len(session.messages)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self._sessions),
+            "messages": self._messages,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "timeout_seconds": self.timeout_seconds,
+            "history_length": self.history_length,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
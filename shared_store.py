@@ -0,0 +1,287 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from conversation_log import ConversationLog
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    last_active REAL NOT NULL,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions (last_active);
+CREATE TABLE IF NOT EXISTS session_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_messages_session ON session_messages (session_id, id);
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT,
+    user_message TEXT,
+    bot_response TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS conversations_session ON conversations (session_id, id);
+"""
+
+CONVERSATION_FIELDS = ("session_id", "user_message", "bot_response", "timestamp")
+
+
+def connect(path: str, busy_timeout: float = 5.0, synchronous: str = "NORMAL") -> sqlite3.Connection:
+    """Connection in WAL mode: readers never block the writer, and several processes can share the file"""
+    conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    return conn
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection):
+    """Write transaction that takes the lock up front (no read-to-write upgrade that could fail with SQLITE_BUSY)"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+class ThreadConnections(threading.local):
+    """One connection per thread, reopened in a forked child (connections must not cross a fork)"""
+
+    def __init__(self, path: str, busy_timeout: float):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.pid = None
+        self.conn = None
+
+    def get(self) -> sqlite3.Connection:
+        if self.pid != os.getpid():
+            self.conn = connect(self.path, self.busy_timeout)
+            self.pid = os.getpid()
+        return self.conn
+
+
+def ensure_schema(path: str, busy_timeout: float = 5.0):
+    conn = connect(path, busy_timeout)
+    try:
+        conn.executescript(SCHEMA)
+    finally:
+        conn.close()
+
+
+class SharedSessionStore:
+    """SessionStore backed by SQLite, so every worker process sees the same sessions
+
+    Same interface and limits as SessionStore: the last history_length
+    messages per session, expiry after timeout_seconds idle and a cap on the
+    stored message bytes that drops the least recently active sessions.
+    Writes trim the session in the same transaction; expiry and the cap run
+    at most every sweep_interval seconds per process (both walk the
+    last_active index from the oldest end).
+    """
+
+    def __init__(self, path: str, timeout_seconds: float = 3600, history_length: int = 20,
+                 max_bytes: int = 64 * 1024 * 1024, busy_timeout: float = 5.0, sweep_interval: float = 1.0):
+        self.path = path
+        self.timeout_seconds = timeout_seconds
+        self.history_length = history_length
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+
+        ensure_schema(path, busy_timeout)
+        self._connections = ThreadConnections(path, busy_timeout)
+        self._last_sweep = 0.0
+
+        # Statistics (this process)
+        self.expired = 0
+        self.evicted = 0
+
+    def add(self, session_id: str, role: str, content: str):
+        now = time.time()
+        with transaction(self._connections.get()) as conn:
+            conn.execute(
+                "INSERT INTO session_messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                (session_id, role, content, now))
+            conn.execute(
+                "DELETE FROM session_messages WHERE session_id = ? AND id NOT IN "
+                "(SELECT id FROM session_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, session_id, self.history_length))
+            conn.execute(
+                "INSERT INTO sessions (session_id, last_active, bytes) VALUES (?, ?, "
+                "(SELECT SUM(length(CAST(content AS BLOB))) FROM session_messages WHERE session_id = ?)) "
+                "ON CONFLICT (session_id) DO UPDATE SET last_active = excluded.last_active, bytes = excluded.bytes",
+                (session_id, now, session_id))
+
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            self._maintain(now, keep=session_id)
+
+    def history(self, session_id: str) -> List[Dict]:
+        """Messages of a session, oldest first (empty once it has been idle past the timeout)"""
+        conn = self._connections.get()
+        row = conn.execute("SELECT last_active FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return []
+        if time.time() - row[0] > self.timeout_seconds:
+            with transaction(conn):
+                self.expired += self._delete(conn, [session_id])
+            return []
+        rows = conn.execute(
+            "SELECT role, content, timestamp FROM session_messages WHERE session_id = ? ORDER BY id",
+            (session_id,)).fetchall()
+        return [{"role": role, "content": content, "timestamp": ts} for role, content, ts in rows]
+
+    def sweep(self) -> int:
+        """Expire idle sessions now instead of waiting for the next write"""
+        before = self.expired
+        self._maintain(time.time())
+        return self.expired - before
+
+    def _maintain(self, now: float, keep: str = None):
+        cutoff = now - self.timeout_seconds
+        with transaction(self._connections.get()) as conn:
+            idle = [r[0] for r in conn.execute(
+                "SELECT session_id FROM sessions WHERE last_active < ?", (cutoff,))]
+            self.expired += self._delete(conn, idle)
+
+            # Global cap: drop least recently active sessions (never the one just written)
+            total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM sessions").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            drop = []
+            for session_id, size in conn.execute("SELECT session_id, bytes FROM sessions ORDER BY last_active"):
+                if total <= self.max_bytes:
+                    break
+                if session_id != keep:
+                    drop.append(session_id)
+                    total -= size
+            self.evicted += self._delete(conn, drop)
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, session_ids: List[str]) -> int:
+        for session_id in session_ids:
+            conn.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return len(session_ids)
+
+    def __len__(self) -> int:
+        return self._connections.get().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    @property
+    def bytes(self) -> int:
+        return self._connections.get().execute("SELECT COALESCE(SUM(bytes), 0) FROM sessions").fetchone()[0]
+
+    def stats(self) -> Dict:
+        conn = self._connections.get()
+        return {
+            "storage": "sqlite",
+            "sessions": len(self),
+            "messages": conn.execute("SELECT COUNT(*) FROM session_messages").fetchone()[0],
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "timeout_seconds": self.timeout_seconds,
+            "history_length": self.history_length,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
+
+
+class SQLiteConversationLog(ConversationLog):
+    """Conversation log in the shared SQLite file, group-committed by the same writer thread
+
+    Each process has its own writer; WAL serialises their commits. The fsync
+    policy maps onto synchronous: "commit" is FULL, anything else NORMAL
+    (still crash-consistent, the last commits may be lost on power failure).
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0, **kwargs):
+        self.busy_timeout = busy_timeout
+        ensure_schema(path, busy_timeout)
+        self._connections = ThreadConnections(path, busy_timeout)
+        super().__init__(path, **kwargs)
+
+    def _open(self):
+        return connect(self.path, self.busy_timeout, "FULL" if self.fsync == "commit" else "NORMAL")
+
+    def _run(self, conn):
+        lost = False  # A batch since the last flush barrier failed to commit
+
+        try:
+            while True:
+                batch, waiters, stop = self._next_batch()
+
+                if batch:
+                    try:
+                        with transaction(conn):
+                            conn.executemany(
+                                "INSERT INTO conversations (session_id, user_message, bot_response, timestamp) "
+                                "VALUES (?, ?, ?, ?)",
+                                [tuple(r.get(k) for k in CONVERSATION_FIELDS) for r in batch])
+                        self.records_written += len(batch)
+                        self.commits += 1
+                    except sqlite3.Error as e:
+                        self.last_error = str(e)
+                        lost = True
+                        logger.error("❌ Conversation log write failed: %s", e)
+
+                for waiter in waiters:
+                    waiter.set_result(not lost)
+                if waiters:
+                    lost = False
+
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def history(self, session_id: str, limit: int = 10) -> List[Dict]:
+        """Last limit records of a session, oldest first (committed by any worker)"""
+        rows = self._connections.get().execute(
+            "SELECT session_id, user_message, bot_response, timestamp FROM conversations "
+            "WHERE session_id = ? ORDER BY id DESC LIMIT ?", (session_id, limit)).fetchall()
+        return [dict(zip(CONVERSATION_FIELDS, row)) for row in reversed(rows)]
+
+    def count(self) -> int:
+        return self._connections.get().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    def import_records(self, records: Iterable[Dict]) -> int:
+        """Bulk load existing records (JSONL/JSON migration) in one transaction"""
+        rows = [tuple(r.get(k) for k in CONVERSATION_FIELDS) for r in records]
+        with transaction(self._connections.get()) as conn:
+            conn.executemany(
+                "INSERT INTO conversations (session_id, user_message, bot_response, timestamp) VALUES (?, ?, ?, ?)",
+                rows)
+        return len(rows)
+
+
+def iter_sqlite_conversations(path: str, after_id: int = 0) -> Iterator[Dict]:
+    """Stream conversation records out of the shared store, oldest first"""
+    for _, record in iter_sqlite_conversation_rows(path, after_id):
+        yield record
+
+
+def iter_sqlite_conversation_rows(path: str, after_id: int = 0) -> Iterator[Tuple[int, Dict]]:
+    """(row id, record) for records committed after after_id"""
+    if not os.path.exists(path):
+        return
+    conn = connect(path)
+    try:
+        for row in conn.execute(
+                "SELECT id, session_id, user_message, bot_response, timestamp FROM conversations "
+                "WHERE id > ? ORDER BY id", (after_id,)):
+            yield row[0], dict(zip(CONVERSATION_FIELDS, row[1:]))
+    finally:
+        conn.close()
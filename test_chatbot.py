@@ -4,6 +4,62 @@ import time
 from colorama import init, Fore, Back, Style
 init()
 
+# Test cases (also the message mix for benchmarks/load_test.py)
+TEST_CASES = [
+    {
+        "category": "Order Tracking",
+        "tests": [
+            ("Track order ORD100000", ["delivered", "domino"]),
+            ("Where is my order ORD100001", ["preparing", "biryani"]),
+            ("Check status of ORD100002", ["out for delivery", "burger"]),
+            ("ORD100003 status", ["cancelled", "refund"]),
+            ("Track order ORD999999", ["not found", "couldn't find"]),
+        ]
+    },
+    {
+        "category": "Restaurant Search",
+        "tests": [
+            ("Show pizza restaurants", ["domino", "pizza"]),
+            ("Find biryani places", ["biryani"]),
+            ("burger restaurants near me", ["burger"]),
+            ("Show popular restaurants", ["top rated", "popular"]),
+            ("Quick delivery restaurants", ["quick", "fast", "20 min", "30 min"]),
+        ]
+    },
+    {
+        "category": "Menu Queries",
+        "tests": [
+            ("Show menu for Domino's", ["margherita", "pizza", "₹"]),
+            ("What's on Burger King menu", ["whopper", "burger"]),
+            ("Menu", ["restaurant", "which"]),
+        ]
+    },
+    {
+        "category": "General Queries",
+        "tests": [
+            ("Hi", ["hello", "welcome", "help"]),
+            ("I need help", ["help", "assist"]),
+            ("What can you do", ["order", "restaurant", "help"]),
+        ]
+    },
+    {
+        "category": "Hindi Support",
+        "tests": [
+            ("मेरा ऑर्डर कहाँ है", ["order", "id"]),
+            ("पिज़्ज़ा दिखाओ", ["pizza", "domino"]),
+        ]
+    },
+    {
+        "category": "LLM Fallback",
+        "tests": [
+            ("What is Swiggy One membership?", []),
+            ("Can I pay with UPI?", []),
+            ("How do I apply a coupon code?", []),
+            ("Can I schedule a delivery for tomorrow?", []),
+        ]
+    }
+]
+
 class ChatbotTester:
     def __init__(self):
         self.api_url = "http://localhost:8000"
@@ -87,58 +143,11 @@ class ChatbotTester:
             print(f"\n{Fore.RED}Please start the server first!{Style.RESET_ALL}")
             return
         
-        # Test cases
-        test_cases = [
-            {
-                "category": "Order Tracking",
-                "tests": [
-                    ("Track order ORD100000", ["delivered", "domino"]),
-                    ("Where is my order ORD100001", ["preparing", "biryani"]),
-                    ("Check status of ORD100002", ["out for delivery", "burger"]),
-                    ("ORD100003 status", ["cancelled", "refund"]),
-                    ("Track order ORD999999", ["not found", "couldn't find"]),
-                ]
-            },
-            {
-                "category": "Restaurant Search",
-                "tests": [
-                    ("Show pizza restaurants", ["domino", "pizza"]),
-                    ("Find biryani places", ["biryani"]),
-                    ("burger restaurants near me", ["burger"]),
-                    ("Show popular restaurants", ["popular", "rating"]),
-                    ("Quick delivery restaurants", ["quick", "fast", "20 min", "30 min"]),
-                ]
-            },
-            {
-                "category": "Menu Queries",
-                "tests": [
-                    ("Show menu for Domino's", ["margherita", "pizza", "₹"]),
-                    ("What's on Burger King menu", ["whopper", "burger"]),
-                    ("Menu", ["restaurant", "which"]),
-                ]
-            },
-            {
-                "category": "General Queries",
-                "tests": [
-                    ("Hi", ["hello", "welcome", "help"]),
-                    ("I need help", ["help", "assist"]),
-                    ("What can you do", ["order", "restaurant", "help"]),
-                ]
-            },
-            {
-                "category": "Hindi Support",
-                "tests": [
-                    ("मेरा ऑर्डर कहाँ है", ["order", "id"]),
-                    ("पिज़्ज़ा दिखाओ", ["pizza", "domino"]),
-                ]
-            }
-        ]
-        
         # Run tests by category
         total_tests = 0
         passed_tests = 0
         
-        for category in test_cases:
+        for category in TEST_CASES:
             self.print_header(f"Testing: {category['category']}")
             
             for test_message, keywords in category['tests']: